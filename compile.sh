@@ -2,6 +2,20 @@ export PYTHONPATH=./
 pdoc ggame.py --html --html-dir out --overwrite
 pdoc ggmath.py --html --html-dir out --overwrite
 pdoc ggrocket.py --html --html-dir out --overwrite
+pdoc ggnav.py --html --html-dir out --overwrite
+pdoc ggsteer.py --html --html-dir out --overwrite
+pdoc ggparticle.py --html --html-dir out --overwrite
+pdoc ggecs.py --html --html-dir out --overwrite
+pdoc ggphysics.py --html --html-dir out --overwrite
+pdoc ggcache.py --html --html-dir out --overwrite
+pdoc ggasync.py --html --html-dir out --overwrite
 mv out/ggame.m.html out/index.html
 mv out/ggmath.m.html out/ggmath.html
 mv out/ggrocket.m.html out/ggrocket.html
+mv out/ggnav.m.html out/ggnav.html
+mv out/ggsteer.m.html out/ggsteer.html
+mv out/ggparticle.m.html out/ggparticle.html
+mv out/ggecs.m.html out/ggecs.html
+mv out/ggphysics.m.html out/ggphysics.html
+mv out/ggcache.m.html out/ggcache.html
+mv out/ggasync.m.html out/ggasync.html
@@ -28,8 +28,14 @@ The ggame library is intended to be trivially easy to use. For example:
 ## Extensions
 
 The `ggame` library has been extended with [ggmath](/ggame/ggmath.html) for geometry
-exploration in a manner reminiscent of Geogebra, and [ggrocket](/ggame/ggrocket.html)
-for tools and classes to use with rocket and orbital simulations.
+exploration in a manner reminiscent of Geogebra, [ggrocket](/ggame/ggrocket.html)
+for tools and classes to use with rocket and orbital simulations, 
+[ggnav](/ggame/ggnav.html) for steering many sprites across a grid,
+[ggsteer](/ggame/ggsteer.html) for flocking, [ggparticle](/ggame/ggparticle.html)
+for particle effects, [ggecs](/ggame/ggecs.html) for very large numbers of
+simple game objects, [ggphysics](/ggame/ggphysics.html) for rigid body physics,
+[ggcache](/ggame/ggcache.html) for caching decoded images between runs and
+[ggasync](/ggame/ggasync.html) for running applications with asyncio.
 
 ## Overview
 
@@ -91,12 +97,465 @@ about x and y coordinates in math class!
 """
 
 import math
+from time import time
+import heapq
+import bisect
+from array import array
+from collections import OrderedDict
 
 try:
     from ggame.sysdeps import *
 except:
     from sysdeps import *
 
+def _affineMultiply(m1, m2):
+    """
+    Compose two 2x3 affine matrices, each a tuple (a, b, c, d, tx, ty) that 
+    maps (x,y) to (a*x + c*y + tx, b*x + d*y + ty). The result applies `m2` 
+    first, then `m1`.
+    """
+    a1, b1, c1, d1, tx1, ty1 = m1
+    a2, b2, c2, d2, tx2, ty2 = m2
+    return (a1*a2 + c1*b2, b1*a2 + d1*b2,
+        a1*c2 + c1*d2, b1*c2 + d1*d2,
+        a1*tx2 + c1*ty2 + tx1, b1*tx2 + d1*ty2 + ty1)
+
+
+def _polygonEdges(verts):
+    """
+    List the edges of a closed polygon, or the single segment of a line.
+    """
+    if len(verts) > 2:
+        return list(zip(verts, verts[1:] + verts[:1]))
+    return [(verts[0], verts[-1])]
+
+
+def _pointInPolygon(x, y, verts):
+    """
+    Even-odd test for point (x, y) inside the polygon `verts`.
+    """
+    inside = False
+    for (x1, y1), (x2, y2) in _polygonEdges(verts):
+        if (y1 > y) != (y2 > y) and x < x1 + (y - y1) * (x2 - x1) / (y2 - y1):
+            inside = not inside
+    return inside
+
+
+def _raySegment(ox, oy, dx, dy, x1, y1, x2, y2):
+    """
+    Return the parameter t >= 0 at which the ray (ox, oy) + t*(dx, dy) 
+    crosses the segment from (x1, y1) to (x2, y2), or None.
+    """
+    ex = x2 - x1
+    ey = y2 - y1
+    denom = dx*ey - dy*ex
+    if denom == 0:
+        return None
+    ax = x1 - ox
+    ay = y1 - oy
+    t = (ax*ey - ay*ex) / denom
+    u = (ax*dy - ay*dx) / denom
+    if t >= 0 and 0 <= u <= 1:
+        return t
+    return None
+
+
+def _segmentsCross(p1, p2, q1, q2):
+    """
+    True if the segment p1-p2 crosses the segment q1-q2.
+    """
+    t = _raySegment(p1[0], p1[1], p2[0] - p1[0], p2[1] - p1[1], 
+        q1[0], q1[1], q2[0], q2[1])
+    return t is not None and t <= 1
+
+
+def _rayCircle(ox, oy, dx, dy, cx, cy, r):
+    """
+    Return the parameter t >= 0 at which the ray (ox, oy) + t*(dx, dy) 
+    enters the circle at (cx, cy) of radius `r`, or None if it misses or 
+    starts inside.
+    """
+    fx = ox - cx
+    fy = oy - cy
+    a = dx*dx + dy*dy
+    b = fx*dx + fy*dy
+    c = fx*fx + fy*fy - r*r
+    if c <= 0 or a == 0 or b > 0:
+        return None
+    disc = b*b - a*c
+    if disc < 0:
+        return None
+    return (-b - math.sqrt(disc)) / a
+
+
+def _segmentDistance(x, y, x1, y1, x2, y2):
+    """
+    Distance from point (x, y) to the segment from (x1, y1) to (x2, y2).
+    """
+    ex = x2 - x1
+    ey = y2 - y1
+    length = ex*ex + ey*ey
+    u = 0 if length == 0 else max(0, min(1, ((x - x1)*ex + (y - y1)*ey) / length))
+    return math.hypot(x - x1 - u*ex, y - y1 - u*ey)
+
+
+def _timeOfImpact(a, b, mx, my):
+    """
+    Shapes `a` and `b` are either (x, y, radius) circle tuples or lists of 
+    polygon vertices, at their final positions. Shape `a` has moved by 
+    (mx, my) relative to `b`. Return the fraction of that movement (0 to 1) 
+    at which the shapes first touched, or None if they never did.
+    """
+    if type(a) is not tuple and type(b) is tuple:
+        return _timeOfImpact(b, a, -mx, -my)
+    times = []
+    if type(a) is tuple:
+        cx, cy, r = a
+        sx, sy = cx - mx, cy - my
+        if type(b) is tuple:
+            bx, by, br = b
+            if math.hypot(sx - bx, sy - by) <= r + br:
+                return 0.0
+            times.append(_rayCircle(sx, sy, mx, my, bx, by, r + br))
+        else:
+            edges = _polygonEdges(b)
+            if ((len(b) > 2 and _pointInPolygon(sx, sy, b))
+                or any(_segmentDistance(sx, sy, x1, y1, x2, y2) <= r 
+                    for (x1, y1), (x2, y2) in edges)):
+                return 0.0
+            # sweep the circle center against the edges, grown by the radius
+            for (x1, y1), (x2, y2) in edges:
+                times.append(_rayCircle(sx, sy, mx, my, x1, y1, r))
+                times.append(_rayCircle(sx, sy, mx, my, x2, y2, r))
+                length = math.hypot(x2 - x1, y2 - y1)
+                if length:
+                    nx = (y1 - y2) / length * r
+                    ny = (x2 - x1) / length * r
+                    times.append(_raySegment(sx, sy, mx, my, 
+                        x1 + nx, y1 + ny, x2 + nx, y2 + ny))
+                    times.append(_raySegment(sx, sy, mx, my, 
+                        x1 - nx, y1 - ny, x2 - nx, y2 - ny))
+    else:
+        start = [(x - mx, y - my) for x, y in a]
+        astart = _polygonEdges(start)
+        bedges = _polygonEdges(b)
+        if ((len(b) > 2 and _pointInPolygon(start[0][0], start[0][1], b))
+            or (len(start) > 2 and _pointInPolygon(b[0][0], b[0][1], start))
+            or any(_segmentsCross(p1, p2, q1, q2) 
+                for p1, p2 in astart for q1, q2 in bedges)):
+            return 0.0
+        # first contact is a vertex of one polygon meeting an edge of the other
+        for x, y in start:
+            for (x1, y1), (x2, y2) in bedges:
+                times.append(_raySegment(x, y, mx, my, x1, y1, x2, y2))
+        for x, y in b:
+            for (x1, y1), (x2, y2) in astart:
+                times.append(_raySegment(x, y, -mx, -my, x1, y1, x2, y2))
+    times = [t for t in times if t is not None and t <= 1]
+    return min(times) if times else None
+
+
+class _AABBNode(object):
+    """
+    A node in an `_AABBTree`. Leaf nodes reference an object; branch nodes
+    bound their two children.
+    """
+
+    def __init__(self):
+        self.xmin = self.ymin = self.xmax = self.ymax = 0
+        self.parent = self.left = self.right = None
+        self.obj = None
+        self.height = 0
+
+
+class _AABBTree(object):
+    """
+    Dynamic bounding volume tree of axis-aligned boxes, kept balanced with 
+    AVL rotations. Leaf boxes are "fattened" by `margin` pixels so that small
+    movements of an object do not require it to be reinserted.
+    """
+
+    def __init__(self, margin=8):
+        self.root = None
+        self.margin = margin
+
+    def insert(self, obj, xmin, ymin, xmax, ymax):
+        """
+        Add `obj` with the given extents. Returns the leaf node, which 
+        must be supplied to `update` and `remove`.
+        """
+        leaf = _AABBNode()
+        leaf.obj = obj
+        self._fatten(leaf, xmin, ymin, xmax, ymax)
+        self._insertLeaf(leaf)
+        return leaf
+
+    def remove(self, leaf):
+        self._removeLeaf(leaf)
+
+    def update(self, leaf, xmin, ymin, xmax, ymax):
+        """
+        Record new extents for a leaf. The tree is only modified if the new
+        extents escape the fattened box. Returns True if it was reinserted.
+        """
+        if (leaf.xmin <= xmin and leaf.ymin <= ymin 
+            and leaf.xmax >= xmax and leaf.ymax >= ymax):
+            return False
+        self._removeLeaf(leaf)
+        self._fatten(leaf, xmin, ymin, xmax, ymax)
+        self._insertLeaf(leaf)
+        return True
+
+    def query(self, xmin, ymin, xmax, ymax):
+        """
+        Return a list of objects whose (fattened) boxes overlap the region.
+        """
+        result = []
+        stack = [self.root] if self.root else []
+        while stack:
+            node = stack.pop()
+            if (node.xmin > xmax or node.xmax < xmin 
+                or node.ymin > ymax or node.ymax < ymin):
+                continue
+            if node.left is None:
+                result.append(node.obj)
+            else:
+                stack.append(node.left)
+                stack.append(node.right)
+        return result
+
+    def raycast(self, ox, oy, dx, dy, maxdist, test, first=True):
+        """
+        Find objects hit by the ray from (ox, oy) along the unit vector
+        (dx, dy), up to `maxdist`. Boxes are visited nearest first and
+        `test(obj, maxdist)` must return the distance to the object, or None
+        if it is missed. Returns a list of (distance, obj) sorted by distance.
+        If `first` is True only the nearest hit is kept and any branch
+        beyond it is pruned.
+        """
+        hits = []
+        if self.root is None:
+            return hits
+        entry = self._rayBox(self.root, ox, oy, dx, dy, maxdist)
+        if entry is None:
+            return hits
+        heap = [(entry, 0, self.root)]
+        count = 1
+        while heap:
+            entry, _, node = heapq.heappop(heap)
+            if entry > maxdist:
+                break
+            if node.left is None:
+                dist = test(node.obj, maxdist)
+                if dist is not None and dist <= maxdist:
+                    if first:
+                        hits = [(dist, node.obj)]
+                        maxdist = dist
+                    else:
+                        hits.append((dist, node.obj))
+                continue
+            for child in (node.left, node.right):
+                entry = self._rayBox(child, ox, oy, dx, dy, maxdist)
+                if entry is not None:
+                    heapq.heappush(heap, (entry, count, child))
+                    count += 1
+        hits.sort(key=lambda hit: hit[0])
+        return hits
+
+    def nearest(self, x, y, k, maxdist, distance):
+        """
+        Best-first search for the `k` objects nearest to (x, y), no farther
+        than `maxdist`. `distance(obj)` must return the distance from the
+        point to the object (never less than the distance to its box), or
+        None to skip it. Returns a list of (distance, obj), nearest first.
+        The search ends as soon as `k` objects have been found.
+        """
+        result = []
+        if self.root is None or k <= 0:
+            return result
+        heap = [(self._pointBox(self.root, x, y), 0, self.root, False)]
+        count = 1
+        while heap and len(result) < k:
+            dist, _, item, exact = heapq.heappop(heap)
+            if dist > maxdist:
+                break
+            if exact:
+                result.append((dist, item))
+            elif item.left is None:
+                dist = distance(item.obj)
+                if dist is not None:
+                    heapq.heappush(heap, (dist, count, item.obj, True))
+                    count += 1
+            else:
+                for child in (item.left, item.right):
+                    heapq.heappush(heap, (self._pointBox(child, x, y), count, child, False))
+                    count += 1
+        return result
+
+    @staticmethod
+    def _pointBox(node, x, y):
+        """
+        Distance from (x, y) to the box of `node`; zero if it is inside.
+        """
+        dx = max(node.xmin - x, 0, x - node.xmax)
+        dy = max(node.ymin - y, 0, y - node.ymax)
+        return math.hypot(dx, dy)
+
+    @staticmethod
+    def _rayBox(node, ox, oy, dx, dy, maxdist):
+        """
+        Slab test: return the distance at which the ray enters the box of
+        `node`, or None if it misses within `maxdist`.
+        """
+        tmin = 0.0
+        tmax = maxdist
+        for o, d, lo, hi in ((ox, dx, node.xmin, node.xmax),
+                             (oy, dy, node.ymin, node.ymax)):
+            if d == 0:
+                if o < lo or o > hi:
+                    return None
+            else:
+                t1 = (lo - o) / d
+                t2 = (hi - o) / d
+                if t1 > t2:
+                    t1, t2 = t2, t1
+                tmin = max(tmin, t1)
+                tmax = min(tmax, t2)
+                if tmin > tmax:
+                    return None
+        return tmin
+
+    def _fatten(self, leaf, xmin, ymin, xmax, ymax):
+        m = self.margin
+        leaf.xmin = xmin - m
+        leaf.ymin = ymin - m
+        leaf.xmax = xmax + m
+        leaf.ymax = ymax + m
+
+    @staticmethod
+    def _perimeter(xmin, ymin, xmax, ymax):
+        return 2 * (xmax - xmin + ymax - ymin)
+
+    @staticmethod
+    def _refit(node):
+        left = node.left
+        right = node.right
+        node.xmin = min(left.xmin, right.xmin)
+        node.ymin = min(left.ymin, right.ymin)
+        node.xmax = max(left.xmax, right.xmax)
+        node.ymax = max(left.ymax, right.ymax)
+        node.height = 1 + max(left.height, right.height)
+
+    def _insertLeaf(self, leaf):
+        if self.root is None:
+            self.root = leaf
+            leaf.parent = None
+            return
+        # find the best sibling, using the perimeter of the combined boxes as cost
+        perimeter = self._perimeter
+        node = self.root
+        while node.left is not None:
+            combined = perimeter(min(node.xmin, leaf.xmin), min(node.ymin, leaf.ymin),
+                max(node.xmax, leaf.xmax), max(node.ymax, leaf.ymax))
+            cost = 2 * combined
+            inherit = 2 * (combined - perimeter(node.xmin, node.ymin, node.xmax, node.ymax))
+            costs = []
+            for child in (node.left, node.right):
+                c = perimeter(min(child.xmin, leaf.xmin), min(child.ymin, leaf.ymin),
+                    max(child.xmax, leaf.xmax), max(child.ymax, leaf.ymax)) + inherit
+                if child.left is not None:
+                    c -= perimeter(child.xmin, child.ymin, child.xmax, child.ymax)
+                costs.append(c)
+            if cost < costs[0] and cost < costs[1]:
+                break
+            node = node.left if costs[0] < costs[1] else node.right
+        sibling = node
+        oldparent = sibling.parent
+        newparent = _AABBNode()
+        newparent.parent = oldparent
+        newparent.left = sibling
+        newparent.right = leaf
+        sibling.parent = leaf.parent = newparent
+        if oldparent is None:
+            self.root = newparent
+        elif oldparent.left is sibling:
+            oldparent.left = newparent
+        else:
+            oldparent.right = newparent
+        self._refit(newparent)
+        self._fixUpwards(newparent.parent)
+
+    def _removeLeaf(self, leaf):
+        if leaf is self.root:
+            self.root = None
+            return
+        parent = leaf.parent
+        grandparent = parent.parent
+        sibling = parent.right if parent.left is leaf else parent.left
+        leaf.parent = None
+        sibling.parent = grandparent
+        if grandparent is None:
+            self.root = sibling
+        else:
+            if grandparent.left is parent:
+                grandparent.left = sibling
+            else:
+                grandparent.right = sibling
+            self._fixUpwards(grandparent)
+
+    def _fixUpwards(self, node):
+        while node is not None:
+            node = self._balance(node)
+            self._refit(node)
+            node = node.parent
+
+    def _balance(self, a):
+        """
+        Perform a left or right rotation if node `a` is imbalanced. Returns
+        the root of the rotated subtree.
+        """
+        if a.left is None or a.height < 2:
+            return a
+        b = a.left
+        c = a.right
+        balance = c.height - b.height
+        if balance > 1:
+            return self._rotate(a, c, b, 'right')
+        if balance < -1:
+            return self._rotate(a, b, c, 'left')
+        return a
+
+    def _rotate(self, a, up, other, side):
+        """
+        Promote child `up` of node `a` (on `side`) to replace `a`.
+        """
+        f = up.left
+        g = up.right
+        up.left = a
+        up.parent = a.parent
+        a.parent = up
+        if up.parent is None:
+            self.root = up
+        elif up.parent.left is a:
+            up.parent.left = up
+        else:
+            up.parent.right = up
+        # the taller grandchild stays with `up`, the other replaces it under `a`
+        if f.height > g.height:
+            keep, move = f, g
+        else:
+            keep, move = g, f
+        up.right = keep
+        if side == 'right':
+            a.right = move
+        else:
+            a.left = move
+        move.parent = a
+        self._refit(a)
+        self._refit(up)
+        return up
+
+
 class Frame(object):
     """
     Frame is a utility class for expressing the idea of a rectangular region.
@@ -252,7 +711,15 @@ class ImageAsset(_Asset):
     The `ImageAsset` class connects ggame to a specific image **file**.
     """
 
-    def __init__(self, url, frame=None, qty=1, direction='horizontal', margin=0):
+    cache = None
+    """
+    An optional cache of decoded images, such as a `ggcache.ImageCache`,
+    through which image files are loaded. By default every image file is
+    decoded when it is loaded.
+    """
+
+    def __init__(self, url, frame=None, qty=1, direction='horizontal', margin=0, 
+        lazy=False):
         """
         All `ggame.ImageAsset` instances must specify a file name or url with
         the `url` parameter.
@@ -271,6 +738,14 @@ class ImageAsset(_Asset):
         images. When used in this way, the `frame` parameter must define the
         area of the **first** image in the collection; all subsequent images
         in the list are assumed to be the same size.
+
+        If `lazy` is True, the asset is created at once with blank images,
+        and the image file is loaded in the background. Sprites may use the
+        asset straight away: they show the image once it has loaded (see
+        `ggame.ImageAsset.loaded` and `ggame.App.preload`). Give a `frame`
+        if the size of the asset is needed before then; otherwise its width
+        and height are zero until it has loaded. In the browser, images
+        are always loaded in the background by the system.
         """
         super().__init__()
         self.url = url
@@ -279,12 +754,14 @@ class ImageAsset(_Asset):
         """
         del self.GFXlist[0]
         self.width = self.height = 0
-        self.append(url, frame, qty, direction, margin)
+        self._loading = []
+        self.append(url, frame, qty, direction, margin, lazy)
 
     def _subframe(self, texture, frame):
         return GFX_Texture(texture, frame.GFX)
         
-    def append(self, url, frame=None, qty=1, direction='horizontal', margin=0):
+    def append(self, url, frame=None, qty=1, direction='horizontal', margin=0,
+        lazy=False):
         """
         Append a texture asset from a new image file (or url). This method
         allows you to build a collection of images into an asset (such as you
@@ -297,7 +774,52 @@ class ImageAsset(_Asset):
         This method allows you to build up an asset that consists of 
         multiple rows or columns of images in a sprite sheet or sheets.
         """
-        GFX = GFX_Texture_fromImage(url, False)
+        if lazy and GFX_Texture_decode is not None:
+            if frame is not None:
+                self.width = frame.w
+                self.height = frame.h
+            w, h = (frame.w, frame.h) if frame is not None else (0, 0)
+            start = len(self.GFXlist)
+            for i in range(qty):
+                self.GFXlist.append(GFX_Texture_placeholder(w, h))
+            self._loading.append((App._loadImage(url), start, frame, qty, direction, margin))
+            App._addLoading(self)
+        else:
+            base = None
+            if ImageAsset.cache is not None:
+                base = ImageAsset.cache.texture(url)
+            if base is None:
+                base = GFX_Texture_fromImage(url, False)
+            self.GFXlist.extend(self._cut(base, frame, qty, direction, margin))
+
+    @property
+    def loaded(self):
+        """
+        This boolean attribute is `False` while any image of a `lazy` asset
+        is still loading.
+        """
+        return not self._loading
+
+    def _finishLoading(self):
+        """
+        Fill in the placeholder images of every load that has finished in
+        the background. Returns True if there were any.
+        """
+        done = [load for load in self._loading if load[0].done()]
+        for load in done:
+            self._loading.remove(load)
+            future, start, frame, qty, direction, margin = load
+            textures = self._cut(future.result(), frame, qty, direction, margin)
+            for i, texture in enumerate(textures):
+                self.GFXlist[start + i].assign(texture)
+        return len(done) > 0
+
+    def _cut(self, base, frame, qty, direction, margin):
+        """
+        Return the list of `qty` textures cut from the `base` texture.
+        """
+        textures = []
+        GFX = base
         dx = 0
         dy = 0
         for i in range(qty):
@@ -309,11 +831,12 @@ class ImageAsset(_Asset):
                 elif direction == 'vertical':
                     dy = frame.h + margin
                 f = Frame(frame.x + dx * i, frame.y + dy * i, frame.w, frame.h)
-                GFX = self._subframe(GFX, f)
+                GFX = self._subframe(base, f)
             else:
                 self.width = GFX.width
                 self.height = GFX.height
-            self.GFXlist.append(GFX)
+            textures.append(GFX)
+        return textures
 
 
 class Color(object):
@@ -609,6 +1132,16 @@ class Sprite(object):
         circular collision border. 
         """
         self._index = 0
+        self._parent = None
+        self._matrix = None
+        self._treenode = None
+        self._tree = None
+        self._static = False
+        self._zIndex = 0
+        self._layername = 'default'
+        self._container = None
+        self._layerkey = None
+        self._prevextents = None
         if type(asset) == ImageAsset:
             self.asset = asset
             try:
@@ -634,6 +1167,29 @@ class Sprite(object):
             self.edgedef = asset
         else:
             self.edgedef = edgedef
+        self.pixelCollision = False
+        """
+        Set this boolean attribute to `True` to detect collisions using the 
+        transparency of the sprite's image, instead of its `edgedef`. Only the
+        opaque pixels of the image will collide with other sprites. This is
+        more expensive than the default collision test, but bitmasks are
+        cached for each image, rotation and scale.
+        """
+        self.collisionLayer = 1
+        """
+        Integer bitfield of the collision layers that this sprite belongs to.
+        Two sprites can only collide if each one's `collisionLayer` shares a 
+        bit with the other's `ggame.Sprite.collisionMask`.
+
+        Example: `bullet.collisionLayer = BULLETS` where `BULLETS = 4`.
+        """
+        self.collisionMask = 0xFFFFFFFF
+        """
+        Integer bitfield of the collision layers that this sprite can collide
+        with. By default it can collide with every layer. 
+
+        Example: `bullet.collisionMask = ENEMIES | TERRAIN`
+        """
         self.xmin = self.xmax = self.ymin = self.ymax = 0
         self.position = pos
         """Tuple indicates the position of the sprite on the screen."""
@@ -665,25 +1221,61 @@ class Sprite(object):
             h = self.edgedef.halfh * 2
             self._basevertices = [(0,0), (0,h), (w,h), (w,0)]
 
+    def _xform(self):
+        """
+        Return the cached affine matrix (a, b, c, d, ox, oy) that maps 
+        sprite-relative (unscaled, unrotated) coordinates to coordinates 
+        relative to the sprite position. The matrix depends only on rotation, 
+        scale, center and size, so moving the sprite does not invalidate it.
+        """
+        if self._matrix is None:
+            sc = self.scale
+            # find center as sprite-relative points (note sprite may be scaled)
+            x = self.width * self.fxcenter / sc
+            y = self.height * self.fycenter / sc
+            c = math.cos(self.rotation) * sc
+            s = math.sin(self.rotation) * sc
+            ox = -c*x - s*y
+            oy = s*x - c*y
+            self._matrix = (c, -s, s, c, ox, oy)
+            self._relvertices = [(c*xp + s*yp + ox, -s*xp + c*yp + oy)
+                                    for xp,yp in self._basevertices]
+            # share the matrix with the system renderer
+            self.GFX.affine = self._matrix
+        return self._matrix
+
+    def _invalidateXform(self):
+        """
+        Discard the cached matrix after a change to rotation, scale, center or size
+        """
+        self._matrix = None
+        self._invalidateExtents()
+
     def _xformVertices(self):
         """
         Create window-relative list of vertex coordinates for boundary
         """
-        # find center as sprite-relative points (note sprite may be scaled)
-        x = self.width * self.fxcenter / self.scale
-        y = self.height * self.fycenter / self.scale
-        if self.scale != 1.0:
-            sc = self.scale
-            # center-relative, scaled coordinates
-            crsc = [((xp-x)*sc,(yp-y)*sc) for xp,yp in self._basevertices]
-        else:
-            crsc = [(xp-x,yp-y) for xp,yp in self._basevertices]
-            
-        # absolute, rotated coordinates
-        c = math.cos(self.rotation)
-        s = math.sin(self.rotation)
-        self._absolutevertices = [(self.x + x*c + y*s, self.y + -x*s + y*c) 
-                                    for x,y in crsc]
+        self._xform()
+        x = self.x
+        y = self.y
+        self._absolutevertices = [(x + xp, y + yp) for xp,yp in self._relvertices]
+        if self._parent is not None:
+            # position is relative to the group: convert to world coordinates
+            a, b, c, d, tx, ty = self._parent._worldMatrix()
+            self._absolutevertices = [(a*x + c*y + tx, b*x + d*y + ty)
+                                        for x,y in self._absolutevertices]
+
+    def _invalidateExtents(self):
+        """
+        Flag extents for recalculation, including those of any enclosing group
+        """
+        self._extentsdirty = True
+        if self._treenode is not None:
+            App._dirtysprites.add(self)
+            if self._static:
+                App._invalidateStatic()
+        if self._parent is not None:
+            self._parent._invalidateExtents()
 
 
     def _setExtents(self):
@@ -692,15 +1284,20 @@ class Sprite(object):
         """
         if self._extentsdirty:
             if type(self.asset) is CircleAsset:
-                th = math.atan2(
-                    self.fycenter - 0.5, 0.5 - self.fxcenter) + self.rotation
-                D = self.width
-                L = math.sqrt(math.pow(self.fxcenter - 0.5, 2) + 
-                    math.pow(self.fycenter - 0.5, 2)) * D
-                self.xmin = self.x + int(L*math.cos(th)) - D//2
-                self.ymin = self.y - int(L*math.sin(th)) - D//2
-                self.xmax = self.xmin + D
-                self.ymax = self.ymin + D
+                a, b, c, d, ox, oy = self._xform()
+                # circle center, relative to the sprite position
+                sc = self.scale
+                xc = self.width / sc / 2
+                yc = self.height / sc / 2
+                x = self.x + a*xc + c*yc + ox
+                y = self.y + b*xc + d*yc + oy
+                r = self.width / 2
+                if self._parent is not None:
+                    a, b, c, d, tx, ty = self._parent._worldMatrix()
+                    r = r * math.hypot(a, b)
+                    x, y = a*x + c*y + tx, b*x + d*y + ty
+                self.xmin, self.xmax = x - r, x + r
+                self.ymin, self.ymax = y - r, y + r
             else:
                 # Build vertex list
                 self._xformVertices()
@@ -710,18 +1307,23 @@ class Sprite(object):
                 self.ymin = min(y)
                 self.ymax = max(y)
             self._extentsdirty = False
+            if self._treenode is not None:
+                self._tree.update(self._treenode, 
+                    self.xmin, self.ymin, self.xmax, self.ymax)
 
     def firstImage(self):
         """
         Select and display the *first* image used by this sprite.
         """
         self.GFX.texture = self.asset[0]
+        self._displayChanged()
     
     def lastImage(self):
         """
         Select and display the *last* image used by this sprite.
         """
         self.GFX.texture = self.asset[-1]
+        self._displayChanged()
     
     def nextImage(self, wrap = False):
         """
@@ -740,6 +1342,7 @@ class Sprite(object):
             else:
                 self._index = len(self.asset)-1
         self.GFX.texture = self.asset[self._index]
+        self._displayChanged()
     
     def prevImage(self, wrap = False):
         """
@@ -758,7 +1361,35 @@ class Sprite(object):
             else:
                 self._index = 0
         self.GFX.texture = self.asset[self._index]
+        self._displayChanged()
+
+    def _displayChanged(self):
+        if self._static:
+            App._invalidateStatic()
     
+    def animate(self, frames=None, fps=10, mode="loop", oncomplete=None):
+        """
+        Begin playing a sequence of images on this sprite at a fixed rate. The
+        parameters are identical to those supplied to the `ggame.Animation`
+        initialization method. Returns the new `ggame.Animation` object, which
+        may be used to stop the animation.
+
+        Example: `explosion.animate(fps=20, mode=Animation.once, oncomplete=done)`
+        """
+        return Animation(self, frames, fps, mode, oncomplete)
+
+    def tween(self, attribute, end, duration=1.0, easing=None, oncomplete=None):
+        """
+        Smoothly change the `attribute` (e.g. `'x'`, `'y'`, `'scale'` or
+        `'rotation'`) of this sprite to the value `end` over `duration` 
+        seconds. The parameters are identical to those supplied to the
+        `ggame.Tween` initialization method. Returns the new `ggame.Tween`
+        object, which may be used to cancel the change or chain others to it.
+
+        Example: `coin.tween('y', coin.y - 50, 0.5, Tween.easeOut)`
+        """
+        return Tween(self, attribute, end, duration, easing, oncomplete)
+
     def setImage(self, index=0):
         """
         Select the image to display by giving its `index`, where an index
@@ -783,6 +1414,56 @@ class Sprite(object):
     
     
 
+    @property
+    def group(self):
+        """
+        The `ggame.SpriteGroup` that this sprite belongs to, or None.
+        """
+        return self._parent
+
+    @property
+    def zIndex(self):
+        """
+        This number determines the drawing order of the sprite within its 
+        layer (or group). Sprites with a higher `zIndex` are drawn on top of
+        those with a lower one. Sprites with equal `zIndex` are drawn in the
+        order they were added, so assigning to this attribute also brings the 
+        sprite to the top of others with the same value. The default is 0.
+        """
+        return self._zIndex
+
+    @zIndex.setter
+    def zIndex(self, value):
+        container = self._container
+        if container is not None:
+            container.remove(self)
+        self._zIndex = value
+        if container is not None:
+            container.add(self)
+            self._displayChanged()
+
+    @property
+    def layer(self):
+        """
+        The name of the layer that this sprite is drawn in. Layers are created
+        with `ggame.App.addLayer`, or automatically when first named. The
+        default is `'default'`. Sprites in a `ggame.SpriteGroup` are drawn 
+        with the group, and static sprites (see `ggame.Sprite.static`) are
+        always drawn in their own layer.
+
+        Example: `cloud.layer = 'sky'`
+        """
+        return self._layername
+
+    @layer.setter
+    def layer(self, value):
+        if self._container is not None and self._parent is None:
+            App._removeGFX(self)
+            self._layername = value
+            App._addGFX(self)
+        else:
+            self._layername = value
+
     @property
     def index(self):
         """This is an integer index in to the list of images available for this sprite."""
@@ -796,6 +1477,7 @@ class Sprite(object):
         except:
             self._index = 0
             self.GFX.texture = self.asset[self._index]
+        self._displayChanged()
 
     @property
     def width(self):
@@ -808,7 +1490,7 @@ class Sprite(object):
     @width.setter
     def width(self, value):
         self.GFX.width = value
-        self._extentsdirty = True
+        self._invalidateXform()
     
     @property
     def height(self):
@@ -821,7 +1503,7 @@ class Sprite(object):
     @height.setter
     def height(self, value):
         self.GFX.height = value
-        self._extentsdirty = True
+        self._invalidateXform()
         
     @property
     def x(self):
@@ -833,10 +1515,18 @@ class Sprite(object):
         
     @x.setter
     def x(self, value):
-        deltax = value - self.GFX.position.x
-        self.xmax += deltax
-        self.xmin += deltax
-        """Adjust extents directly with low overhead"""
+        if self._parent is None:
+            deltax = value - self.GFX.position.x
+            self.xmax += deltax
+            self.xmin += deltax
+            """Adjust extents directly with low overhead"""
+            if self._treenode is not None:
+                self._tree.update(self._treenode, 
+                    self.xmin, self.ymin, self.xmax, self.ymax)
+                if self._static:
+                    App._invalidateStatic()
+        else:
+            self._invalidateExtents()
         self.GFX.position.x = value
 
     @property
@@ -849,10 +1539,18 @@ class Sprite(object):
         
     @y.setter
     def y(self, value):
-        deltay = value - self.GFX.position.y
-        self.ymax += deltay
-        self.ymin += deltay
-        """Adjust extents directly with low overhead"""
+        if self._parent is None:
+            deltay = value - self.GFX.position.y
+            self.ymax += deltay
+            self.ymin += deltay
+            """Adjust extents directly with low overhead"""
+            if self._treenode is not None:
+                self._tree.update(self._treenode, 
+                    self.xmin, self.ymin, self.xmax, self.ymax)
+                if self._static:
+                    App._invalidateStatic()
+        else:
+            self._invalidateExtents()
         self.GFX.position.y = value
 
     @property
@@ -860,6 +1558,8 @@ class Sprite(object):
         """
         This represents the (x,y) coordinates of the sprite on the screen. Assigning
         a value to this attribute will move the sprite to the new coordinates.
+        If the sprite belongs to a `ggame.SpriteGroup` then its coordinates 
+        (and its rotation and scale) are relative to the group.
         """
         return (self.GFX.position.x, self.GFX.position.y)
         
@@ -889,7 +1589,7 @@ class Sprite(object):
         """
         try:
             self.GFX.anchor.x = value
-            self._extentsdirty = True
+            self._invalidateXform()
         except:
             pass
         
@@ -914,7 +1614,7 @@ class Sprite(object):
         """
         try:
             self.GFX.anchor.y = value
-            self._extentsdirty = True
+            self._invalidateXform()
         except:
             pass
     
@@ -936,7 +1636,7 @@ class Sprite(object):
         try:
             self.GFX.anchor.x = value[0]
             self.GFX.anchor.y = value[1]
-            self._extentsdirty = True
+            self._invalidateXform()
         except:
             pass
     
@@ -952,6 +1652,7 @@ class Sprite(object):
     @visible.setter
     def visible(self, value):
         self.GFX.visible = value
+        self._displayChanged()
 
     @property
     def scale(self):
@@ -969,7 +1670,7 @@ class Sprite(object):
     def scale(self, value):
         self.GFX.scale.x = value
         self.GFX.scale.y = value
-        self._extentsdirty = True
+        self._invalidateXform()
 
     @property
     def rotation(self):
@@ -986,9 +1687,109 @@ class Sprite(object):
         
     @rotation.setter
     def rotation(self, value):
-        self.GFX.rotation = -value
-        if value:
-            self._extentsdirty = True
+        if value != -self.GFX.rotation:
+            self.GFX.rotation = -value
+            self._invalidateXform()
+
+    _maskcache = OrderedDict()
+    _maskcachesize = 256
+    _maskrotations = 64
+    _maskscalestep = 0.05
+
+    def _alphaMask(self):
+        """
+        Return the bitmask of opaque pixels for the current image as a tuple
+        (x, y, width, rows), where `rows` is a list of integers with the 
+        leftmost pixel in the most significant bit, or None if no mask 
+        is available. Masks are cached by texture, with rotation and scale
+        quantized so that a slowly turning sprite reuses them, and the least
+        recently used are discarded once there are more than 
+        `Sprite._maskcachesize`.
+        """
+        a, b, c, d, ox, oy = self._xform()
+        x = self.x + ox
+        y = self.y + oy
+        if self._parent is not None:
+            m = self._parent._worldMatrix()
+            a, b, c, d, x, y = _affineMultiply(m, (a, b, c, d, x, y))
+        steps = Sprite._maskrotations
+        q = int(round(math.atan2(-b, a) * steps / (2 * math.pi))) % steps
+        qs = max(1, int(round(math.hypot(a, b) / Sprite._maskscalestep))) * Sprite._maskscalestep
+        texture = self.GFX.texture
+        key = (texture, q, qs)
+        masks = Sprite._maskcache
+        if key in masks:
+            masks.move_to_end(key)
+            mask = masks[key]
+        else:
+            if q == 0 and qs == 1.0 and ImageAsset.cache is not None:
+                # the unrotated, unscaled mask may be kept by the image cache
+                mask = ImageAsset.cache.mask(texture)
+            else:
+                mask = GFX_AlphaMask(texture, q * 2 * math.pi / steps, qs)
+            masks[key] = mask
+            if len(masks) > Sprite._maskcachesize:
+                masks.popitem(last=False)
+        if mask is None:
+            return None
+        rows, width = mask
+        # the mask bounds the image corners, transformed about the image origin
+        w = texture.width
+        h = texture.height
+        rot = q * 2 * math.pi / steps
+        a = math.cos(rot) * qs
+        b = -math.sin(rot) * qs
+        x += min(0, a*w, -b*h, a*w - b*h)
+        y += min(0, b*w, a*h, b*w + a*h)
+        return (int(round(x)), int(round(y)), width, rows)
+
+    def _extentsMask(self):
+        """
+        Return a solid bitmask covering the extents of this sprite.
+        """
+        x = int(math.floor(self.xmin))
+        y = int(math.floor(self.ymin))
+        width = max(1, int(math.ceil(self.xmax)) - x)
+        height = max(1, int(math.ceil(self.ymax)) - y)
+        return (x, y, width, [(1 << width) - 1] * height)
+
+    def collidingPixelsWith(self, obj):
+        """
+        Return True if the opaque pixels of this sprite overlap those of 
+        `obj`. A sprite without an image bitmask (e.g. a geometric asset, 
+        or one with `ggame.Sprite.pixelCollision` set to `False`) is 
+        treated as a solid rectangle covering its extents.
+        """
+        return self._collidingPixelsAt(obj, 0, 0)
+
+    def _collidingPixelsAt(self, obj, dx, dy):
+        """
+        As `ggame.Sprite.collidingPixelsWith`, with this sprite moved by 
+        (dx, dy) from its current position.
+        """
+        m1 = self._alphaMask() if self.pixelCollision else None
+        m2 = obj._alphaMask() if obj.pixelCollision else None
+        if m1 is None:
+            m1 = self._extentsMask()
+        if m2 is None:
+            m2 = obj._extentsMask()
+        x1, y1, w1, rows1 = m1
+        x2, y2, w2, rows2 = m2
+        x1 += int(round(dx))
+        y1 += int(round(dy))
+        top = max(y1, y2)
+        bottom = min(y1 + len(rows1), y2 + len(rows2))
+        # bit k of a row is column x + w - 1 - k: align the right hand edges
+        shift = (x1 + w1) - (x2 + w2)
+        for y in range(top, bottom):
+            r1 = rows1[y - y1]
+            r2 = rows2[y - y2]
+            if shift >= 0:
+                if r1 & (r2 << shift):
+                    return True
+            elif (r1 << -shift) & r2:
+                return True
+        return False
 
     @classmethod
     def collidingCircleWithPoly(cls, circ, poly):
@@ -997,6 +1798,127 @@ class Sprite(object):
     def collidingPolyWithPoly(self, obj):
         return True
 
+    def _rayDistance(self, ox, oy, dx, dy, maxdist):
+        """
+        Return the distance along the ray from (ox, oy), in the unit direction
+        (dx, dy), at which it first crosses the edge of this sprite's `edgedef`,
+        or None if it does not within `maxdist`. A ray that starts inside the
+        sprite does not hit it.
+        """
+        shape = self._shape()
+        if type(shape) is tuple:
+            times = [_rayCircle(ox, oy, dx, dy, *shape)]
+        elif len(shape) > 2 and _pointInPolygon(ox, oy, shape):
+            return None
+        else:
+            times = [_raySegment(ox, oy, dx, dy, x1, y1, x2, y2)
+                for (x1, y1), (x2, y2) in _polygonEdges(shape)]
+        times = [t for t in times if t is not None and t <= maxdist]
+        return min(times) if times else None
+
+    @property
+    def static(self):
+        """
+        Set this boolean attribute to `True` for sprites that will not move, 
+        such as walls, terrain or background scenery. Static sprites are kept
+        in their own spatial index, skip the per-frame culling work and are
+        never tested for collision against each other. Where the system 
+        supports it, all static sprites are drawn together from a single cached 
+        image, behind all other sprites. A static sprite may still be changed,
+        but each change causes that cached image to be redrawn.
+        """
+        return self._static
+
+    @static.setter
+    def static(self, value):
+        value = bool(value)
+        if value != self._static:
+            if value:
+                # static sprites are never culled: undo any earlier culling
+                self.GFX.renderable = True
+            if self._treenode is None:
+                self._static = value
+            else:
+                if self._parent is None:
+                    App._removeGFX(self)
+                App._unindex(self)
+                self._static = value
+                App._index(self)
+                if self._parent is None:
+                    App._addGFX(self)
+
+    @property
+    def sweptCollision(self):
+        """
+        Set this boolean attribute to `True` to detect collisions along the
+        path a fast moving sprite has taken since the previous frame, rather
+        than only at its current position. This prevents the sprite from 
+        passing through thin walls or other sprites between frames. See
+        `ggame.Sprite.timeOfImpact`.
+        """
+        return self._prevextents is not None
+
+    @sweptCollision.setter
+    def sweptCollision(self, value):
+        if value:
+            self._recordExtents()
+            if self._treenode is not None:
+                App._sweptsprites.add(self)
+        else:
+            self._prevextents = None
+            App._sweptsprites.discard(self)
+
+    def _recordExtents(self):
+        self._setExtents()
+        self._prevextents = (self.xmin, self.ymin, self.xmax, self.ymax)
+
+    def _shape(self):
+        """
+        Return the current outline of the `edgedef` in world coordinates: 
+        an (x, y, radius) tuple for circles, otherwise a list of vertices.
+        """
+        self._setExtents()
+        if type(self.asset) is CircleAsset:
+            r = (self.xmax - self.xmin) / 2
+            return (self.xmin + r, self.ymin + r, r)
+        # vertices are not refreshed when the sprite is simply moved
+        self._xformVertices()
+        return self._absolutevertices
+
+    def _motion(self):
+        """
+        Movement of a swept sprite since the previous frame.
+        """
+        if self._prevextents is None:
+            return (0, 0)
+        self._setExtents()
+        xmin, ymin, xmax, ymax = self._prevextents
+        return ((self.xmin + self.xmax - xmin - xmax) / 2,
+            (self.ymin + self.ymax - ymin - ymax) / 2)
+
+    def timeOfImpact(self, obj):
+        """
+        Return the time at which this sprite first touched the sprite `obj`
+        during the most recent movement of either, as a fraction between 0.0
+        (the position at the start of the frame) and 1.0 (the current position). 
+        Returns None if they did not touch. Only sprites with 
+        `ggame.Sprite.sweptCollision` enabled are considered to have moved;
+        movement is treated as a straight line without rotation.
+        """
+        if self is obj:
+            return None
+        mx, my = self._motion()
+        ox, oy = obj._motion()
+        mx -= ox
+        my -= oy
+        # gross check of the swept extents
+        if (min(self.xmin, self.xmin - mx) > obj.xmax
+            or max(self.xmax, self.xmax - mx) < obj.xmin
+            or min(self.ymin, self.ymin - my) > obj.ymax
+            or max(self.ymax, self.ymax - my) < obj.ymin):
+            return None
+        return _timeOfImpact(self._shape(), obj._shape(), mx, my)
+
     def collidingWith(self, obj):
         """
         Return a boolean True if this sprite is currently overlapping the sprite 
@@ -1008,9 +1930,24 @@ class Sprite(object):
         """
         if self is obj:
             return False
+        elif isinstance(obj, SpriteGroup):
+            return obj.collidingWith(self)
+        elif not (self.collisionLayer & obj.collisionMask 
+            and obj.collisionLayer & self.collisionMask):
+            return False
         else:
             self._setExtents()
             obj._setExtents()
+            if self._prevextents is not None or obj._prevextents is not None:
+                # the sweep is a gross check of the edgedef outlines, which
+                # is all that is needed unless the images are compared
+                t = self.timeOfImpact(obj)
+                if t is None:
+                    return False
+                elif self.pixelCollision or obj.pixelCollision:
+                    return self._sweptPixelsWith(obj, t)
+                else:
+                    return True
             # Gross check for overlap will usually rule out a collision
             if (self.xmin > obj.xmax
                 or self.xmax < obj.xmin
@@ -1018,15 +1955,18 @@ class Sprite(object):
                 or self.ymax < obj.ymin):
                 return False
             # Otherwise, perform a careful overlap determination
+            elif self.pixelCollision or obj.pixelCollision:
+                return self.collidingPixelsWith(obj)
             elif type(self.asset) is CircleAsset:
                 if type(obj.asset) is CircleAsset:
-                    # two circles .. check distance between
+                    # two circles .. check distance between, using the radii
+                    # in world coordinates, scaled by any enclosing groups
                     sx = (self.xmin + self.xmax) / 2
                     sy = (self.ymin + self.ymax) / 2
                     ox = (obj.xmin + obj.xmax) / 2
                     oy = (obj.ymin + obj.ymax) / 2
                     d = math.sqrt((sx-ox)**2 + (sy-oy)**2)
-                    return d <= self.width/2 + obj.width/2
+                    return d <= (self.xmax - self.xmin)/2 + (obj.xmax - obj.xmin)/2
                 else:
                     return self.collidingCircleWithPoly(self, obj)
             else:
@@ -1034,8 +1974,52 @@ class Sprite(object):
                     return self.collidingCircleWithPoly(obj, self)
                 else:
                     return self.collidingPolyWithPoly(obj)
-                
-                
+
+    def _sweptPixelsWith(self, obj, t):
+        """
+        Return True if the opaque pixels of this sprite and `obj` overlapped 
+        at any time from `t` (see `ggame.Sprite.timeOfImpact`) to the end of
+        their movement. Positions are tested a pixel of movement apart, from
+        the first contact until the extents part again.
+        """
+        mx, my = self._motion()
+        ox, oy = obj._motion()
+        mx -= ox
+        my -= oy
+        steps = max(1, int(math.ceil(math.hypot(mx, my) * (1 - t))))
+        overlapped = False
+        for k in range(steps + 1):
+            # this sprite, relative to obj, at time t + (1 - t) * k / steps
+            f = (1 - t) * (steps - k) / steps
+            dx = -mx * f
+            dy = -my * f
+            if (self.xmin + dx > obj.xmax
+                or self.xmax + dx < obj.xmin
+                or self.ymin + dy > obj.ymax
+                or self.ymax + dy < obj.ymin):
+                if overlapped:
+                    break
+            else:
+                overlapped = True
+                if self._collidingPixelsAt(obj, dx, dy):
+                    return True
+        return False
+
+    def _collisionCandidates(self):
+        """
+        Return sprites whose extents overlap those of this sprite, including
+        any swept sprites that may have passed through it since the last frame.
+        """
+        self._setExtents()
+        mx, my = self._motion()
+        slist = App.spritesInRect(min(self.xmin, self.xmin - mx), 
+            min(self.ymin, self.ymin - my), 
+            max(self.xmax, self.xmax - mx), 
+            max(self.ymax, self.ymax - my))
+        if App._sweptsprites:
+            found = set(slist)
+            slist = slist + [s for s in App._sweptsprites if s not in found]
+        return slist
 
     def collidingWithSprites(self, sclass = None):
         """
@@ -1044,12 +2028,21 @@ class Sprite(object):
         method returns True) this sprite. If `sclass` is set to `None` (default), then
         all other sprites are checked for collision, otherwise, only sprites whose
         class matches `sclass` are checked.
-        """
-        if sclass is None:
-            slist = App.spritelist
-        else:
-            slist = App.getSpritesbyClass(sclass)
-        return list(filter(self.collidingWith, slist))
+
+        Sprites are listed in the order of `ggame.App.spritelist`. If 
+        `ggame.Sprite.sweptCollision` is enabled for this sprite, then the
+        list is ordered by the time of first contact (see 
+        `ggame.Sprite.timeOfImpact`), earliest first.
+        """
+        slist = self._collisionCandidates()
+        if sclass is not None:
+            slist = [s for s in slist if type(s) is sclass]
+        slist.sort(key=lambda s: s._order)
+        if self._prevextents is None:
+            return list(filter(self.collidingWith, slist))
+        hits = [(self.timeOfImpact(s), s) for s in slist if self.collidingWith(s)]
+        hits.sort(key=lambda hit: hit[0])
+        return [s for t, s in hits]
 
     def destroy(self):
         """
@@ -1057,80 +2050,1182 @@ class Sprite(object):
         or checked in collision detection. If you only want to prevent a sprite from being
         displayed, set the `ggame.Sprite.visible` attribute to `False`.
         """
+        if self._parent is not None:
+            self._parent.remove(self)
         App._remove(self)
         self.GFX.destroy()
 
 
-class SoundAsset(object):
+class Animation(object):
     """
-    Class representing a single sound asset (sound file, such as .mp3 or .wav).
-    """    
-    def __init__(self, url):
+    The `ggame.Animation` class plays a sequence of images from a sprite's
+    asset at a fixed rate. Animations are advanced automatically, once per
+    frame, by the `ggame.App` class so there is no need to call
+    `ggame.Sprite.nextImage` from your own step functions.
+
+    Animations are usually created with the `ggame.Sprite.animate` method.
+    """
+
+    loop = "loop"
+    """Constant identifying an animation that restarts at its first image."""
+    pingpong = "pingpong"
+    """Constant identifying an animation that reverses direction at each end."""
+    once = "once"
+    """Constant identifying an animation that stops on its last image."""
+
+    def __init__(self, sprite, frames=None, fps=10, mode=loop, oncomplete=None):
+        """
+        Create an animation for the `sprite`, which must use an asset with
+        multiple images (e.g. a sprite sheet `ggame.ImageAsset`).
+
+        The optional `frames` parameter is a list of image indexes to play, in
+        order. By default all images in the asset are played. The `fps` 
+        parameter specifies how many images are displayed each second.
+
+        The `mode` parameter is one of `ggame.Animation.loop` (default), 
+        `ggame.Animation.pingpong` or `ggame.Animation.once`.
+
+        The optional `oncomplete` parameter is a function or method that will be
+        called with the `ggame.Animation` object as its only argument each time
+        the sequence completes (i.e. at the end of every loop or ping-pong
+        cycle, or when a `once` animation reaches its last image).
+
+        The animation begins playing immediately, replacing any other animation
+        that was playing on the same sprite.
+        """
+        self.sprite = sprite
+        """The `ggame.Sprite` instance being animated."""
+        if frames is None:
+            frames = range(len(sprite.asset))
+        self.frames = list(frames)
+        """List of image indexes that make up the animation sequence."""
+        self.fps = fps
+        """Playback rate, in images per second."""
+        self.mode = mode
+        """Playback mode: `'loop'`, `'pingpong'` or `'once'`."""
+        self.oncomplete = oncomplete
+        """Function called each time the sequence completes (or None)."""
+        self.play()
+
+    def play(self):
         """
-        Create a `ggame.SoundAsset` instance by passing in the URL or file name
-        of the desired sound. Sound file formats may include `.wav` or `.mp3`, subject
-        to browser compatibility. 
+        Start (or restart) playing the animation from its first image.
         """
-        self.url = url
+        self._start = None
+        self._cycles = 0
+        self.sprite.index = self.frames[0]
+        App._addAnimation(self)
+
+    def stop(self):
         """
-        A string containing the url or name of the asset file.
+        Stop playing the animation. The sprite keeps its current image.
         """
+        App._removeAnimation(self)
 
-        
-class Sound(object):
-    """
-    The `ggame.Sound` class represents a sound, with methods for controlling
-    when and how the sound is played in the application.
-    """
+    @property
+    def playing(self):
+        """
+        This boolean attribute is `True` while the animation is playing.
+        """
+        return App._animationdict.get(self.sprite) is self
 
-    def __init__(self, asset):
+    def _step(self, now):
         """
-        Pass a valid `ggame.SoundAsset` instance when creating a `ggame.Sound` object.
+        Display the image that is due at time `now`. Returns True if the 
+        sequence completed one or more times since the last step.
         """
-        self.asset = asset
+        if self._start is None:
+            self._start = now
+        n = int((now - self._start) * self.fps)
+        count = len(self.frames)
+        if self.mode == Animation.pingpong and count > 1:
+            period = 2 * count - 2
+            i = n % period
+            if i >= count:
+                i = period - i
+        else:
+            period = count
+            i = n % period
+            if self.mode == Animation.once and n >= count:
+                i = count - 1
+        index = self.frames[i]
+        sprite = self.sprite
+        if index != sprite._index:
+            sprite._index = index
+            sprite.GFX.texture = sprite.asset.GFXlist[index]
+        cycles = n // period
+        if cycles > self._cycles:
+            self._cycles = cycles
+            return True
+        return False
+
+
+class Tween(object):
+    """
+    The `ggame.Tween` class changes a numeric attribute of an object, such
+    as the `x`, `y`, `scale` or `rotation` of a `ggame.Sprite`, smoothly
+    from its current value to a new one over a period of time. Tweens are
+    advanced automatically, once per frame, by the `ggame.App` class.
+
+    Tweens are usually created with the `ggame.Sprite.tween` method, and
+    may be chained to play one after another:
+
+        ship.tween('x', 400, 2.0).then(ship, 'rotation', 3.14, 0.5)
+    """
+
+    @staticmethod
+    def linear(f):
+        """Easing function for a constant rate of change."""
+        return f
+
+    @staticmethod
+    def easeIn(f):
+        """Easing function that starts slowly and speeds up."""
+        return f * f
+
+    @staticmethod
+    def easeOut(f):
+        """Easing function that starts quickly and slows down."""
+        return f * (2 - f)
+
+    @staticmethod
+    def easeInOut(f):
+        """Easing function that starts and ends slowly."""
+        return f * f * (3 - 2 * f)
+
+    def __init__(self, target, attribute, end, duration=1.0, easing=None, 
+        oncomplete=None, start=True):
+        """
+        Create a tween that changes the `attribute` (a string, such as `'x'`)
+        of `target` to the value `end` over `duration` seconds. The optional
+        `easing` parameter is a function that maps the fraction of time 
+        elapsed (0.0 to 1.0) to the fraction of the change made; the default
+        is `ggame.Tween.easeInOut`.
+
+        The optional `oncomplete` parameter is a function or method that will
+        be called with the `ggame.Tween` object as its only argument when the
+        change is complete.
+
+        The tween begins immediately, replacing any other tween of the same
+        attribute of `target`, unless `start` is False.
+        """
+        self.target = target
+        """The object whose attribute is changed."""
+        self.attribute = attribute
+        """The name of the attribute that is changed."""
+        self.end = end
+        """The final value of the attribute."""
+        self.duration = duration
+        """The time taken for the change, in seconds."""
+        self.easing = easing or Tween.easeInOut
+        """The easing function."""
+        self.oncomplete = oncomplete
+        """Function called when the change is complete (or None)."""
+        self.next = None
+        """The `ggame.Tween` that begins when this one completes (or None)."""
+        self._track = None
+        self._slot = None
+        if start:
+            self.play()
+
+    def play(self):
         """
-        A reference to the `ggame.SoundAsset` instance.
+        Start (or restart) the change from the current value of the attribute.
         """
-        self.SND = SND_Sound(self.asset.url)
+        App._addTween(self)
+
+    def cancel(self):
         """
-        A reference to the underlying sound object provided by the system.
+        Stop the change, leaving the attribute at its current value. Any
+        tween chained to this one does not begin.
         """
-        self.SND.load()
-        
-    def play(self):
+        if self._track is not None:
+            self._track.remove(self)
+
+    @property
+    def playing(self):
         """
-        Play the sound once.
+        This boolean attribute is `True` while the tween is playing.
         """
-        self.stop()
-        self.SND.play()
+        return self._track is not None
 
-    def loop(self):
+    def then(self, target, attribute, end, duration=1.0, easing=None, oncomplete=None):
         """
-        Play the sound continuously, looping forever.
+        Create a tween, with the same parameters as `ggame.Tween`, that begins
+        when this one completes, and return it. The new tween starts from 
+        the value of its attribute at that time.
         """
-        self.stop()
-        self.SND.loop()
-        self.SND.play()
-        
+        self.next = Tween(target, attribute, end, duration, easing, oncomplete, False)
+        return self.next
+
+
+class _TweenTrack(object):
+    """
+    All of the playing tweens of one attribute, kept in parallel lists so 
+    that they can be advanced together in one pass without allocation.
+    """
+
+    def __init__(self, attribute):
+        self.attribute = attribute
+        self.tweens = []
+        self.targets = []
+        self.starts = []
+        self.changes = []
+        self.begins = []
+        self.durations = []
+        self.easings = []
+        self.values = []
+        self.slots = {}
+
+    def add(self, tween):
+        old = self.slots.get(tween.target)
+        if old is not None:
+            self.remove(self.tweens[old])
+        tween._track = self
+        tween._slot = self.slots[tween.target] = len(self.tweens)
+        self.tweens.append(tween)
+        self.targets.append(tween.target)
+        # the start value is read on the first step
+        self.starts.append(None)
+        self.changes.append(0)
+        self.begins.append(None)
+        self.durations.append(tween.duration)
+        self.easings.append(tween.easing)
+        self.values.append(None)
+
+    def remove(self, tween):
+        """
+        Remove `tween` by moving the last tween into its slot.
+        """
+        i = tween._slot
+        last = len(self.tweens) - 1
+        del self.slots[tween.target]
+        if i != last:
+            moved = self.tweens[i] = self.tweens[last]
+            moved._slot = i
+            self.slots[moved.target] = i
+            for values in (self.targets, self.starts, self.changes, self.begins,
+                self.durations, self.easings, self.values):
+                values[i] = values[last]
+        for values in (self.tweens, self.targets, self.starts, self.changes, 
+            self.begins, self.durations, self.easings, self.values):
+            values.pop()
+        tween._track = tween._slot = None
+
+    def step(self, now, completed):
+        """
+        Write the value due at time `now` for every tween that changed it, 
+        and append those that are complete to the `completed` list.
+        """
+        attribute = self.attribute
+        targets = self.targets
+        starts = self.starts
+        changes = self.changes
+        begins = self.begins
+        durations = self.durations
+        easings = self.easings
+        values = self.values
+        for i in range(len(targets)):
+            target = targets[i]
+            if begins[i] is None:
+                begins[i] = now
+                starts[i] = getattr(target, attribute)
+                changes[i] = self.tweens[i].end - starts[i]
+            duration = durations[i]
+            f = (now - begins[i]) / duration if duration > 0 else 1.0
+            if f >= 1.0:
+                f = 1.0
+                completed.append(self.tweens[i])
+            value = starts[i] + changes[i] * easings[i](f)
+            if value != values[i]:
+                values[i] = value
+                setattr(target, attribute, value)
+
+
+class Coroutine(object):
+    """
+    The `ggame.Coroutine` class runs a behaviour that takes place over many
+    frames, written as a Python generator function rather than as a state
+    machine in a `step` method. Each `yield` in the generator pauses the
+    behaviour; the value yielded says when it should continue:
+
+    * `None`: on the next frame.
+    * An integer `n`: after `n` frames.
+    * A float: after that many seconds.
+    * A `ggame.Tween`, `ggame.Animation` or `ggame.Coroutine`: when it is
+      no longer playing.
+    * A function: on the first frame on which it returns `True`.
+
+    Coroutines are created with the `ggame.App.start` method:
+
+        def patrol(guard):
+            while True:
+                yield guard.tween('x', 400, 3.0)
+                yield 1.5
+                guard.tween('x', 100, 3.0)
+                yield 4.5
+
+        App.start(patrol(guard))
+    """
+
+    def __init__(self, generator):
+        self.generator = generator
+        """The generator that is run."""
+        self._key = None
+        self._finished = False
+        self._running = False
+
     def stop(self):
         """
-        Stop playing the sound.
+        Stop the coroutine. The generator is closed, so any `finally` blocks
+        in it are run. A coroutine may stop itself.
         """
-        self.SND.stop()
-        
+        if not self._finished:
+            self._finished = True
+            self._key = None
+            # a running generator cannot be closed: it is closed when it yields
+            if not self._running:
+                self.generator.close()
+
     @property
-    def volume(self):
+    def playing(self):
         """
-        The `ggame.Sound.volume` property is a number ranging from 0-100, that 
-        represents the volume or intensity of the sound when it is playing.
+        This boolean attribute is `True` until the generator returns or the
+        coroutine is stopped.
         """
-        return self.SND.getVolume()
-        
-    @volume.setter
+        return not self._finished
+
+    def _resume(self, now):
+        """
+        Run the generator up to its next `yield` and schedule it to continue.
+        """
+        self._key = None
+        self._running = True
+        try:
+            wait = next(self.generator)
+        except StopIteration:
+            self._finished = True
+            return
+        except:
+            self._finished = True
+            raise
+        finally:
+            self._running = False
+        if self._finished:
+            self.generator.close()
+        else:
+            App._schedule(self, wait, now)
+
+
+class _Layer(object):
+    """
+    A system container of sprites and groups, kept in order of `zIndex` and,
+    for equal `zIndex`, the order in which they were added. Used for each 
+    named layer, for the list of layers itself and for the members of a 
+    `ggame.SpriteGroup`.
+    """
+    _count = 0
+
+    def __init__(self, name=None, zIndex=0, gfx=None):
+        self.name = name
+        self.zIndex = zIndex
+        self.GFX = gfx if gfx is not None else GFX_NewStage()
+        self._keys = []
+        self._container = None
+        self._layerkey = None
+
+    def add(self, obj):
+        _Layer._count += 1
+        key = (obj.zIndex, _Layer._count)
+        i = bisect.bisect(self._keys, key)
+        self._keys.insert(i, key)
+        obj._layerkey = key
+        obj._container = self
+        self.GFX.addChildAt(obj.GFX, i)
+
+    def remove(self, obj):
+        i = bisect.bisect_left(self._keys, obj._layerkey)
+        del self._keys[i]
+        obj._layerkey = None
+        obj._container = None
+        self.GFX.removeChild(obj.GFX)
+
+
+class _DisplayObject(object):
+    """
+    Mixin for objects other than sprites that are drawn in a layer: groups,
+    tile maps and the display objects of ggame extensions.
+    """
+    _static = False
+    _parent = None
+    _zIndex = 0
+    _layername = 'default'
+    _container = None
+    _layerkey = None
+    _destroyed = False
+
+    zIndex = Sprite.zIndex
+    """
+    The drawing order of the object within its layer (or enclosing group),
+    as for `ggame.Sprite.zIndex`.
+    """
+
+    layer = Sprite.layer
+    """
+    The name of the layer that the object is drawn in, as for `ggame.Sprite.layer`.
+    """
+
+    def _displayChanged(self):
+        pass
+
+    def _attach(self):
+        """
+        Display the object if it is not displayed by the current application:
+        it was created before the `ggame.App`, or the application it was
+        displayed by has been destroyed.
+        """
+        if self._destroyed or self._parent is not None:
+            return
+        container = self._container
+        if container is not None and container._container is not App._root:
+            # a layer of a destroyed application
+            container.remove(self)
+            container = None
+        if container is None:
+            App._addGFX(self)
+
+
+class SpriteGroup(_DisplayObject):
+    """
+    The `ggame.SpriteGroup` class collects sprites (and other groups) into a
+    single compound object that can be moved, rotated and scaled as a unit.
+    A space ship with a separate turret and shield, for example, may be built
+    from three sprites in one group; moving the group moves all three.
+
+    The position, rotation and scale of each member of a group are *relative*
+    to the group. Collision detection continues to work with the individual
+    member sprites, and a group may also be tested for collision as a whole.
+    """
+
+    def __init__(self, pos=(0,0), members=None):
+        """
+        Create a group, with an optional `pos` (position) tuple specifying
+        the location of the group origin, and an optional list of `members`
+        (sprites or groups) to add to it.
+        """
+        self.GFX = GFX_NewStage()
+        """`GFX` is a reference to the underlying container object provided by the system."""
+        self.children = []
+        """List of sprites and groups that are members of this group."""
+        self._parent = None
+        self._x, self._y = pos
+        self._rotation = 0.0
+        self._scale = 1.0
+        self.GFX.position.x, self.GFX.position.y = pos
+        self._matrix = None
+        self._extentsdirty = True
+        self.xmin = self.xmax = self._x
+        self.ymin = self.ymax = self._y
+        self._members = _Layer(gfx=self.GFX)
+        App._addGroup(self)
+        for member in members or []:
+            self.add(member)
+
+    def add(self, member):
+        """
+        Add a `ggame.Sprite` or `ggame.SpriteGroup` to this group. The 
+        existing position of the member is interpreted as being relative
+        to the group origin.
+        """
+        if member._parent is not None:
+            member._parent.remove(member)
+        App._removeGFX(member)
+        self._members.add(member)
+        self.children.append(member)
+        member._parent = self
+        if isinstance(member, SpriteGroup):
+            member._invalidateTransform()
+        else:
+            member._invalidateExtents()
+        self._invalidateExtents()
+
+    def remove(self, member):
+        """
+        Remove a `ggame.Sprite` or `ggame.SpriteGroup` from this group. The 
+        position of the member is then interpreted as being relative to the
+        screen again.
+        """
+        self._members.remove(member)
+        self.children.remove(member)
+        member._parent = None
+        App._addGFX(member)
+        if isinstance(member, SpriteGroup):
+            member._invalidateTransform()
+        else:
+            member._invalidateExtents()
+        self._invalidateExtents()
+
+    @property
+    def group(self):
+        """
+        The `ggame.SpriteGroup` that this group belongs to, or None.
+        """
+        return self._parent
+
+    def _worldMatrix(self):
+        """
+        Return the cached affine matrix that converts group-relative 
+        coordinates to screen coordinates.
+        """
+        if self._matrix is None:
+            c = math.cos(self._rotation) * self._scale
+            s = math.sin(self._rotation) * self._scale
+            local = (c, -s, s, c, self._x, self._y)
+            if self._parent is None:
+                self._matrix = local
+            else:
+                self._matrix = _affineMultiply(self._parent._worldMatrix(), local)
+        return self._matrix
+
+    def _invalidateTransform(self):
+        """
+        Discard the cached matrix for this group and everything in it. A 
+        group with no cached matrix has already invalidated its members.
+        """
+        if self._matrix is not None:
+            self._matrix = None
+            for member in self.children:
+                if isinstance(member, SpriteGroup):
+                    member._invalidateTransform()
+                else:
+                    member._invalidateExtents()
+        self._invalidateExtents()
+
+    def _invalidateExtents(self):
+        if not self._extentsdirty:
+            self._extentsdirty = True
+            if self._parent is not None:
+                self._parent._invalidateExtents()
+
+    def _setExtents(self):
+        """
+        update min/max x and y to enclose all members of the group
+        """
+        if self._extentsdirty:
+            if self.children:
+                for member in self.children:
+                    member._setExtents()
+                self.xmin = min(member.xmin for member in self.children)
+                self.xmax = max(member.xmax for member in self.children)
+                self.ymin = min(member.ymin for member in self.children)
+                self.ymax = max(member.ymax for member in self.children)
+            else:
+                a, b, c, d, tx, ty = self._worldMatrix()
+                self.xmin = self.xmax = tx
+                self.ymin = self.ymax = ty
+            self._extentsdirty = False
+
+    @property
+    def x(self):
+        """
+        The x-coordinate of the group origin. Assigning a value to this
+        attribute will move every member of the group horizontally.
+        """
+        return self._x
+
+    @x.setter
+    def x(self, value):
+        self._x = self.GFX.position.x = value
+        self._invalidateTransform()
+
+    @property
+    def y(self):
+        """
+        The y-coordinate of the group origin. Assigning a value to this
+        attribute will move every member of the group vertically.
+        """
+        return self._y
+
+    @y.setter
+    def y(self, value):
+        self._y = self.GFX.position.y = value
+        self._invalidateTransform()
+
+    @property
+    def position(self):
+        """
+        The (x,y) coordinates of the group origin, as a tuple.
+        """
+        return (self._x, self._y)
+
+    @position.setter
+    def position(self, value):
+        self._x, self._y = value
+        self.GFX.position.x, self.GFX.position.y = value
+        self._invalidateTransform()
+
+    @property
+    def rotation(self):
+        """
+        The rotation of the whole group about its origin, in radians. A
+        positive value rotates the group counter-clockwise.
+        """
+        return self._rotation
+
+    @rotation.setter
+    def rotation(self, value):
+        self._rotation = value
+        self.GFX.rotation = -value
+        self._invalidateTransform()
+
+    @property
+    def scale(self):
+        """
+        The scale of the whole group about its origin. A value of 1.0 means
+        that the members keep their own size.
+        """
+        return self._scale
+
+    @scale.setter
+    def scale(self, value):
+        self._scale = value
+        self.GFX.scale.x = self.GFX.scale.y = value
+        self._invalidateTransform()
+
+    @property
+    def visible(self):
+        """
+        Setting `ggame.SpriteGroup.visible` to `False` hides every member
+        of the group.
+        """
+        return self.GFX.visible
+
+    @visible.setter
+    def visible(self, value):
+        self.GFX.visible = value
+
+    def _contains(self, obj):
+        parent = obj._parent
+        while parent is not None:
+            if parent is self:
+                return True
+            parent = parent._parent
+        return False
+
+    def collidingWith(self, obj):
+        """
+        Return True if any member of this group is colliding with `obj`, 
+        which may be a `ggame.Sprite` or another `ggame.SpriteGroup`. The
+        extents of the whole group are checked first, so a group that is 
+        nowhere near `obj` is rejected without testing its members.
+        """
+        if obj is self or self._contains(obj):
+            return False
+        self._setExtents()
+        obj._setExtents()
+        if (self.xmin > obj.xmax
+            or self.xmax < obj.xmin
+            or self.ymin > obj.ymax
+            or self.ymax < obj.ymin):
+            return False
+        return any(member.collidingWith(obj) for member in self.children)
+
+    def collidingWithSprites(self, sclass = None):
+        """
+        Return a list of sprites, outside of this group, that are colliding
+        with any member of the group. As with `ggame.Sprite.collidingWithSprites`
+        the optional `sclass` parameter limits the check to sprites of one class.
+        """
+        self._setExtents()
+        slist = App.spritesInRect(self.xmin, self.ymin, self.xmax, self.ymax)
+        if sclass is not None:
+            slist = [s for s in slist if type(s) is sclass]
+        return list(filter(self.collidingWith, slist))
+
+    def destroy(self):
+        """
+        Destroy the group and every member of it.
+        """
+        for member in list(self.children):
+            member.destroy()
+        if self._parent is not None:
+            self._parent.remove(self)
+        App._removeGroup(self)
+        self.GFX.destroy()
+
+
+class TileMap(_DisplayObject):
+    """
+    The `ggame.TileMap` class draws a large grid of tiles, taken from the
+    images of a sprite sheet `ggame.ImageAsset`, without creating a 
+    `ggame.Sprite` for each tile. Tiles are identified by their index in the
+    asset and stored in a compact array, with -1 marking an empty cell.
+
+    The map is drawn in square chunks of tiles, each of which the system 
+    composites into a single image that is reused until one of its tiles
+    changes. Chunks outside of the camera view are not drawn at all.
+
+    Example:
+
+        tiles = ImageAsset("tiles.png", Frame(0,0,32,32), 8)
+        world = TileMap(tiles, 200, 100)
+        world[10, 5] = 3
+    """
+
+    def __init__(self, asset, columns, rows, pos=(0,0), chunksize=16):
+        """
+        Create a map of `columns` by `rows` empty tiles, using the images of
+        `asset` (a `ggame.ImageAsset`) for the tiles. Every image in the asset
+        must have the same size. The optional `pos` tuple gives the position
+        of the top left corner of the map, and `chunksize` the number of tiles
+        along each side of a chunk.
+        """
+        self.asset = asset
+        """The `ggame.ImageAsset` that provides the tile images."""
+        self.columns = columns
+        """The number of columns of tiles in the map."""
+        self.rows = rows
+        """The number of rows of tiles in the map."""
+        self.tilewidth = asset.width
+        """The width of each tile, in pixels."""
+        self.tileheight = asset.height
+        """The height of each tile, in pixels."""
+        self.chunksize = chunksize
+        self.solid = set(range(len(asset)))
+        """
+        The set of tile indexes that are tested by `ggame.TileMap.collidingWith`
+        and `ggame.TileMap.collidingTiles`. By default every tile is solid.
+        """
+        self.GFX = GFX_NewStage()
+        """`GFX` is a reference to the underlying container object provided by the system."""
+        self._x, self._y = pos
+        self.GFX.position.x, self.GFX.position.y = pos
+        self._tiles = array('h', [-1]) * (columns * rows)
+        self._cells = {}
+        self._chunks = {}
+        self._dirtychunks = set()
+        self._visiblechunks = set()
+        App._addTileMap(self)
+
+    def __getitem__(self, cell):
+        """
+        Return the tile index at `cell`, a (column, row) tuple, or -1 if it 
+        is empty.
+        """
+        col, row = cell
+        return self._tiles[self._offset(col, row)]
+
+    def __setitem__(self, cell, index):
+        """
+        Place the tile with `index` at `cell`, a (column, row) tuple. An index
+        of -1 (or any negative index) empties the cell.
+        """
+        col, row = cell
+        i = self._offset(col, row)
+        if index < 0:
+            index = -1
+        elif index >= len(self.asset):
+            raise IndexError("tile index {} is not an image of the asset".format(index))
+        if self._tiles[i] == index:
+            return
+        self._tiles[i] = index
+        key = (col // self.chunksize, row // self.chunksize)
+        chunk = self._chunks.get(key)
+        if chunk is None:
+            chunk = self._chunks[key] = GFX_NewStage()
+            chunk.position.x = key[0] * self.chunksize * self.tilewidth
+            chunk.position.y = key[1] * self.chunksize * self.tileheight
+            self.GFX.addChild(chunk)
+            self._visiblechunks.add(key)
+        gfx = self._cells.get(i)
+        if index < 0:
+            if gfx is not None:
+                chunk.removeChild(gfx)
+                gfx.destroy()
+                del self._cells[i]
+        elif gfx is None:
+            gfx = self._cells[i] = GFX_Sprite(self.asset[index])
+            gfx.position.x = (col % self.chunksize) * self.tilewidth
+            gfx.position.y = (row % self.chunksize) * self.tileheight
+            chunk.addChild(gfx)
+        else:
+            gfx.texture = self.asset[index]
+        self._dirtychunks.add(key)
+
+    def _offset(self, col, row):
+        if not (0 <= col < self.columns and 0 <= row < self.rows):
+            raise IndexError("tile ({}, {}) is outside of the map".format(col, row))
+        return row * self.columns + col
+
+    def load(self, data):
+        """
+        Set every tile in the map from `data`, a list of rows, each of which
+        is a list of tile indexes. Rows or columns missing from `data` are 
+        left unchanged.
+
+        Example: `world.load([[0, 0, 1], [2, -1, 2]])`
+        """
+        for row, indexes in enumerate(data):
+            for col, index in enumerate(indexes):
+                self[col, row] = index
+
+    @property
+    def x(self):
+        """The x-coordinate of the left edge of the map."""
+        return self._x
+
+    @x.setter
+    def x(self, value):
+        self._x = self.GFX.position.x = value
+
+    @property
+    def y(self):
+        """The y-coordinate of the top edge of the map."""
+        return self._y
+
+    @y.setter
+    def y(self, value):
+        self._y = self.GFX.position.y = value
+
+    @property
+    def position(self):
+        """The (x,y) coordinates of the top left corner of the map, as a tuple."""
+        return (self._x, self._y)
+
+    @position.setter
+    def position(self, value):
+        self._x, self._y = value
+        self.GFX.position.x, self.GFX.position.y = value
+
+    @property
+    def visible(self):
+        """Setting `ggame.TileMap.visible` to `False` hides the whole map."""
+        return self.GFX.visible
+
+    @visible.setter
+    def visible(self, value):
+        self.GFX.visible = value
+
+    def _cellRange(self, xmin, ymin, xmax, ymax):
+        """
+        Return the (first column, first row, last column, last row) of the
+        cells that overlap a rectangle in world coordinates. The range is 
+        empty if the rectangle lies outside of the map.
+        """
+        return (max(0, math.floor((xmin - self._x) / self.tilewidth)),
+            max(0, math.floor((ymin - self._y) / self.tileheight)),
+            min(self.columns - 1, math.floor((xmax - self._x) / self.tilewidth)),
+            min(self.rows - 1, math.floor((ymax - self._y) / self.tileheight)))
+
+    def cellAt(self, x, y):
+        """
+        Return the (column, row) of the cell at the world point (`x`, `y`),
+        or None if the point is outside of the map.
+        """
+        col = math.floor((x - self._x) / self.tilewidth)
+        row = math.floor((y - self._y) / self.tileheight)
+        if 0 <= col < self.columns and 0 <= row < self.rows:
+            return (col, row)
+        return None
+
+    def tileAt(self, x, y):
+        """
+        Return the index of the tile at the world point (`x`, `y`), or -1
+        if there is no tile there.
+        """
+        cell = self.cellAt(x, y)
+        if cell is None:
+            return -1
+        return self._tiles[cell[1] * self.columns + cell[0]]
+
+    def tilesInRect(self, x0, y0, x1, y1):
+        """
+        Return a list of (column, row, index) for every tile that overlaps
+        the rectangle with corners (`x0`, `y0`) and (`x1`, `y1`), in world 
+        coordinates.
+        """
+        c0, r0, c1, r1 = self._cellRange(min(x0, x1), min(y0, y1), 
+            max(x0, x1), max(y0, y1))
+        tiles = self._tiles
+        found = []
+        for row in range(r0, r1 + 1):
+            base = row * self.columns
+            for col in range(c0, c1 + 1):
+                index = tiles[base + col]
+                if index >= 0:
+                    found.append((col, row, index))
+        return found
+
+    def collidingTiles(self, obj):
+        """
+        Return a list of the (column, row) cells of solid tiles (see
+        `ggame.TileMap.solid`) that overlap the extents of `obj`, a 
+        `ggame.Sprite` or `ggame.SpriteGroup`. The cells are found directly
+        from the position of `obj`, without checking every tile.
+        """
+        obj._setExtents()
+        solid = self.solid
+        return [(col, row) for col, row, index in 
+            self.tilesInRect(obj.xmin, obj.ymin, obj.xmax, obj.ymax)
+            if index in solid]
+
+    def collidingWith(self, obj):
+        """
+        Return True if any solid tile (see `ggame.TileMap.solid`) overlaps
+        the extents of `obj`, a `ggame.Sprite` or `ggame.SpriteGroup`.
+        """
+        return len(self.collidingTiles(obj)) > 0
+
+    def _cull(self, xmin, ymin, xmax, ymax):
+        """
+        Flag the chunks that lie outside of the world rectangle given as not
+        renderable, and have the system composite any chunk that has changed
+        since the last frame again.
+        """
+        for key in self._dirtychunks:
+            chunk = self._chunks[key]
+            chunk.cacheAsBitmap = False
+            chunk.cacheAsBitmap = True
+        self._dirtychunks = set()
+        w = self.chunksize * self.tilewidth
+        h = self.chunksize * self.tileheight
+        c0 = max(0, math.floor((xmin - self._x) / w))
+        r0 = max(0, math.floor((ymin - self._y) / h))
+        c1 = min((self.columns - 1) // self.chunksize, math.floor((xmax - self._x) / w))
+        r1 = min((self.rows - 1) // self.chunksize, math.floor((ymax - self._y) / h))
+        if (c1 - c0 + 1) * (r1 - r0 + 1) < len(self._chunks):
+            visible = set(key for key in 
+                ((col, row) for col in range(c0, c1 + 1) for row in range(r0, r1 + 1))
+                if key in self._chunks)
+        else:
+            visible = set(key for key in self._chunks 
+                if c0 <= key[0] <= c1 and r0 <= key[1] <= r1)
+        for key in self._visiblechunks - visible:
+            self._chunks[key].renderable = False
+        for key in visible - self._visiblechunks:
+            self._chunks[key].renderable = True
+        self._visiblechunks = visible
+
+    def destroy(self):
+        """
+        Remove the map from the display and destroy it.
+        """
+        App._removeTileMap(self)
+        for gfx in self._cells.values():
+            gfx.destroy()
+        for chunk in self._chunks.values():
+            chunk.destroy()
+        self.GFX.destroy()
+
+
+class SoundAsset(object):
+    """
+    Class representing a single sound asset (sound file, such as .mp3 or .wav).
+    """    
+    def __init__(self, url):
+        """
+        Create a `ggame.SoundAsset` instance by passing in the URL or file name
+        of the desired sound. Sound file formats may include `.wav` or `.mp3`, subject
+        to browser compatibility. 
+        """
+        self.url = url
+        """
+        A string containing the url or name of the asset file.
+        """
+
+        
+class Sound(object):
+    """
+    The `ggame.Sound` class represents a sound, with methods for controlling
+    when and how the sound is played in the application.
+    """
+
+    def __init__(self, asset):
+        """
+        Pass a valid `ggame.SoundAsset` instance when creating a `ggame.Sound` object.
+        """
+        self.asset = asset
+        """
+        A reference to the `ggame.SoundAsset` instance.
+        """
+        self.SND = SND_Sound(self.asset.url)
+        """
+        A reference to the underlying sound object provided by the system.
+        """
+        self.SND.load()
+        
+    def play(self):
+        """
+        Play the sound once.
+        """
+        self.stop()
+        self.SND.play()
+
+    def loop(self):
+        """
+        Play the sound continuously, looping forever.
+        """
+        self.stop()
+        self.SND.loop()
+        self.SND.play()
+        
+    def stop(self):
+        """
+        Stop playing the sound.
+        """
+        self.SND.stop()
+        
+    @property
+    def volume(self):
+        """
+        The `ggame.Sound.volume` property is a number ranging from 0-100, that 
+        represents the volume or intensity of the sound when it is playing.
+        """
+        return self.SND.getVolume()
+        
+    @volume.setter
     def volume(self, value):
         self.SND.setVolume(value)
     
 
+class Camera(object):
+    """
+    The `ggame.Camera` class controls which region of the game "world" is
+    displayed in the application window. Every `ggame.App` has exactly one
+    camera, available as `ggame.App.camera`.
+
+    Sprite coordinates are always *world* coordinates. Moving, zooming or 
+    rotating the camera changes how the whole world is drawn, without
+    changing the position of any sprite. Scrolling a large world is therefore
+    a matter of changing the camera position, rather than moving every sprite.
+    """
+
+    def __init__(self, width, height):
+        """
+        The camera is created by the `ggame.App` with the `width` and `height`
+        of the application window, in pixels. You should not need to create
+        a `ggame.Camera` yourself.
+        """
+        self._width = width
+        self._height = height
+        self._x = self._y = 0
+        self._zoom = 1.0
+        self._rotation = 0.0
+        self._dirty = True
+        self._extents = None
+
+    def _changed(self):
+        self._dirty = True
+        self._extents = None
+
+    @property
+    def x(self):
+        """
+        The world x-coordinate that is displayed at the left hand edge of the
+        window (when the camera is not zoomed or rotated). Increasing this 
+        value will scroll the view of the world to the right.
+        """
+        return self._x
+
+    @x.setter
+    def x(self, value):
+        self._x = value
+        self._changed()
+
+    @property
+    def y(self):
+        """
+        The world y-coordinate that is displayed at the top edge of the window
+        (when the camera is not zoomed or rotated). Increasing this value will
+        scroll the view of the world downward.
+        """
+        return self._y
+
+    @y.setter
+    def y(self, value):
+        self._y = value
+        self._changed()
+
+    @property
+    def position(self):
+        """
+        This represents the (x,y) offset of the camera as a tuple. See
+        `ggame.Camera.x` and `ggame.Camera.y` for details.
+        """
+        return (self._x, self._y)
+
+    @position.setter
+    def position(self, value):
+        self._x, self._y = value
+        self._changed()
+
+    @property
+    def zoom(self):
+        """
+        The magnification of the view, as a floating point number. A value of 
+        1.0 displays the world at its natural size, 2.0 doubles it, etc. The
+        view is zoomed about the center of the window.
+        """
+        return self._zoom
+
+    @zoom.setter
+    def zoom(self, value):
+        self._zoom = value
+        self._changed()
+
+    @property
+    def rotation(self):
+        """
+        The rotation of the view in radians. A positive value rotates the 
+        displayed world counter-clockwise about the center of the window.
+        """
+        return self._rotation
+
+    @rotation.setter
+    def rotation(self, value):
+        self._rotation = value
+        self._changed()
+
+    def worldToScreen(self, pos):
+        """
+        Convert a world coordinate tuple, `pos`, to the window coordinates 
+        where it is currently displayed.
+        """
+        cx = self._width / 2
+        cy = self._height / 2
+        x = (pos[0] - self._x - cx) * self._zoom
+        y = (pos[1] - self._y - cy) * self._zoom
+        c = math.cos(self._rotation)
+        s = math.sin(self._rotation)
+        return (cx + x*c + y*s, cy - x*s + y*c)
+
+    def screenToWorld(self, pos):
+        """
+        Convert a window coordinate tuple, `pos` (for example, the position 
+        of a mouse event), to the world coordinates displayed at that point.
+        """
+        cx = self._width / 2
+        cy = self._height / 2
+        x = (pos[0] - cx) / self._zoom
+        y = (pos[1] - cy) / self._zoom
+        c = math.cos(self._rotation)
+        s = math.sin(self._rotation)
+        return (self._x + cx + x*c - y*s, self._y + cy + x*s + y*c)
+
+    @property
+    def extents(self):
+        """
+        A tuple, (xmin, ymin, xmax, ymax), that bounds the region of the world
+        that is currently visible in the window.
+        """
+        if self._extents is None:
+            corners = [self.screenToWorld(p) for p in 
+                [(0,0), (self._width,0), (0,self._height), (self._width,self._height)]]
+            x, y = zip(*corners)
+            self._extents = (min(x), min(y), max(x), max(y))
+        return self._extents
+
+
 class _Event(object):
 
     def __init__(self, hwevent):
@@ -1181,6 +3276,12 @@ class MouseEvent(_Event):
         """The window x-coordinate of the mouse pointer when the event occurred."""
         self.y = (hwevent.clientY - rect.top) * yscale
         """The window y-coordinate of the mouse pointer when the event occurred."""
+        self.worldx, self.worldy = App.camera.screenToWorld((self.x, self.y))
+        """
+        The world coordinates of the mouse pointer when the event occurred. 
+        These are the same as `x` and `y` unless the `ggame.App.camera` has 
+        been moved, zoomed or rotated.
+        """
 
 
 class KeyEvent(_Event):
@@ -1335,10 +3436,47 @@ class App(object):
     """
     spritelist = []
     """List of all sprites currently active in the application."""
+    drawncount = 0
+    """Number of sprites that were drawn in the most recent frame."""
+    culledcount = 0
+    """
+    Number of sprites that were skipped in the most recent frame, because they
+    were invisible or lay entirely outside of the window.
+    """
     _eventdict = {}
     _spritesdict = {}
     _spritesadded = False
+    _spritecount = 0
+    _animationdict = {}
+    _tweens = {}
+    _tweensdone = []
+    _frame = 0
+    _frameheap = []
+    _timeheap = []
+    _conditions = []
+    _coroutinecount = 0
+    _awaiting = []
+    _loader = None
+    _loadingassets = []
+    _preloads = []
+    _grouplist = []
+    _spatial = _AABBTree()
+    _staticspatial = _AABBTree(margin=0)
+    _staticsprites = set()
+    _staticlayer = None
+    _layers = {}
+    _root = None
+    _dirtysprites = set()
+    _sweptsprites = set()
+    _collisionhandlers = []
+    _tilemaps = []
     _win = None
+    camera = None
+    """
+    The `ggame.Camera` instance that controls the view of the world. Assign
+    to its attributes (e.g. `App.camera.x += 5`) to scroll, zoom or rotate
+    the view of all sprites at once.
+    """
 
     def __init__(self, *args):
         """
@@ -1355,11 +3493,28 @@ class App(object):
             App._win = GFX_Window(x, y, type(self)._destroy)
             self.width = App._win.width
             self.height = App._win.height
+            App.camera = Camera(self.width, self.height)
+            # layers are drawn in order, static sprites first from a cached image
+            App._root = _Layer()
+            App._win.add(App._root.GFX)
+            App._staticlayer = _Layer('static', -float('inf'))
+            App._staticlayer.GFX.cacheAsBitmap = True
+            App._root.add(App._staticlayer)
+            if 'default' not in App._layers:
+                App._layers['default'] = _Layer('default', 0)
+            for layer in App._layers.values():
+                App._root.add(layer)
             # Add existing sprites to the window
             if not App._spritesadded and len(App.spritelist) > 0:
                 App._spritesadded = True
+                for group in App._grouplist:
+                    if group._parent is None:
+                        App._addGFX(group)
                 for sprite in App.spritelist:
-                    App._win.add(sprite.GFX)
+                    if sprite._parent is None:
+                        App._addGFX(sprite)
+            for tilemap in App._tilemaps:
+                App._addGFX(tilemap)
             App._win.bind(KeyEvent.keydown, self._keyEvent)
             App._win.bind(KeyEvent.keyup, self._keyEvent)
             App._win.bind(KeyEvent.keypress, self._keyEvent)
@@ -1374,7 +3529,10 @@ class App(object):
     def _routeEvent(self, event, evtlist):
         for callback in reversed(evtlist):
             if not event.consumed:
-                callback(event)
+                result = callback(event)
+                if hasattr(result, '__await__'):
+                    # a coroutine handler: run by ggasync.run_async
+                    App._awaiting.append(result)
         
     def _keyEvent(self, hwevent):
         evtlist = App._eventdict.get(
@@ -1394,25 +3552,415 @@ class App(object):
 
     @classmethod
     def _add(cls, obj):
-        if App._win != None:
-            App._win.add(obj.GFX)
+        App._addGFX(obj)
         App.spritelist.append(obj)
+        # the position of the sprite in spritelist, for sorting query results
+        App._spritecount += 1
+        obj._order = App._spritecount
         if type(obj) not in App._spritesdict:
             App._spritesdict[type(obj)] = []
         App._spritesdict[type(obj)].append(obj)
+        App._index(obj)
+        if obj._prevextents is not None:
+            App._sweptsprites.add(obj)
+
+    @classmethod
+    def _index(cls, obj):
+        """
+        Enter a sprite in the spatial index: static sprites have their own.
+        """
+        obj._setExtents()
+        if obj._static:
+            obj._tree = App._staticspatial
+            App._staticsprites.add(obj)
+        else:
+            obj._tree = App._spatial
+        obj._treenode = obj._tree.insert(obj, 
+            obj.xmin, obj.ymin, obj.xmax, obj.ymax)
+
+    @classmethod
+    def _unindex(cls, obj):
+        obj._tree.remove(obj._treenode)
+        obj._tree = obj._treenode = None
+        App._staticsprites.discard(obj)
+        App._dirtysprites.discard(obj)
+
+    @classmethod
+    def _addGFX(cls, obj):
+        """
+        Display a sprite or group that is not a member of a group, in its
+        layer. Static sprites are placed in the static layer.
+        """
+        if App._root is not None:
+            if obj._static:
+                App._staticlayer.add(obj)
+                App._invalidateStatic()
+            else:
+                if obj._layername not in App._layers:
+                    App.addLayer(obj._layername)
+                App._layers[obj._layername].add(obj)
+
+    @classmethod
+    def _removeGFX(cls, obj):
+        if obj._container is not None:
+            obj._container.remove(obj)
+            if obj._static:
+                App._invalidateStatic()
+
+    @classmethod
+    def addLayer(cls, name, zIndex=0):
+        """
+        Create a layer of sprites with the given `name`, or change the 
+        `zIndex` of an existing layer. Layers are drawn in order of their 
+        `zIndex` (or the order in which they were created, for equal values),
+        and sprites are placed in a layer by assigning its name to their
+        `ggame.Sprite.layer` attribute. The `'default'` layer has a `zIndex` 
+        of 0.
+
+        Example: `App.addLayer('hud', 10)`
+        """
+        layer = App._layers.get(name)
+        if layer is None:
+            layer = App._layers[name] = _Layer(name, zIndex)
+        elif layer._container is not None:
+            App._root.remove(layer)
+        layer.zIndex = zIndex
+        if App._root is not None:
+            App._root.add(layer)
+
+    @classmethod
+    def _invalidateStatic(cls):
+        """
+        A static sprite has changed: have the system redraw its cached image
+        of the static layer.
+        """
+        layer = App._staticlayer
+        if layer is not None:
+            layer.GFX.cacheAsBitmap = False
+            layer.GFX.cacheAsBitmap = True
+
+    @classmethod
+    def _addGroup(cls, group):
+        App._addGFX(group)
+        App._grouplist.append(group)
+
+    @classmethod
+    def _removeGroup(cls, group):
+        App._removeGFX(group)
+        App._grouplist.remove(group)
+
+    @classmethod
+    def _addTileMap(cls, tilemap):
+        App._addGFX(tilemap)
+        App._tilemaps.append(tilemap)
+
+    @classmethod
+    def _removeTileMap(cls, tilemap):
+        App._removeGFX(tilemap)
+        App._tilemaps.remove(tilemap)
 
     @classmethod
     def _remove(cls, obj):
-        if App._win != None:
-            App._win.remove(obj.GFX)
+        App._removeGFX(obj)
         App.spritelist.remove(obj)
         App._spritesdict[type(obj)].remove(obj)
+        App._animationdict.pop(obj, None)
+        for track in App._tweens.values():
+            slot = track.slots.get(obj)
+            if slot is not None:
+                track.remove(track.tweens[slot])
+        App._unindex(obj)
+        App._sweptsprites.discard(obj)
+
+    @classmethod
+    def _loadImage(cls, url):
+        """
+        Decode the image file `url` on a worker thread. Returns a future of
+        the texture.
+        """
+        if App._loader is None:
+            from concurrent.futures import ThreadPoolExecutor
+            App._loader = ThreadPoolExecutor()
+        return App._loader.submit(App._decodeImage, url)
+
+    @staticmethod
+    def _decodeImage(url):
+        texture = None
+        if ImageAsset.cache is not None:
+            texture = ImageAsset.cache.texture(url)
+        if texture is None:
+            texture = GFX_Texture_decode(url)
+        return texture
+
+    @classmethod
+    def _addLoading(cls, asset):
+        if asset not in App._loadingassets:
+            App._loadingassets.append(asset)
+
+    @classmethod
+    def _stepLoading(cls):
+        """
+        On the main thread, finish the assets whose images have been decoded
+        in the background, then report the progress of each preload.
+        """
+        for asset in list(App._loadingassets):
+            if asset._finishLoading():
+                App._assetLoaded(asset)
+            if asset.loaded:
+                App._loadingassets.remove(asset)
+        for preload in list(App._preloads):
+            assets, onprogress, reported = preload
+            count = sum(1 for asset in assets if asset.loaded)
+            if count != reported:
+                preload[2] = count
+                if count == len(assets):
+                    App._preloads.remove(preload)
+                if onprogress:
+                    onprogress(count, len(assets))
+
+    @classmethod
+    def _assetLoaded(cls, asset):
+        """
+        The placeholder images of `asset` have been filled in: update the
+        size and cached images of everything that displays them.
+        """
+        Sprite._maskcache.clear()
+        for sprite in App.spritelist:
+            if sprite.asset is asset or sprite.edgedef is asset:
+                texture = sprite.GFX.texture
+                sprite.GFX.width = texture.width
+                sprite.GFX.height = texture.height
+                sprite._createBaseVertices()
+                sprite._invalidateXform()
+                sprite._displayChanged()
+        for tilemap in App._tilemaps:
+            if tilemap.asset is asset:
+                tilemap._dirtychunks.update(tilemap._chunks)
+
+    @classmethod
+    def preload(cls, assets, onprogress=None):
+        """
+        Follow the loading of a list of `assets` (`ggame.ImageAsset` objects
+        created with `lazy=True`), for example to show a loading screen.
+        The `onprogress` function is called with two arguments, the number
+        of assets that have loaded and the total number of `assets`: first
+        on the next frame, then on each frame in which more have loaded,
+        until the two are equal.
+
+        Example: `App.preload(assets, lambda n, total: print(n, 'of', total))`
+        """
+        App._preloads.append([list(assets), onprogress, None])
+
+    @classmethod
+    def _addAnimation(cls, anim):
+        App._animationdict[anim.sprite] = anim
+
+    @classmethod
+    def _removeAnimation(cls, anim):
+        if App._animationdict.get(anim.sprite) is anim:
+            del App._animationdict[anim.sprite]
+
+    @classmethod
+    def _addTween(cls, tween):
+        track = App._tweens.get(tween.attribute)
+        if track is None:
+            track = App._tweens[tween.attribute] = _TweenTrack(tween.attribute)
+        if tween._track is not None:
+            tween._track.remove(tween)
+        track.add(tween)
+
+    @classmethod
+    def _stepTweens(cls, now):
+        """
+        Advance all playing tweens, one attribute at a time, then start any 
+        tweens chained to those that completed and notify them. 
+        """
+        completed = App._tweensdone
+        for track in App._tweens.values():
+            track.step(now, completed)
+        if completed:
+            for tween in completed:
+                if tween._track is not None:
+                    tween._track.remove(tween)
+            done = completed[:]
+            del completed[:]
+            for tween in done:
+                if tween.next is not None:
+                    tween.next.play()
+                if tween.oncomplete:
+                    tween.oncomplete(tween)
+
+    @classmethod
+    def start(cls, generator):
+        """
+        Start running `generator` (the result of calling a generator 
+        function) as a `ggame.Coroutine`, beginning on the next frame. 
+        Returns the `ggame.Coroutine`, which may be stopped at any time.
+        See `ggame.Coroutine` for the values the generator may yield.
+
+        Example: `App.start(patrol(guard))`
+        """
+        coroutine = Coroutine(generator)
+        App._schedule(coroutine, None, time())
+        return coroutine
+
+    @classmethod
+    def _schedule(cls, coroutine, wait, now):
+        """
+        Schedule `coroutine` to continue after the `wait` it yielded. Waits
+        for a number of frames or seconds go on a heap ordered by the frame
+        or time they are due, so only the coroutines that are due are looked
+        at each frame; only conditions must be tested on every frame.
+        """
+        App._coroutinecount += 1
+        key = coroutine._key = App._coroutinecount
+        if wait is None:
+            heapq.heappush(App._frameheap, (App._frame + 1, key, coroutine))
+        elif isinstance(wait, int) and not isinstance(wait, bool):
+            heapq.heappush(App._frameheap, (App._frame + max(1, wait), key, coroutine))
+        elif isinstance(wait, float):
+            if wait > 0:
+                heapq.heappush(App._timeheap, (now + wait, key, coroutine))
+            else:
+                heapq.heappush(App._frameheap, (App._frame + 1, key, coroutine))
+        elif hasattr(wait, 'playing'):
+            App._conditions.append((lambda: not wait.playing, key, coroutine))
+        elif callable(wait):
+            App._conditions.append((wait, key, coroutine))
+        else:
+            coroutine.stop()
+            raise TypeError("Coroutine yielded {0!r}: expected None, a number of "
+                "frames or seconds, a tween, animation or coroutine, or a "
+                "function".format(wait))
+
+    @classmethod
+    def _stepCoroutines(cls, now):
+        """
+        Resume every coroutine that is due on this frame or at time `now`, 
+        or whose condition has become true. Coroutines that were stopped
+        leave entries behind on the heaps; these are skipped when they come
+        due, since the key of the entry no longer matches.
+        """
+        App._frame += 1
+        due = []
+        heap = App._frameheap
+        while heap and heap[0][0] <= App._frame:
+            due.append(heapq.heappop(heap))
+        heap = App._timeheap
+        while heap and heap[0][0] <= now:
+            due.append(heapq.heappop(heap))
+        if App._conditions:
+            waiting = []
+            for entry in App._conditions:
+                test, key, coroutine = entry
+                if coroutine._key != key:
+                    continue
+                if test():
+                    due.append(entry)
+                else:
+                    waiting.append(entry)
+            App._conditions = waiting
+        for i, (when, key, coroutine) in enumerate(due):
+            if coroutine._key == key:
+                try:
+                    coroutine._resume(now)
+                except:
+                    # the coroutines that were not resumed continue next frame
+                    for when, key, coroutine in due[i+1:]:
+                        heapq.heappush(App._frameheap, (App._frame + 1, key, coroutine))
+                    raise
+
+    @classmethod
+    def _stepAnimations(cls, now):
+        """
+        Advance all playing animations in a single pass, then notify any
+        that completed. Callbacks run after the pass so they may freely 
+        start or stop animations.
+        """
+        completed = [anim for anim in App._animationdict.values() if anim._step(now)]
+        for anim in completed:
+            if anim.mode == Animation.once:
+                anim.stop()
+            if anim.oncomplete:
+                anim.oncomplete(anim)
         
+    @classmethod
+    def _updateView(cls):
+        """
+        Pass any change in the camera settings to the system, which applies
+        them to the whole stage when rendering.
+        """
+        camera = App.camera
+        if camera._dirty:
+            App._win.setView(camera.x, camera.y, camera.zoom, camera.rotation)
+            camera._dirty = False
+
+    @classmethod
+    def _cull(cls):
+        """
+        Flag every sprite whose extents lie outside of the camera view as not
+        renderable, so the system can skip it when drawing the frame. Chunks of
+        tile maps are culled in the same way.
+        """
+        xmin, ymin, xmax, ymax = App.camera.extents
+        drawn = 0
+        for sprite in App.spritelist:
+            if sprite._static:
+                # drawn from the cached static layer, whatever the view
+                if sprite.GFX.visible:
+                    drawn += 1
+                continue
+            sprite._setExtents()
+            inview = not (sprite.xmin > xmax
+                or sprite.xmax < xmin
+                or sprite.ymin > ymax
+                or sprite.ymax < ymin)
+            gfx = sprite.GFX
+            if gfx.renderable != inview:
+                gfx.renderable = inview
+            if inview and gfx.visible:
+                drawn += 1
+        App.drawncount = drawn
+        App.culledcount = len(App.spritelist) - drawn
+        for tilemap in App._tilemaps:
+            tilemap._cull(xmin, ymin, xmax, ymax)
+
+    def _beginFrame(self):
+        """
+        Advance everything that ggame moves by itself, before the step 
+        function of the application is called.
+        """
+        App._stepLoading()
+        for s in App._sweptsprites:
+            s._recordExtents()
+        now = time()
+        App._stepAnimations(now)
+        App._stepTweens(now)
+        App._stepCoroutines(now)
+
+    def _endFrame(self):
+        """
+        Respond to the changes made by the step function of the application 
+        and prepare the display for drawing.
+        """
+        App._dispatchCollisions()
+        App._updateView()
+        App._cull()
+
     def _animate(self, dummy):
+        self._beginFrame()
         if self.userfunc:
-            self.userfunc()
+            result = self.userfunc()
         else:
-            self.step()
+            result = self.step()
+        for coroutine in [result] + App._awaiting:
+            if hasattr(coroutine, '__await__'):
+                del App._awaiting[:]
+                if hasattr(coroutine, 'close'):
+                    coroutine.close()
+                raise TypeError("Coroutine step functions and event handlers "
+                    "need ggasync.run_async")
+        self._endFrame()
         App._win.animate(self._animate)
 
     @classmethod
@@ -1434,12 +3982,45 @@ class App(object):
             App._win.unbind(MouseEvent.dblclick)
             App._win.destroy()
         App._win = None
+        App.camera = None
+        # stopped first, so that their finally blocks still find their sprites
+        for when, key, coroutine in App._frameheap + App._timeheap + App._conditions:
+            if coroutine._key == key:
+                coroutine.stop()
         for s in list(App.spritelist):
             s.destroy()
+        for g in list(App._grouplist):
+            g.destroy()
+        for t in list(App._tilemaps):
+            t.destroy()
         App.spritelist = []
+        App._spritecount = 0
         App._spritesdict = {}
         App._eventdict = {}
+        App._animationdict = {}
+        App._tweens = {}
+        App._tweensdone = []
+        App._frame = 0
+        App._coroutinecount = 0
+        App._frameheap = []
+        App._timeheap = []
+        App._conditions = []
+        App._awaiting = []
+        App._preloads = []
+        App._grouplist = []
+        App._spatial = _AABBTree()
+        App._staticspatial = _AABBTree(margin=0)
+        App._staticsprites = set()
+        App._staticlayer = None
+        App._layers = {}
+        App._root = None
+        App._dirtysprites = set()
+        App._sweptsprites = set()
+        App._collisionhandlers = []
+        App._tilemaps = []
+        Sprite._maskcache.clear()
         App._spritesadded = False
+        App.drawncount = App.culledcount = 0
 
     @classmethod
     def listenKeyEvent(cls, eventtype, key, callback):
@@ -1493,13 +4074,194 @@ class App(object):
         """
         App._eventdict[eventtype].remove(callback)
 
+    @classmethod
+    def onCollision(cls, maskA, maskB, handler):
+        """
+        Register a `handler` function to be called once for each pair of
+        colliding sprites in every frame, after the `ggame.App.step` method.
+        The first sprite of each pair has a `ggame.Sprite.collisionLayer` that 
+        shares a bit with `maskA`, and the second with `maskB`. The handler
+        is called with the two sprites as arguments, and all handlers are called 
+        after the collisions for the frame have been found, so they may 
+        safely destroy sprites.
+
+        Example: `App.onCollision(BULLETS, ENEMIES, self.hit)`
+        """
+        App._collisionhandlers.append((maskA, maskB, handler))
+
+    @classmethod
+    def _dispatchCollisions(cls):
+        """
+        Find the colliding pairs of sprites for every collision handler at
+        once: the spatial index is queried once for each moving sprite, and
+        each pair found is then matched against the layers of every handler.
+        """
+        handlers = App._collisionhandlers
+        if not handlers:
+            return
+        App._flushExtents()
+        layers = 0
+        for maskA, maskB, handler in handlers:
+            layers |= maskA | maskB
+        pairs = []
+        seen = set()
+        # only moving sprites are enumerated: static pairs never collide
+        for a in App.spritelist:
+            if a._static or not a.collisionLayer & layers:
+                continue
+            for b in a._collisionCandidates():
+                if b is a or not b.collisionLayer & layers or (b, a) in seen:
+                    continue
+                seen.add((a, b))
+                pairs.append((a, b))
+        colliding = {}
+        calls = []
+        for maskA, maskB, handler in handlers:
+            for pair in pairs:
+                a, b = pair
+                if a.collisionLayer & maskA and b.collisionLayer & maskB:
+                    first, second = a, b
+                elif b.collisionLayer & maskA and a.collisionLayer & maskB:
+                    first, second = b, a
+                else:
+                    continue
+                hit = colliding.get(pair)
+                if hit is None:
+                    hit = colliding[pair] = a.collidingWith(b)
+                if hit:
+                    calls.append((handler, first, second))
+        for handler, a, b in calls:
+            # skip pairs whose sprites were destroyed by an earlier handler
+            if a._treenode is not None and b._treenode is not None:
+                handler(a, b)
+
     @classmethod
     def getSpritesbyClass(cls, sclass):
         """
         Returns a list of all active sprites of a given class.
         """
         return App._spritesdict.get(sclass, [])
-    
+
+    @classmethod
+    def _flushExtents(cls):
+        """
+        Recalculate the extents of any sprites that were rotated, scaled or
+        moved with their group, so that the spatial index is current.
+        """
+        if App._dirtysprites:
+            for s in list(App._dirtysprites):
+                s._setExtents()
+            App._dirtysprites.clear()
+
+    @classmethod
+    def spritesInRect(cls, x0, y0, x1, y1):
+        """
+        Returns a list of all active sprites whose extents (bounding boxes)
+        overlap the rectangle with corners at (x0, y0) and (x1, y1). Sprites
+        are kept in a spatial index, so the cost of this query grows only
+        with the logarithm of the number of sprites.
+        """
+        if x0 > x1:
+            x0, x1 = x1, x0
+        if y0 > y1:
+            y0, y1 = y1, y0
+        App._flushExtents()
+        slist = App._spatial.query(x0, y0, x1, y1)
+        slist.extend(App._staticspatial.query(x0, y0, x1, y1))
+        return [s for s in slist
+            if not (s.xmin > x1 or s.xmax < x0 or s.ymin > y1 or s.ymax < y0)]
+
+    @classmethod
+    def spritesAtPoint(cls, x, y):
+        """
+        Returns a list of all active sprites whose extents (bounding boxes)
+        include the point (x, y).
+        """
+        return App.spritesInRect(x, y, x, y)
+
+    @classmethod
+    def _raycast(cls, origin, direction, maxdist, sclass, first):
+        ox, oy = origin
+        dx, dy = direction
+        length = math.hypot(dx, dy)
+        if length == 0:
+            return []
+        dx /= length
+        dy /= length
+        def test(sprite, maxdist):
+            if sclass is not None and type(sprite) is not sclass:
+                return None
+            return sprite._rayDistance(ox, oy, dx, dy, maxdist)
+        App._flushExtents()
+        hits = App._spatial.raycast(ox, oy, dx, dy, maxdist, test, first)
+        if first and hits:
+            maxdist = hits[0][0]
+        hits.extend(App._staticspatial.raycast(ox, oy, dx, dy, maxdist, test, first))
+        hits.sort(key=lambda hit: hit[0])
+        if first:
+            hits = hits[:1]
+        return [(s, (ox + dx*d, oy + dy*d), d) for d, s in hits]
+
+    @classmethod
+    def raycast(cls, origin, direction, maxdist, sclass=None):
+        """
+        Cast a ray from the `origin` (x,y) tuple in the `direction` given by
+        an (x,y) vector, for up to `maxdist` pixels. Returns a tuple of
+        (sprite, (x,y), distance) for the first sprite whose `edgedef` is
+        struck by the ray, or None if nothing is hit. If `sclass` is given,
+        only sprites of that class are considered. Sprites that contain the
+        origin are ignored, so a ray may be cast from the center of a sprite.
+
+        Example: `hit = App.raycast(player.position, (1,0), 500, Wall)`
+        """
+        hits = App._raycast(origin, direction, maxdist, sclass, True)
+        return hits[0] if hits else None
+
+    @classmethod
+    def raycastAll(cls, origin, direction, maxdist, sclass=None):
+        """
+        As `ggame.App.raycast`, but returns a list of (sprite, (x,y), distance)
+        tuples for every sprite struck by the ray, ordered by distance.
+        """
+        return App._raycast(origin, direction, maxdist, sclass, False)
+
+    @classmethod
+    def _nearest(cls, point, k, maxdist, sclass):
+        x, y = point
+        def distance(sprite):
+            if sclass is not None and type(sprite) is not sclass:
+                return None
+            return _AABBTree._pointBox(sprite, x, y)
+        App._flushExtents()
+        found = App._spatial.nearest(x, y, k, maxdist, distance)
+        found.extend(App._staticspatial.nearest(x, y, k, maxdist, distance))
+        found.sort(key=lambda item: item[0])
+        if k < len(found):
+            found = found[:k]
+        return [s for d, s in found]
+
+    @classmethod
+    def nearestSprites(cls, point, k, sclass=None):
+        """
+        Returns a list of (up to) the `k` sprites nearest to `point`, an (x,y)
+        tuple, ordered from nearest to farthest. Distance is measured to the
+        nearest edge of each sprite's extents (bounding box), so it is zero
+        for sprites that cover the point. If `sclass` is given, only sprites
+        of that class are returned.
+
+        Example: `targets = App.nearestSprites(player.position, 5, Enemy)`
+        """
+        return App._nearest(point, k, float('inf'), sclass)
+
+    @classmethod
+    def spritesWithin(cls, point, radius, sclass=None):
+        """
+        Returns a list of all sprites whose extents (bounding boxes) lie within
+        `radius` pixels of `point`, an (x,y) tuple, ordered from nearest to
+        farthest. If `sclass` is given, only sprites of that class are returned.
+        """
+        return App._nearest(point, float('inf'), radius, sclass)
+
     def step(self):
         """
         The `ggame.App.step` method is called once per animation frame. Override
@@ -1518,6 +4280,8 @@ class App(object):
         to any function which shall be called once per animation frame.
         """
         self.userfunc = userfunc
+        App._updateView()
+        App._cull()
         App._win.animate(self._animate)
 
 
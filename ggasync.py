@@ -0,0 +1,82 @@
+"""
+# ggasync
+## A ggame extension for running applications with asyncio
+
+`ggame.App.run` takes over the program until the application ends, so
+nothing else can run alongside it. `ggasync.run_async` runs the same
+application as an `asyncio` coroutine instead, yielding to the event loop
+between frames, so other tasks (reading a socket, writing a log, loading
+files) run at the same time:
+
+    async def main():
+        reader = asyncio.ensure_future(readCommands())
+        await run_async(myapp, step)
+
+    asyncio.get_event_loop().run_until_complete(main())
+
+The step function and event handlers of the application may then be
+coroutine functions (`async def`).
+
+This module requires Python 3.5 or later, and is not available in the
+browser.
+"""
+
+import asyncio
+from ggame import App
+
+
+async def run_async(app, userfunc=None, fps=60):
+    """
+    Run the `ggame.App` instance `app`, as with `ggame.App.run`, in a
+    coroutine that returns when the window is closed. Frames are paced at
+    `fps` per second; when a frame runs late, the next frame follows it at
+    once instead of several being crowded together.
+
+    The `userfunc` function (or the `ggame.App.step` method of `app`) may
+    be a coroutine function: it is awaited once per frame, before the frame
+    is drawn. Event handlers may also be coroutine functions; each event
+    runs the handler as a separate `asyncio` task. Cancelling `run_async`
+    also cancels any handler tasks that have not finished.
+
+    Example: `await run_async(myapp, step)`
+    """
+    app.userfunc = userfunc
+    win = App._win
+    App._updateView()
+    App._cull()
+    win.render()
+    loop = asyncio.get_event_loop()
+    period = 1.0 / fps
+    due = loop.time()
+    tasks = set()
+    try:
+        while App._win is win:
+            due += period
+            now = loop.time()
+            if due < now:
+                due = now
+            await asyncio.sleep(due - now)
+            for coroutine in App._awaiting:
+                tasks.add(asyncio.ensure_future(coroutine))
+            del App._awaiting[:]
+            for task in [task for task in tasks if task.done()]:
+                tasks.discard(task)
+                if not task.cancelled():
+                    # raise any error from a handler, as if it were not a coroutine
+                    task.result()
+            if App._win is not win:
+                break
+            app._beginFrame()
+            if app.userfunc:
+                result = app.userfunc()
+            else:
+                result = app.step()
+            if hasattr(result, '__await__'):
+                await result
+            if App._win is not win:
+                break
+            app._endFrame()
+            win.render()
+    finally:
+        for task in tasks:
+            task.cancel()
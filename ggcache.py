@@ -0,0 +1,193 @@
+"""
+# ggcache
+## A ggame extension for starting applications faster
+
+Each time a ggame application starts, it decodes every one of its image
+files (a PNG, for example) again. A `ggcache.ImageCache` keeps the decoded
+pixels of each image in a directory on disk, so that later runs of the
+application, and other applications running at the same time, can skip
+the decoding:
+
+    ImageAsset.cache = ImageCache('.ggcache')
+    bunny = ImageAsset('bunny.png')
+
+Cached pixels are memory mapped rather than read, so every process that
+uses the same image shares a single copy of it in memory. The cache also
+keeps the collision mask of each image and sub-image (see
+`ggame.Sprite.pixelCollision`), which is slow to compute.
+
+Images are stored under a hash of the contents of their file. By default a
+file whose modification time and size have not changed is assumed to have
+the same contents; with `verify='hash'` the file is hashed each time it is
+loaded instead.
+
+This module uses the image decoders of pygame or PIL, so it is not
+available in the browser.
+"""
+
+import os
+import json
+import mmap
+import hashlib
+import tempfile
+import threading
+from ggame import GFX_Texture_decode, GFX_Texture_fromPixels, GFX_AlphaMask
+
+
+class ImageCache(object):
+    """
+    A directory of decoded images. Assign one to `ggame.ImageAsset.cache`
+    to load every image file through it.
+    """
+
+    def __init__(self, directory='.ggcache', verify='mtime'):
+        """
+        Create a cache that keeps its files in `directory`, which is created
+        if it does not exist. The `verify` parameter is `'mtime'` (default)
+        to trust the modification time and size of an image file, or
+        `'hash'` to hash the contents of the file every time it is loaded.
+        """
+        self.directory = directory
+        """The directory that holds the cache files."""
+        self.verify = verify
+        """How image files are checked for changes: `'mtime'` or `'hash'`."""
+        os.makedirs(directory, exist_ok=True)
+        # the memory maps and metadata of the images used by this process,
+        # shared by the threads that load lazy assets
+        self._maps = {}
+        self._meta = {}
+        self._lock = threading.Lock()
+
+    def _path(self, name):
+        return os.path.join(self.directory, name)
+
+    def _write(self, name, data):
+        """
+        Write the bytes `data` to the cache file `name`, in a way that other
+        processes and threads never see a partly written file.
+        """
+        fd, temp = tempfile.mkstemp('.tmp', dir=self.directory)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(temp, self._path(name))
+        except:
+            os.remove(temp)
+            raise
+
+    def _readJSON(self, name):
+        try:
+            with open(self._path(name)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _writeJSON(self, name, value):
+        self._write(name, json.dumps(value).encode())
+
+    def _hash(self, url):
+        """
+        Return the hash of the contents of the image file `url`, or None if
+        it is not a local file. With `verify='mtime'`, the hash recorded the
+        last time the file was loaded is used, if the file has the same
+        modification time and size.
+        """
+        try:
+            stat = os.stat(url)
+        except (OSError, ValueError):
+            return None
+        name = 'file-{0}.json'.format(
+            hashlib.sha256(os.path.abspath(url).encode()).hexdigest()[:32])
+        entry = self._readJSON(name)
+        if (self.verify == 'mtime' and entry is not None
+            and entry['mtime'] == stat.st_mtime_ns and entry['size'] == stat.st_size):
+            return entry['hash']
+        with open(url, 'rb') as f:
+            digest = hashlib.sha256(f.read()).hexdigest()
+        if entry is None or entry['hash'] != digest or entry['mtime'] != stat.st_mtime_ns:
+            self._writeJSON(name, {'path': os.path.abspath(url),
+                'mtime': stat.st_mtime_ns, 'size': stat.st_size, 'hash': digest})
+        return digest
+
+    def _map(self, key, meta):
+        """
+        Return a memory map of the cached pixels of image `key`, or None if
+        they are missing or do not match the metadata `meta`.
+        """
+        with self._lock:
+            pixels = self._maps.get(key)
+            if pixels is None:
+                try:
+                    with open(self._path(key + '.rgba'), 'rb') as f:
+                        pixels = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                except (OSError, ValueError):
+                    return None
+                if len(pixels) != meta['width'] * meta['height'] * 4:
+                    pixels.close()
+                    return None
+                self._maps[key] = pixels
+            return pixels
+
+    def texture(self, url):
+        """
+        Return a system texture of the whole of the image file `url`, with
+        its pixels mapped from the cache. The file is decoded and added to
+        the cache if it is not there already. Returns None if `url` is not
+        a local file.
+        """
+        key = self._hash(url)
+        if key is None:
+            return None
+        with self._lock:
+            meta = self._meta.get(key)
+        if meta is None:
+            meta = self._readJSON(key + '.json')
+        pixels = None if meta is None else self._map(key, meta)
+        if pixels is None:
+            decoded = GFX_Texture_decode(url)
+            # the metadata is written last: other processes ignore the pixels until then
+            self._write(key + '.rgba', decoded.pixels())
+            meta = {'width': decoded.width, 'height': decoded.height, 'frames': {}}
+            self._writeJSON(key + '.json', meta)
+            pixels = self._map(key, meta)
+        with self._lock:
+            meta = self._meta.setdefault(key, meta)
+        return GFX_Texture_fromPixels(url, meta['width'], meta['height'], pixels)
+
+    def mask(self, texture):
+        """
+        Return the collision mask of `texture`, unrotated and unscaled, in
+        the form returned by `GFX_AlphaMask`. Masks of images in the cache
+        are kept with them for each sub-image (frame) of the image.
+        """
+        key = self._hash(texture.name)
+        with self._lock:
+            meta = self._meta.get(key) if key is not None else None
+        if meta is None:
+            return GFX_AlphaMask(texture, 0, 1.0)
+        f = texture.framerect
+        frame = '{0},{1},{2},{3}'.format(f.x, f.y, f.width, f.height)
+        with self._lock:
+            cached = meta['frames'].get(frame)
+        if cached is not None:
+            return ([int(row, 16) for row in cached['mask']], cached['width'])
+        mask = GFX_AlphaMask(texture, 0, 1.0)
+        if mask is not None:
+            rows, width = mask
+            with self._lock:
+                meta['frames'][frame] = {'mask': ['{0:x}'.format(row) for row in rows],
+                    'width': width}
+                data = json.dumps(meta).encode()
+            self._write(key + '.json', data)
+        return mask
+
+    def clear(self):
+        """
+        Remove every file from the cache directory. Images already loaded
+        by this process keep their pixels.
+        """
+        for name in os.listdir(self.directory):
+            if name.endswith(('.rgba', '.json')):
+                os.remove(self._path(name))
+        with self._lock:
+            self._meta = {}
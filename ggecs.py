@@ -0,0 +1,276 @@
+"""
+# ggecs
+## A ggame extension for very large numbers of simple game objects
+
+Each `ggame.Sprite` is a full Python object with its own `step` method,
+which is convenient, but slow once there are thousands of them. A
+`ggecs.World` instead stores game objects as *entities*: plain integer ids
+with *components* (named groups of values, such as a position or a
+velocity) kept in NumPy arrays, one array per value. *Systems* are
+functions that update every entity with a given set of components at once:
+
+    world = World()
+    world.defineComponent('velocity', vx=0.0, vy=0.0)
+
+    def move(world, ids, dt):
+        t = world.component('transform')
+        v = world.component('velocity')
+        t.x[ids] += v.vx[ids] * dt
+        t.y[ids] += v.vy[ids] * dt
+
+    world.addSystem(move, 'transform', 'velocity')
+    for i in range(5000):
+        e = world.createEntity(transform={'x': i % 100 * 5, 'y': i // 100 * 5},
+            velocity={'vx': 20})
+        world.attachSprite(e, bunny)
+
+    def step():
+        world.step()
+
+Entities with a sprite attached (see `ggecs.World.attachSprite`) are
+drawn with their `transform` component; only the sprites whose transform
+has changed are updated on the display.
+
+This module requires [NumPy](http://www.numpy.org), so it is not
+available in the browser.
+"""
+
+from time import time
+import numpy as np
+from ggame import App, GFX_NewStage, GFX_Sprite, _DisplayObject
+
+
+class Component(object):
+    """
+    The storage of one kind of component: a NumPy array for each of its
+    values, indexed by entity id, and a mask of the entities that have it.
+    Get one with `ggecs.World.component`.
+    """
+
+    def __init__(self, name, fields, capacity):
+        self.name = name
+        """The name of the component."""
+        self.fields = fields
+        """A dictionary of the name and default value of each field."""
+        self.mask = np.zeros(capacity, bool)
+        """True for each entity that has the component."""
+        for field, default in fields.items():
+            setattr(self, field, np.full(capacity, default, type(default)))
+
+    def _grow(self, capacity):
+        self.mask = np.concatenate((self.mask, np.zeros(capacity - len(self.mask), bool)))
+        for field, default in self.fields.items():
+            old = getattr(self, field)
+            setattr(self, field, np.concatenate((old,
+                np.full(capacity - len(old), default, type(default)))))
+
+
+class World(_DisplayObject):
+    """
+    A collection of entities, their components and the systems that update
+    them. Every world defines the `'transform'` component, with fields `x`,
+    `y`, `rotation` and `scale`, which places entity sprites on the screen.
+    """
+
+    def __init__(self, capacity=256):
+        """
+        Create an empty world with room for `capacity` entities. The world
+        grows as needed when more entities are created.
+        """
+        self.capacity = capacity
+        self._alive = np.zeros(capacity, bool)
+        self._free = []
+        self._next = 0
+        self._components = {}
+        self._systems = []
+        self._sprites = {}
+        self._last = None
+        self.GFX = GFX_NewStage()
+        """`GFX` is a reference to the underlying container object provided by the system."""
+        self.defineComponent('transform', x=0.0, y=0.0, rotation=0.0, scale=1.0)
+        # transforms last written to the display, to find the ones that changed
+        self._synced = Component('synced',
+            {'x': np.nan, 'y': np.nan, 'rotation': np.nan, 'scale': np.nan}, capacity)
+        App._addGFX(self)
+
+    def defineComponent(self, name, **fields):
+        """
+        Define a kind of component called `name`, with fields given as
+        keyword arguments with their default values. The type of each
+        default (e.g. float, int or bool) sets the type of its array.
+
+        Example: `world.defineComponent('health', hp=100, armor=0.0)`
+        """
+        self._components[name] = Component(name, fields, self.capacity)
+
+    def component(self, name):
+        """
+        Return the `ggecs.Component` called `name`. Its fields are NumPy
+        arrays indexed by entity id, e.g. `world.component('transform').x`.
+        """
+        return self._components[name]
+
+    def _grow(self):
+        self.capacity *= 2
+        self._alive = np.concatenate((self._alive, np.zeros(len(self._alive), bool)))
+        for component in self._components.values():
+            component._grow(self.capacity)
+        self._synced._grow(self.capacity)
+
+    def createEntity(self, **components):
+        """
+        Create an entity and return its id. Components are given as keyword
+        arguments with a dictionary of their field values; fields that are
+        not given keep their default value. Every entity has a `'transform'`.
+
+        Example: `e = world.createEntity(transform={'x': 10}, health={})`
+        """
+        if self._free:
+            entity = self._free.pop()
+        else:
+            if self._next == self.capacity:
+                self._grow()
+            entity = self._next
+            self._next += 1
+        self._alive[entity] = True
+        self.addComponent(entity, 'transform', **components.pop('transform', {}))
+        for name, values in components.items():
+            self.addComponent(entity, name, **values)
+        return entity
+
+    def destroyEntity(self, entity):
+        """
+        Destroy `entity`, its components and its sprite. Its id may be
+        reused by a new entity.
+        """
+        for name in list(self._components):
+            self.removeComponent(entity, name)
+        self.detachSprite(entity)
+        self._alive[entity] = False
+        self._free.append(entity)
+
+    def addComponent(self, entity, name, **values):
+        """
+        Give `entity` the component called `name`, with field `values`
+        given as keyword arguments. Fields that are not given are set to
+        their default value.
+        """
+        component = self._components[name]
+        component.mask[entity] = True
+        for field, default in component.fields.items():
+            getattr(component, field)[entity] = values.get(field, default)
+
+    def removeComponent(self, entity, name):
+        """
+        Remove the component called `name` from `entity`.
+        """
+        self._components[name].mask[entity] = False
+
+    def hasComponent(self, entity, name):
+        """
+        Return True if `entity` has the component called `name`.
+        """
+        return bool(self._components[name].mask[entity])
+
+    def query(self, *names):
+        """
+        Return a NumPy array of the ids of every entity that has all of the
+        components named.
+        """
+        mask = self._alive.copy()
+        for name in names:
+            mask &= self._components[name].mask
+        return np.flatnonzero(mask)
+
+    def addSystem(self, system, *names):
+        """
+        Add a `system` function to the world, which runs on every
+        `ggecs.World.step` as `system(world, ids, dt)`, with `ids` the
+        array of entities that have all of the components named and `dt`
+        the time step in seconds. Systems run in the order they were added.
+        """
+        self._systems.append((system, names))
+
+    def removeSystem(self, system):
+        """
+        Remove a `system` function that was added with `ggecs.World.addSystem`.
+        """
+        self._systems = [s for s in self._systems if s[0] is not system]
+
+    def attachSprite(self, entity, asset, index=0):
+        """
+        Display `entity` with image `index` of `asset`, a `ggame.ImageAsset`,
+        at the position, rotation and scale of its `'transform'`. This
+        is not a `ggame.Sprite`: it takes no part in collisions or events.
+        """
+        self.detachSprite(entity)
+        gfx = self._sprites[entity] = GFX_Sprite(asset[index])
+        self.GFX.addChild(gfx)
+        synced = self._synced
+        synced.mask[entity] = True
+        for field in synced.fields:
+            getattr(synced, field)[entity] = np.nan
+
+    def detachSprite(self, entity):
+        """
+        Remove the sprite of `entity`, if it has one, from the display.
+        """
+        gfx = self._sprites.pop(entity, None)
+        if gfx is not None:
+            self._synced.mask[entity] = False
+            self.GFX.removeChild(gfx)
+            gfx.destroy()
+
+    def _sync(self):
+        """
+        Copy the transforms of entities with sprites to the display, for
+        only those that changed since the last step.
+        """
+        t = self._components['transform']
+        s = self._synced
+        changed = s.mask & ((t.x != s.x) | (t.y != s.y) 
+            | (t.rotation != s.rotation) | (t.scale != s.scale))
+        ids = np.flatnonzero(changed)
+        if len(ids) == 0:
+            return
+        rotation, scale = t.rotation[ids], t.scale[ids]
+        c = np.cos(rotation) * scale
+        sn = np.sin(rotation) * scale
+        sprites = self._sprites
+        for i, x, y, r, sc, a, b in zip(ids.tolist(), t.x[ids].tolist(), 
+            t.y[ids].tolist(), rotation.tolist(), scale.tolist(), c.tolist(), sn.tolist()):
+            gfx = sprites[i]
+            gfx.position.x = x
+            gfx.position.y = y
+            gfx.rotation = -r
+            gfx.scale.x = gfx.scale.y = sc
+            # the matrix used by system renderers that do not rotate sprites themselves
+            gfx.affine = (a, -b, b, a, 0.0, 0.0)
+        for field in s.fields:
+            getattr(s, field)[ids] = getattr(t, field)[ids]
+
+    def step(self, dt=None):
+        """
+        Run every system once, with a time step of `dt` seconds (by default,
+        the time since the last step), then update the display. Call this
+        from your application `step` function.
+        """
+        now = time()
+        if dt is None:
+            dt = 0.0 if self._last is None else min(now - self._last, 0.25)
+        self._last = now
+        self._attach()
+        for system, names in self._systems:
+            system(self, self.query(*names), dt)
+        self._sync()
+
+    def destroy(self):
+        """
+        Remove the world and all of its sprites from the display.
+        """
+        for entity in list(self._sprites):
+            self.detachSprite(entity)
+        App._removeGFX(self)
+        self.GFX.destroy()
+        self._destroyed = True
+
@@ -144,13 +144,13 @@ class _MathVisual(Sprite, _MathDynamic, metaclass=ABCMeta):
         if type(asset) != ImageAsset:
             visible = self.GFX.visible
             if App._win != None:
-                App._win.remove(self.GFX)
+                App._removeGFX(self)
                 self.GFX.destroy()
             self.asset = asset
             self.GFX = self.asset.GFX
             self.GFX.visible = visible        
             if App._win != None:
-                App._win.add(self.GFX)
+                App._addGFX(self)
         self.position = self.pposinputs.pos
             
     @property
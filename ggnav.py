@@ -0,0 +1,229 @@
+"""
+# ggnav
+## A ggame extension for steering many sprites across a grid
+
+A `ggnav.NavGrid` divides the world into cells that are either walkable
+or blocked. Rather than searching for a path separately for every sprite,
+the grid computes a single `ggnav.FlowField` for each target: a table
+that gives, for every cell, the direction of the shortest path to the
+target. Any number of sprites can then look up their next direction at
+constant cost:
+
+    grid = NavGrid.fromTileMap(world)
+
+    def step():
+        field = grid.flowField(player.position)
+        for enemy in enemies:
+            dx, dy = field.direction(enemy.x, enemy.y)
+            enemy.x += dx * 2
+            enemy.y += dy * 2
+
+Flow fields are cached, so asking for the field of a target that has not
+moved to another cell costs no more than a dictionary lookup.
+"""
+
+from array import array
+from math import sqrt, floor
+import heapq
+
+# neighbour offsets: the four sides, then the four diagonals, in opposite pairs
+_STEPS = ((1,0), (-1,0), (0,1), (0,-1), (1,1), (-1,-1), (1,-1), (-1,1))
+_COSTS = (1.0,) * 4 + (sqrt(2),) * 4
+_DIRECTIONS = tuple((dx / sqrt(dx*dx + dy*dy), dy / sqrt(dx*dx + dy*dy))
+    for dx, dy in _STEPS) + ((0.0, 0.0),)
+_NONE = len(_STEPS)
+_INF = float('inf')
+
+
+class NavGrid(object):
+    """
+    A grid of walkable and blocked cells covering a rectangle of the world.
+    All cells are walkable when the grid is created.
+    """
+
+    def __init__(self, columns, rows, cellwidth, cellheight, pos=(0,0), cachesize=8):
+        """
+        Create a grid of `columns` by `rows` cells, each `cellwidth` by
+        `cellheight` pixels, with the top left corner of the grid at `pos`.
+        Up to `cachesize` flow fields are kept for reuse.
+        """
+        self.columns = columns
+        """The number of columns of cells in the grid."""
+        self.rows = rows
+        """The number of rows of cells in the grid."""
+        self.cellwidth = cellwidth
+        """The width of each cell, in pixels."""
+        self.cellheight = cellheight
+        """The height of each cell, in pixels."""
+        self.x, self.y = pos
+        self.cachesize = cachesize
+        self._walkable = array('b', [1]) * (columns * rows)
+        self._fields = {}
+
+    @classmethod
+    def fromTileMap(cls, tilemap, cachesize=8):
+        """
+        Create a grid that matches the cells of a `ggame.TileMap`, in which
+        the cells holding solid tiles (see `ggame.TileMap.solid`) are blocked.
+        """
+        grid = cls(tilemap.columns, tilemap.rows, tilemap.tilewidth,
+            tilemap.tileheight, tilemap.position, cachesize)
+        solid = tilemap.solid
+        walkable = grid._walkable
+        for i, index in enumerate(tilemap._tiles):
+            if index in solid:
+                walkable[i] = 0
+        return grid
+
+    def cellAt(self, x, y):
+        """
+        Return the (column, row) of the cell at the world point (`x`, `y`),
+        or None if the point is outside of the grid.
+        """
+        col = floor((x - self.x) / self.cellwidth)
+        row = floor((y - self.y) / self.cellheight)
+        if 0 <= col < self.columns and 0 <= row < self.rows:
+            return (col, row)
+        return None
+
+    def walkable(self, col, row):
+        """
+        Return True if the cell at (`col`, `row`) is inside of the grid and
+        not blocked.
+        """
+        if 0 <= col < self.columns and 0 <= row < self.rows:
+            return self._walkable[row * self.columns + col] == 1
+        return False
+
+    def block(self, col, row, blocked=True):
+        """
+        Block the cell at (`col`, `row`), or make it walkable again if
+        `blocked` is False. Cached flow fields are discarded if this changes
+        the cell. Raises `IndexError` if the cell is outside of the grid.
+        """
+        if not (0 <= col < self.columns and 0 <= row < self.rows):
+            raise IndexError("cell ({0}, {1}) is outside of the grid".format(col, row))
+        i = row * self.columns + col
+        value = 0 if blocked else 1
+        if self._walkable[i] != value:
+            self._walkable[i] = value
+            self._fields = {}
+
+    def blockRect(self, x0, y0, x1, y1, blocked=True):
+        """
+        Block every cell that overlaps the rectangle with corners (`x0`, `y0`)
+        and (`x1`, `y1`) in world coordinates, or make them walkable again if
+        `blocked` is False.
+        """
+        c0 = max(0, floor((min(x0, x1) - self.x) / self.cellwidth))
+        r0 = max(0, floor((min(y0, y1) - self.y) / self.cellheight))
+        c1 = min(self.columns - 1, floor((max(x0, x1) - self.x) / self.cellwidth))
+        r1 = min(self.rows - 1, floor((max(y0, y1) - self.y) / self.cellheight))
+        for row in range(r0, r1 + 1):
+            for col in range(c0, c1 + 1):
+                self.block(col, row, blocked)
+
+    def blockSprites(self, sprites, blocked=True):
+        """
+        Block every cell that overlaps the extents of any of `sprites`, a
+        list of `ggame.Sprite` objects (walls that never move, for example).
+        """
+        for sprite in sprites:
+            sprite._setExtents()
+            self.blockRect(sprite.xmin, sprite.ymin, sprite.xmax, sprite.ymax, blocked)
+
+    def flowField(self, target):
+        """
+        Return the `ggnav.FlowField` that leads to `target`, an (x,y) world
+        point. The field is computed once, then reused until the target
+        moves to another cell or a cell is blocked or unblocked. Returns
+        None if the target is outside of the grid.
+        """
+        cell = self.cellAt(*target)
+        if cell is None:
+            return None
+        field = self._fields.pop(cell, None)
+        if field is None:
+            field = FlowField(self, cell)
+            if len(self._fields) >= self.cachesize:
+                # forget the field that was used least recently
+                del self._fields[next(iter(self._fields))]
+        self._fields[cell] = field
+        return field
+
+
+class FlowField(object):
+    """
+    The shortest path direction from every cell of a `ggnav.NavGrid` to
+    one target cell. Moving diagonally is allowed, but not across the
+    corner of a blocked cell. Flow fields are created by
+    `ggnav.NavGrid.flowField`.
+    """
+
+    def __init__(self, grid, target):
+        self.grid = grid
+        """The `ggnav.NavGrid` this field belongs to."""
+        self.target = target
+        """The (column, row) of the target cell."""
+        columns, rows = grid.columns, grid.rows
+        walkable = grid._walkable
+        cost = array('d', [_INF]) * (columns * rows)
+        toward = array('b', [_NONE]) * (columns * rows)
+        start = target[1] * columns + target[0]
+        cost[start] = 0.0
+        heap = [(0.0, start)]
+        # Dijkstra, outward from the target
+        while heap:
+            c, i = heapq.heappop(heap)
+            if c > cost[i]:
+                continue
+            row, col = divmod(i, columns)
+            for k, (dx, dy) in enumerate(_STEPS):
+                ncol, nrow = col + dx, row + dy
+                if not (0 <= ncol < columns and 0 <= nrow < rows):
+                    continue
+                j = nrow * columns + ncol
+                if not walkable[j]:
+                    continue
+                if dx and dy and not (walkable[row * columns + ncol]
+                    and walkable[nrow * columns + col]):
+                    continue
+                nc = c + _COSTS[k]
+                if nc < cost[j]:
+                    cost[j] = nc
+                    # from the neighbour, the path leads back the opposite way
+                    toward[j] = k ^ 1
+                    heapq.heappush(heap, (nc, j))
+        self._cost = cost
+        self._toward = toward
+
+    def _index(self, x, y):
+        grid = self.grid
+        cell = grid.cellAt(x, y)
+        if cell is None:
+            return None
+        return cell[1] * grid.columns + cell[0]
+
+    def direction(self, x, y):
+        """
+        Return a unit (dx, dy) vector giving the direction from the world
+        point (`x`, `y`) to the next cell along the shortest path to the
+        target. Returns (0, 0) at the target, or where the target cannot be
+        reached.
+        """
+        i = self._index(x, y)
+        if i is None:
+            return _DIRECTIONS[_NONE]
+        return _DIRECTIONS[self._toward[i]]
+
+    def distance(self, x, y):
+        """
+        Return the length, in cells, of the shortest path from the world
+        point (`x`, `y`) to the target, or infinity (`float('inf')`) if there
+        is none.
+        """
+        i = self._index(x, y)
+        if i is None:
+            return _INF
+        return self._cost[i]
+
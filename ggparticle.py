@@ -0,0 +1,152 @@
+"""
+# ggparticle
+## A ggame extension for particle effects
+
+A `ggparticle.ParticleEmitter` produces effects such as sparks, smoke or
+rocket exhaust from hundreds of small particles, without creating a
+`ggame.Sprite` for any of them. The state of every particle is kept in
+NumPy arrays, moved for all particles at once each frame, and the whole
+emitter is drawn by the system in a single batch:
+
+    sparks = ParticleEmitter((250, 250), rate=200, gravity=(0, 100))
+
+    def step():
+        sparks.step()
+
+This module requires [NumPy](http://www.numpy.org), so it is not
+available in the browser.
+"""
+
+from math import pi
+from time import time
+import numpy as np
+from ggame import App, Color, GFX_Batch, _DisplayObject
+
+
+class ParticleEmitter(_DisplayObject):
+    """
+    A source of particles: small squares of colour that fly out from the
+    emitter position, fade from one colour to another over their life, and
+    then vanish. Particles are drawn in world coordinates, so moving the
+    emitter does not move particles that have already been emitted.
+    """
+
+    def __init__(self, pos=(0,0), capacity=1000, rate=100, life=(0.5, 1.0),
+        speed=(50, 100), direction=(0, 2*pi), gravity=(0, 0), size=4,
+        color=Color(0xffcc00, 1.0), endcolor=Color(0xff0000, 0.0), levels=16):
+        """
+        Create an emitter at `pos` that holds up to `capacity` particles and
+        emits `rate` particles per second. Each particle lives for a random
+        time within the `life` range, in seconds, and starts with a random
+        speed (pixels per second) and direction (radians, counter-clockwise
+        from the positive x-axis) within the `speed` and `direction` ranges.
+        `gravity` is an (x,y) acceleration applied to every particle.
+        Particles are `size` pixels across, and change from `color` to
+        `endcolor` (both `ggame.Color`) in `levels` steps over their life.
+        """
+        self.x, self.y = pos
+        self.rate = rate
+        """The number of particles emitted each second. Set to 0 to stop."""
+        self.life = life
+        """The (shortest, longest) life of a particle, in seconds."""
+        self.speed = speed
+        """The (slowest, fastest) initial speed, in pixels per second."""
+        self.direction = direction
+        """The range of initial directions, in radians."""
+        self.gravity = np.array(gravity, dtype=float)
+        """The (x,y) acceleration of every particle, in pixels per second squared."""
+        self.capacity = capacity
+        self.count = 0
+        """The number of live particles."""
+        self.position = np.zeros((capacity, 2))
+        self.velocity = np.zeros((capacity, 2))
+        self.age = np.zeros(capacity)
+        self.lifetime = np.ones(capacity)
+        self._levels = levels
+        self._debt = 0.0
+        self._last = None
+        self._rng = np.random.RandomState()
+        colours = []
+        for k in range(levels):
+            f = k / max(1, levels - 1)
+            rgb = [round(((color.color >> s) & 255) * (1 - f) + ((endcolor.color >> s) & 255) * f)
+                for s in (16, 8, 0)]
+            colours.append(((rgb[0] << 16) + (rgb[1] << 8) + rgb[2],
+                color.alpha * (1 - f) + endcolor.alpha * f))
+        self.GFX = GFX_Batch(size, colours)
+        """`GFX` is a reference to the underlying batch object provided by the system."""
+        App._addGFX(self)
+
+    @property
+    def visible(self):
+        """Setting `ggparticle.ParticleEmitter.visible` to `False` hides every particle."""
+        return self.GFX.visible
+
+    @visible.setter
+    def visible(self, value):
+        self.GFX.visible = value
+
+    def emit(self, count):
+        """
+        Emit `count` particles at once, for a burst such as an explosion.
+        Particles beyond the capacity of the emitter are not created.
+        """
+        start = self.count
+        count = min(count, self.capacity - start)
+        if count <= 0:
+            return
+        end = start + count
+        rng = self._rng
+        angle = rng.uniform(self.direction[0], self.direction[1], count)
+        speed = rng.uniform(self.speed[0], self.speed[1], count)
+        self.position[start:end] = (self.x, self.y)
+        # y increases downward on the screen
+        self.velocity[start:end, 0] = np.cos(angle) * speed
+        self.velocity[start:end, 1] = -np.sin(angle) * speed
+        self.age[start:end] = 0
+        self.lifetime[start:end] = rng.uniform(self.life[0], self.life[1], count)
+        self.count = end
+
+    def step(self, dt=None):
+        """
+        Advance every particle by `dt` seconds (by default, the time since
+        the last step), emit new particles and pass the result to the system
+        for drawing. Call this from your application `step` function.
+        """
+        now = time()
+        if dt is None:
+            dt = 0.0 if self._last is None else min(now - self._last, 0.25)
+        self._last = now
+        self._attach()
+        n = self.count
+        if n:
+            age = self.age[:n]
+            age += dt
+            alive = age < self.lifetime[:n]
+            if not alive.all():
+                # keep the live particles packed at the front of the arrays
+                n = self.count = int(alive.sum())
+                for a in (self.position, self.velocity, self.age, self.lifetime):
+                    a[:n] = a[:len(alive)][alive]
+            self.velocity[:n] += self.gravity * dt
+            self.position[:n] += self.velocity[:n] * dt
+        self._debt += self.rate * dt
+        if self._debt >= 1:
+            emitted = int(self._debt)
+            self._debt -= emitted
+            self.emit(emitted)
+        n = self.count
+        levels = np.minimum(self._levels - 1,
+            (self.age[:n] / self.lifetime[:n] * self._levels).astype(int))
+        self.GFX.items = list(zip(levels.tolist(), self.position[:n, 0].tolist(),
+            self.position[:n, 1].tolist()))
+
+    def destroy(self):
+        """
+        Remove the emitter and all of its particles from the display.
+        """
+        App._removeGFX(self)
+        self.GFX.destroy()
+        self.count = 0
+        self._destroyed = True
+
@@ -0,0 +1,493 @@
+"""
+# ggphysics
+## A ggame extension for bouncing, pushing and stacking sprites
+
+A `ggphysics.PhysicsWorld` moves sprites as rigid bodies, with mass,
+velocity, bounce (restitution) and friction. Sprites that touch push each
+other apart, using the same outlines (see `ggame.Sprite.collidingWith`)
+as collision detection:
+
+    world = PhysicsWorld(gravity=(0, 400))
+    world.add(Sprite(RectangleAsset(400, 20), (50, 400)), static=True)
+    for i in range(5):
+        world.add(Sprite(RectangleAsset(30, 30), (200, 360 - i * 31)))
+
+    def step():
+        world.step()
+
+The world advances in fixed time steps (`substep`), however often
+`ggphysics.PhysicsWorld.step` is called, so the simulation behaves the
+same at any frame rate. Groups of bodies that come to rest, such as a
+stack of boxes, are put to sleep and cost nothing until something
+disturbs them.
+
+Outlines must be convex: rectangles, images, circles, ellipses and
+convex polygons.
+"""
+
+from math import sqrt, hypot
+from time import time
+from ggame import App
+
+
+def _cross(ax, ay, bx, by):
+    return ax * by - ay * bx
+
+
+def _polygon(verts):
+    """
+    Return the vertices of a convex outline without repeats, in the order
+    for which the outward normal of edge (p, q) is (qy - py, px - qx).
+    """
+    pts = []
+    for p in verts:
+        if not pts or p != pts[-1]:
+            pts.append(p)
+    if len(pts) > 1 and pts[0] == pts[-1]:
+        pts.pop()
+    area = sum(_cross(pts[i-1][0], pts[i-1][1], pts[i][0], pts[i][1])
+        for i in range(len(pts)))
+    if area < 0:
+        pts.reverse()
+    return pts
+
+
+def _normals(pts):
+    normals = []
+    for i in range(len(pts)):
+        (px, py), (qx, qy) = pts[i], pts[(i + 1) % len(pts)]
+        length = hypot(qx - px, qy - py) or 1.0
+        normals.append(((qy - py) / length, (px - qx) / length))
+    return normals
+
+
+def _maxSeparation(pa, na, pb):
+    """
+    Return (separation, face) for the face of polygon `pa` that best
+    separates it from polygon `pb`.
+    """
+    best = (-float('inf'), 0)
+    for i, (nx, ny) in enumerate(na):
+        vx, vy = pa[i]
+        s = min(nx * (x - vx) + ny * (y - vy) for x, y in pb)
+        if s > best[0]:
+            best = (s, i)
+    return best
+
+
+def _polygonContacts(pa, pb):
+    """
+    Return the normal (from `pa` to `pb`) and a list of (x, y, depth, id)
+    contact points of two overlapping convex polygons, or None.
+    """
+    na, nb = _normals(pa), _normals(pb)
+    sa, fa = _maxSeparation(pa, na, pb)
+    if sa > 0:
+        return None
+    sb, fb = _maxSeparation(pb, nb, pa)
+    if sb > 0:
+        return None
+    flip = sb > 0.98 * sa + 0.001
+    if flip:
+        pa, pb, na, nb, fa = pb, pa, nb, na, fb
+    nx, ny = na[fa]
+    # incident face: the face of the other polygon most opposed to the normal
+    fi = min(range(len(nb)), key=lambda i: nb[i][0] * nx + nb[i][1] * ny)
+    inc = [(pb[fi], fi), (pb[(fi + 1) % len(pb)], (fi + 1) % len(pb))]
+    r1 = pa[fa]
+    r2 = pa[(fa + 1) % len(pa)]
+    tx, ty = r2[0] - r1[0], r2[1] - r1[1]
+    for (ox, oy), sign in (((r1[0], r1[1]), 1), ((r2[0], r2[1]), -1)):
+        # clip the incident edge to the side planes of the reference face
+        d = [sign * (tx * (p[0] - ox) + ty * (p[1] - oy)) for p, k in inc]
+        if d[0] < 0 and d[1] < 0:
+            return None
+        if d[0] < 0 or d[1] < 0:
+            (p, k1), (q, k2) = inc
+            f = d[0] / (d[0] - d[1])
+            clipped = (p[0] + f * (q[0] - p[0]), p[1] + f * (q[1] - p[1]))
+            inc = [(clipped, k1), inc[1]] if d[0] < 0 else [inc[0], (clipped, k2)]
+    contacts = []
+    for (x, y), k in inc:
+        s = nx * (x - r1[0]) + ny * (y - r1[1])
+        if s <= 0:
+            contacts.append((x, y, -s, (fa, k, flip)))
+    if not contacts:
+        return None
+    if flip:
+        nx, ny = -nx, -ny
+    return (nx, ny), contacts
+
+
+def _circleContacts(circle, pts):
+    """
+    Return the normal (from the polygon to the circle) and contact point of
+    a circle and a convex polygon, or None.
+    """
+    cx, cy, r = circle
+    normals = _normals(pts)
+    s, face = _maxSeparation(pts, normals, [(cx, cy)])
+    if s > r:
+        return None
+    if s <= 0:
+        # center inside of the polygon: push out through the nearest face
+        nx, ny = normals[face]
+        return (nx, ny), [(cx - nx * r, cy - ny * r, r - s, (face, 0, False))]
+    best = None
+    for i in range(len(pts)):
+        (px, py), (qx, qy) = pts[i], pts[(i + 1) % len(pts)]
+        ex, ey = qx - px, qy - py
+        t = max(0, min(1, ((cx - px) * ex + (cy - py) * ey) / ((ex * ex + ey * ey) or 1)))
+        x, y = px + t * ex, py + t * ey
+        d = hypot(cx - x, cy - y)
+        if best is None or d < best[0]:
+            best = (d, x, y, i)
+    d, x, y, i = best
+    if d > r or d == 0:
+        return None
+    return ((cx - x) / d, (cy - y) / d), [(x, y, r - d, (i, 1, False))]
+
+
+def _contacts(a, b):
+    """
+    Return the normal (from `a` to `b`) and a list of (x, y, depth, id)
+    contact points of two shapes, each an (x, y, radius) circle or a list
+    of vertices, or None if they do not touch.
+    """
+    if type(a) is tuple and type(b) is tuple:
+        dx, dy = b[0] - a[0], b[1] - a[1]
+        d = hypot(dx, dy)
+        if d > a[2] + b[2]:
+            return None
+        nx, ny = (dx / d, dy / d) if d else (0.0, 1.0)
+        return (nx, ny), [(a[0] + nx * a[2], a[1] + ny * a[2], a[2] + b[2] - d, 0)]
+    if type(a) is tuple:
+        result = _circleContacts(a, b)
+        if result is None:
+            return None
+        (nx, ny), contacts = result
+        return (-nx, -ny), contacts
+    if type(b) is tuple:
+        return _circleContacts(b, a)
+    return _polygonContacts(a, b)
+
+
+class Body(object):
+    """
+    The physical state of one sprite in a `ggphysics.PhysicsWorld`. Bodies
+    are created by `ggphysics.PhysicsWorld.add`.
+    """
+
+    _count = 0
+
+    def __init__(self, sprite, mass, restitution, friction, static):
+        Body._count += 1
+        self.id = Body._count
+        self.sprite = sprite
+        """The `ggame.Sprite` moved by this body."""
+        self.restitution = restitution
+        """How much the body bounces: 0 for not at all, 1 for fully."""
+        self.friction = friction
+        """The friction coefficient of the body surface."""
+        self.static = static
+        """True for a body that never moves, such as the ground."""
+        self.vx = self.vy = 0.0
+        """The velocity of the body, in pixels per second."""
+        self.omega = 0.0
+        """The angular velocity of the body, in radians per second clockwise."""
+        self.awake = not static
+        """False while the body is asleep (see `ggphysics.PhysicsWorld`)."""
+        self._sleeptime = 0.0
+        # rotate about the middle of the sprite, without moving it
+        sprite._setExtents()
+        cx = (sprite.xmin + sprite.xmax) / 2
+        cy = (sprite.ymin + sprite.ymax) / 2
+        sprite.fxcenter = sprite.fycenter = 0.5
+        sprite.position = (cx, cy)
+        self._written = (cx, cy, sprite.rotation)
+        if static or mass == 0:
+            self.invmass = self.invinertia = 0.0
+            self.mass = 0.0
+        else:
+            self.mass = mass
+            self.invmass = 1 / mass
+            self.invinertia = 1 / self._inertia(mass, cx, cy)
+
+    def _shape(self):
+        shape = self.sprite._shape()
+        return shape if type(shape) is tuple else _polygon(shape)
+
+    def _inertia(self, mass, cx, cy):
+        shape = self._shape()
+        if type(shape) is tuple:
+            return mass * shape[2] ** 2 / 2
+        pts = shape
+        num = den = 0.0
+        for i in range(len(pts)):
+            ax, ay = pts[i - 1][0] - cx, pts[i - 1][1] - cy
+            bx, by = pts[i][0] - cx, pts[i][1] - cy
+            c = abs(_cross(ax, ay, bx, by))
+            num += c * (ax * ax + ax * bx + bx * bx + ay * ay + ay * by + by * by)
+            den += c
+        return max(mass * num / (6 * den), 1e-9) if den else mass
+
+    @property
+    def velocity(self):
+        """The (x,y) velocity of the body, in pixels per second."""
+        return (self.vx, self.vy)
+
+    @velocity.setter
+    def velocity(self, value):
+        self.vx, self.vy = value
+        self.wake()
+
+    def applyImpulse(self, impulse, point=None):
+        """
+        Change the motion of the body as if hit with an (x,y) `impulse` (a
+        mass times a velocity) at the world `point`, or at its center if no
+        point is given.
+        """
+        self.vx += impulse[0] * self.invmass
+        self.vy += impulse[1] * self.invmass
+        if point is not None:
+            self.omega += self.invinertia * _cross(point[0] - self.sprite.x,
+                point[1] - self.sprite.y, impulse[0], impulse[1])
+        self.wake()
+
+    def wake(self):
+        """Wake the body if it is asleep."""
+        if not self.static:
+            self.awake = True
+            self._sleeptime = 0.0
+
+
+class _Contact(object):
+
+    def __init__(self, a, b, nx, ny, x, y, depth, key):
+        self.key = key
+        self.depth = depth
+        self.nx, self.ny = nx, ny
+        sa, sb = a.sprite, b.sprite
+        self.rax, self.ray = x - sa.x, y - sa.y
+        self.rbx, self.rby = x - sb.x, y - sb.y
+        self.pn = self.pt = 0.0
+        rna = _cross(self.rax, self.ray, nx, ny)
+        rnb = _cross(self.rbx, self.rby, nx, ny)
+        k = a.invmass + b.invmass + a.invinertia * rna * rna + b.invinertia * rnb * rnb
+        self.normalmass = 1 / k if k else 0.0
+        rta = _cross(self.rax, self.ray, -ny, nx)
+        rtb = _cross(self.rbx, self.rby, -ny, nx)
+        k = a.invmass + b.invmass + a.invinertia * rta * rta + b.invinertia * rtb * rtb
+        self.tangentmass = 1 / k if k else 0.0
+        self.bounce = 0.0
+
+
+class PhysicsWorld(object):
+    """
+    A set of sprites that move as rigid bodies under gravity and push each
+    other when they touch. Sprites added to the world should not also be
+    moved by assigning to their position, except to place them. A sprite
+    that is destroyed leaves the world at its next step.
+    """
+
+    slop = 0.5
+    """Overlap, in pixels, that is allowed without correction, to avoid jitter."""
+    sleepvelocity = 5.0
+    """Bodies slower than this, in pixels per second, may fall asleep."""
+    sleeptime = 0.5
+    """Seconds that a group of slow bodies must stay slow before they sleep."""
+
+    def __init__(self, gravity=(0, 0), substep=1/60, iterations=10):
+        """
+        Create an empty world with a `gravity` acceleration, an (x,y) tuple
+        in pixels per second squared. The simulation advances in steps of
+        `substep` seconds, with `iterations` passes of the contact solver
+        in each step.
+        """
+        self.gravity = gravity
+        """The (x,y) acceleration of gravity, in pixels per second squared."""
+        self.substep = substep
+        """The fixed simulation time step, in seconds."""
+        self.iterations = iterations
+        """The number of passes of the contact solver in each time step."""
+        self.bodies = {}
+        """A dictionary of the `ggphysics.Body` of each sprite in the world."""
+        self._contacts = {}
+        self._accumulated = 0.0
+        self._last = None
+
+    def add(self, sprite, mass=1.0, restitution=0.2, friction=0.5, static=False):
+        """
+        Add `sprite` to the world as a body with the given `mass`,
+        `restitution` (bounce) and `friction`, and return its
+        `ggphysics.Body`. A `static` body, or one with no mass, never moves.
+        The sprite is set to rotate about its middle.
+        """
+        body = self.bodies[sprite] = Body(sprite, mass, restitution, friction, static)
+        return body
+
+    def remove(self, sprite):
+        """
+        Remove `sprite` from the world. The sprite itself is not destroyed.
+        """
+        body = self.bodies.pop(sprite)
+        self._contacts = dict((k, v) for k, v in self._contacts.items()
+            if body not in v[:2])
+
+    def step(self, dt=None):
+        """
+        Advance the world by `dt` seconds (by default, the time since the
+        last step), in as many fixed substeps as fit. Call this from your
+        application `step` function.
+        """
+        now = time()
+        if dt is None:
+            dt = 0.0 if self._last is None else now - self._last
+        self._last = now
+        for sprite in [s for s in self.bodies if s._treenode is None]:
+            # destroyed by the program
+            self.remove(sprite)
+        for body in self.bodies.values():
+            # notice sprites that were placed by the program
+            s = body.sprite
+            if not body.static and (s.x, s.y, s.rotation) != body._written:
+                body.wake()
+        # never fall more than a few substeps behind
+        self._accumulated = min(self._accumulated + dt, 4 * self.substep)
+        while self._accumulated >= self.substep:
+            self._accumulated -= self.substep
+            self._substep(self.substep)
+
+    def _pairs(self):
+        """
+        Return the pairs of bodies whose extents overlap, found through the
+        sprite spatial index, with at least one of them awake and able to move.
+        """
+        bodies = self.bodies
+        pairs = {}
+        for body in bodies.values():
+            if not body.awake:
+                continue
+            s = body.sprite
+            s._setExtents()
+            for other in App.spritesInRect(s.xmin, s.ymin, s.xmax, s.ymax):
+                ob = bodies.get(other)
+                if ob is None or ob is body:
+                    continue
+                if not (s.collisionLayer & other.collisionMask
+                    and other.collisionLayer & s.collisionMask):
+                    continue
+                key = (body.id, ob.id) if body.id < ob.id else (ob.id, body.id)
+                if key not in pairs:
+                    pairs[key] = (body, ob) if body.id < ob.id else (ob, body)
+        return pairs
+
+    def _collide(self, h):
+        """
+        Build the contact manifolds for this substep, keeping the impulses of
+        contacts that persist from the previous one.
+        """
+        manifolds = {}
+        for key, (a, b) in self._pairs().items():
+            result = _contacts(a._shape(), b._shape())
+            if result is None:
+                continue
+            (nx, ny), points = result
+            old = self._contacts.get(key)
+            oldcontacts = dict((c.key, c) for c in old[2]) if old else {}
+            contacts = []
+            e = max(a.restitution, b.restitution)
+            for x, y, depth, k in points:
+                c = _Contact(a, b, nx, ny, x, y, depth, k)
+                previous = oldcontacts.get(k)
+                if previous is not None:
+                    c.pn, c.pt = previous.pn, previous.pt
+                vn = self._relative(a, b, c, nx, ny)
+                if vn < -2 * self.sleepvelocity:
+                    c.bounce = -e * vn
+                contacts.append(c)
+            manifolds[key] = (a, b, contacts, sqrt(a.friction * b.friction))
+            # a moving body wakes the sleeping bodies it touches
+            if a.awake and not b.awake and a._sleeptime == 0:
+                b.wake()
+            elif b.awake and not a.awake and b._sleeptime == 0:
+                a.wake()
+        self._contacts = manifolds
+
+    def _relative(self, a, b, c, nx, ny):
+        dvx = b.vx - b.omega * c.rby - a.vx + a.omega * c.ray
+        dvy = b.vy + b.omega * c.rbx - a.vy - a.omega * c.rax
+        return dvx * nx + dvy * ny
+
+    def _apply(self, a, b, c, px, py):
+        a.vx -= px * a.invmass
+        a.vy -= py * a.invmass
+        a.omega -= a.invinertia * _cross(c.rax, c.ray, px, py)
+        b.vx += px * b.invmass
+        b.vy += py * b.invmass
+        b.omega += b.invinertia * _cross(c.rbx, c.rby, px, py)
+
+    def _substep(self, h):
+        gx, gy = self.gravity
+        bodies = [b for b in self.bodies.values() if b.awake]
+        for body in bodies:
+            body.vx += gx * h
+            body.vy += gy * h
+        self._collide(h)
+        manifolds = list(self._contacts.values())
+        for a, b, contacts, mu in manifolds:
+            for c in contacts:
+                self._apply(a, b, c, c.pn * c.nx - c.pt * c.ny, c.pn * c.ny + c.pt * c.nx)
+        for i in range(self.iterations):
+            for a, b, contacts, mu in manifolds:
+                for c in contacts:
+                    nx, ny = c.nx, c.ny
+                    # friction, limited by the normal impulse
+                    dvx = b.vx - b.omega * c.rby - a.vx + a.omega * c.ray
+                    dvy = b.vy + b.omega * c.rbx - a.vy - a.omega * c.rax
+                    vt = -dvx * ny + dvy * nx
+                    pt = max(-mu * c.pn, min(mu * c.pn, c.pt - vt * c.tangentmass))
+                    d, c.pt = pt - c.pt, pt
+                    self._apply(a, b, c, -d * ny, d * nx)
+                    # normal impulse, pushing apart overlapping bodies
+                    vn = self._relative(a, b, c, nx, ny)
+                    target = max(0.2 / h * max(0.0, c.depth - self.slop), c.bounce)
+                    pn = max(0.0, c.pn + (target - vn) * c.normalmass)
+                    d, c.pn = pn - c.pn, pn
+                    self._apply(a, b, c, d * nx, d * ny)
+        for body in bodies:
+            if not body.awake:
+                continue
+            s = body.sprite
+            s.position = (s.x + body.vx * h, s.y + body.vy * h)
+            if body.omega:
+                s.rotation = s.rotation - body.omega * h
+            body._written = (s.x, s.y, s.rotation)
+            slow = (body.vx * body.vx + body.vy * body.vy < self.sleepvelocity ** 2
+                and abs(body.omega) < 0.05)
+            body._sleeptime = body._sleeptime + h if slow else 0.0
+        self._sleep(manifolds)
+
+    def _sleep(self, manifolds):
+        """
+        Put to sleep every group of touching bodies (an island) that has
+        been slow for long enough. Static bodies do not join islands.
+        """
+        parent = {}
+        def find(body):
+            while parent.setdefault(body, body) is not body:
+                body = parent[body] = parent[parent[body]]
+            return body
+        for a, b, contacts, mu in manifolds:
+            if not a.static and not b.static:
+                parent[find(a)] = find(b)
+        islands = {}
+        for body in self.bodies.values():
+            if body.awake:
+                islands.setdefault(find(body), []).append(body)
+        for island in islands.values():
+            if min(b._sleeptime for b in island) >= self.sleeptime:
+                for b in island:
+                    b.awake = False
+                    b.vx = b.vy = b.omega = 0.0
+
@@ -0,0 +1,170 @@
+"""
+# ggsteer
+## A ggame extension for flocking many sprites at once
+
+A `ggsteer.Flock` moves a group of sprites with the classic "boids"
+behaviours: each member steers away from neighbours that are too close
+(separation), toward the average heading of its neighbours (alignment)
+and toward their average position (cohesion). The positions and velocities
+of all members are kept in NumPy arrays, neighbours are found through a
+grid of cells, and every force is computed for the whole flock at once:
+
+    birds = Flock([Sprite(bird, (random()*500, random()*500)) for i in range(300)])
+
+    def step():
+        birds.step()
+
+This module requires [NumPy](http://www.numpy.org), so it is not
+available in the browser.
+"""
+
+import numpy as np
+
+
+class Flock(object):
+    """
+    A group of sprites that move together as a flock. The flock owns the
+    position of its members: move a member with `ggsteer.Flock.place`,
+    rather than by assigning to its position.
+    """
+
+    def __init__(self, sprites=[], radius=50, separation=1.5, alignment=1.0,
+        cohesion=1.0, maxspeed=4.0, maxforce=0.1):
+        """
+        Create a flock from an optional list of `sprites`. Members react to
+        others within `radius` pixels, and keep apart from those within
+        half of that distance. The `separation`, `alignment` and `cohesion`
+        weights set the strength of each behaviour. No member moves faster
+        than `maxspeed` pixels or changes its velocity by more than
+        `maxforce` pixels per step.
+        """
+        self.radius = radius
+        """Members within this distance, in pixels, are neighbours."""
+        self.separation = separation
+        """The weight of the separation behaviour."""
+        self.alignment = alignment
+        """The weight of the alignment behaviour."""
+        self.cohesion = cohesion
+        """The weight of the cohesion behaviour."""
+        self.maxspeed = maxspeed
+        """The greatest speed of any member, in pixels per step."""
+        self.maxforce = maxforce
+        """The greatest change in velocity of any member, per step."""
+        self.sprites = []
+        """The list of member sprites, in the order of the arrays."""
+        self.position = np.zeros((0, 2))
+        """An n by 2 array of the member positions."""
+        self.velocity = np.zeros((0, 2))
+        """An n by 2 array of the member velocities, in pixels per step."""
+        for sprite in sprites:
+            self.add(sprite)
+
+    def add(self, sprite, velocity=(0,0)):
+        """
+        Add `sprite` to the flock, with an optional initial `velocity`.
+        """
+        self.sprites.append(sprite)
+        self.position = np.vstack((self.position, sprite.position))
+        self.velocity = np.vstack((self.velocity, velocity))
+
+    def remove(self, sprite):
+        """
+        Remove `sprite` from the flock. The sprite itself is not destroyed.
+        """
+        i = self.sprites.index(sprite)
+        del self.sprites[i]
+        self.position = np.delete(self.position, i, axis=0)
+        self.velocity = np.delete(self.velocity, i, axis=0)
+
+    def place(self, sprite, pos):
+        """
+        Move a member `sprite` to `pos`, an (x,y) tuple.
+        """
+        self.position[self.sprites.index(sprite)] = pos
+        sprite.position = pos
+
+    def _neighbours(self):
+        """
+        Return arrays (i, j, d) of every pair of distinct members that are
+        within `radius` of each other, with d the offset from j to i. Members
+        are sorted by grid cell, so only those in the nine cells around each
+        member are compared.
+        """
+        pos = self.position
+        n = len(pos)
+        cells = np.floor(pos / self.radius).astype(np.int64)
+        cells -= cells.min(axis=0)
+        width = cells[:,0].max() + 3
+        keys = (cells[:,1] + 1) * width + cells[:,0] + 1
+        order = np.argsort(keys, kind='stable')
+        sortedkeys = keys[order]
+        ilist = []
+        jlist = []
+        for dy in (-1, 0, 1):
+            for dx in (-1, 0, 1):
+                other = keys + dy * width + dx
+                start = np.searchsorted(sortedkeys, other, 'left')
+                count = np.searchsorted(sortedkeys, other, 'right') - start
+                i = np.repeat(np.arange(n), count)
+                # position of each pair within the run of its member
+                first = np.cumsum(count) - count
+                k = np.arange(len(i)) - np.repeat(first, count)
+                ilist.append(i)
+                jlist.append(order[np.repeat(start, count) + k])
+        i = np.concatenate(ilist)
+        j = np.concatenate(jlist)
+        d = pos[i] - pos[j]
+        dist2 = np.einsum('ij,ij->i', d, d)
+        near = (i != j) & (dist2 <= self.radius * self.radius)
+        return i[near], j[near], d[near], dist2[near]
+
+    def _steer(self, desired, mask):
+        """
+        Return the steering force that turns each velocity toward the
+        `desired` direction at full speed, for members where `mask` is True.
+        """
+        length = np.linalg.norm(desired, axis=1, keepdims=True)
+        length[length == 0] = 1
+        force = desired / length * self.maxspeed - self.velocity
+        force[~mask] = 0
+        return force
+
+    def step(self):
+        """
+        Move the flock for one frame: compute the steering forces of all
+        members, update their velocities and positions, and then move the
+        sprites. Call this from your application `step` function.
+        """
+        n = len(self.sprites)
+        if n == 0:
+            return
+        pos = self.position
+        vel = self.velocity
+        i, j, d, dist2 = self._neighbours()
+        count = np.bincount(i, minlength=n)
+        has = count > 0
+        total = np.maximum(count, 1)[:,None]
+        # separation: away from close neighbours, more strongly the closer
+        close = dist2 < self.radius * self.radius / 4
+        w = np.zeros(len(i))
+        w[close] = 1 / np.maximum(dist2[close], 1e-9)
+        away = np.stack((np.bincount(i, d[:,0] * w, n),
+            np.bincount(i, d[:,1] * w, n)), axis=1)
+        force = self.separation * self._steer(away, np.bincount(i, close, n) > 0)
+        # alignment: toward the average neighbour velocity
+        heading = np.stack((np.bincount(i, vel[j,0], n),
+            np.bincount(i, vel[j,1], n)), axis=1) / total
+        force += self.alignment * self._steer(heading, has)
+        # cohesion: toward the average neighbour position
+        centre = np.stack((np.bincount(i, pos[j,0], n),
+            np.bincount(i, pos[j,1], n)), axis=1) / total
+        force += self.cohesion * self._steer(centre - pos, has)
+        magnitude = np.linalg.norm(force, axis=1, keepdims=True)
+        force *= np.minimum(1, self.maxforce / np.maximum(magnitude, 1e-9))
+        vel += force
+        speed = np.linalg.norm(vel, axis=1, keepdims=True)
+        vel *= np.minimum(1, self.maxspeed / np.maximum(speed, 1e-9))
+        pos += vel
+        for sprite, xy in zip(self.sprites, pos.tolist()):
+            sprite.position = xy
+
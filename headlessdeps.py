@@ -9,6 +9,7 @@ def module_exists(module_name):
 if module_exists('PIL'):
   
   from PIL import Image
+  import math
 
   class _body(object):
     
@@ -49,6 +50,12 @@ if module_exists('PIL'):
 
     def __init__(self):
       self.things = []
+      self.position = vector(0,0)
+      self.pivot = vector(0,0)
+      self.scale = vector(1.0, 1.0)
+      self.rotation = 0.0
+      self.visible = True
+      self.renderable = True
 
     def destroy(self):
       del self.things
@@ -56,6 +63,9 @@ if module_exists('PIL'):
     def addChild(self, obj):
       self.things.append(obj)
 
+    def addChildAt(self, obj, index):
+      self.things.insert(index, obj)
+
     def removeChild(self, obj):
       self.things.remove(obj)
 
@@ -76,10 +86,21 @@ if module_exists('PIL'):
       self.y = y
       self.argsdict = argsdict
       self.view = renderView()
+      self.rendered = []
       print("Rendering created with {}x{} area".format(x, y))
 
     def render(self, stage):
-      pass
+      # skip hidden and culled objects, as a real renderer would
+      self.rendered = []
+      self._collect(stage)
+
+    def _collect(self, container):
+      for obj in container.things:
+        if obj.visible and obj.renderable:
+          if isinstance(obj, _Container):
+            self._collect(obj)
+          else:
+            self.rendered.append(obj)
 
   class _GFX(object):
     
@@ -91,6 +112,8 @@ if module_exists('PIL'):
 
   GFX = _GFX()
 
+  GFX_NewStage = _Container
+
   #document = object()
   
   def JSConstructor(cls):
@@ -144,6 +167,48 @@ if module_exists('PIL'):
       print("Texture from base texture {}, {}x{} subframe {}x{}".format(inst.name, inst.basewidth, inst.baseheight, inst.framerect.width, inst.framerect.height))
       return inst
 
+    @classmethod
+    def placeholder(cls, width, height):
+      # a blank texture, filled in by assign once its image has loaded
+      inst = cls()
+      inst.basewidth = inst.width = width
+      inst.baseheight = inst.height = height
+      inst.baserect = _GFX_Rectangle(0, 0, width, height)
+      inst.framerect = inst.baserect
+      return inst
+
+    @classmethod
+    def decode(cls, img):
+      # may run on a worker thread: PIL releases the GIL while decoding
+      inst = cls(img)
+      inst.img.load()
+      return inst
+
+    @classmethod
+    def fromPixels(cls, name, width, height, pixels):
+      # the image shares the RGBA pixels buffer (a memory map, for example)
+      inst = cls()
+      inst.name = name
+      inst.img = Image.frombuffer('RGBA', (width, height), pixels, 'raw', 'RGBA', 0, 1)
+      inst.basewidth = inst.width = width
+      inst.baseheight = inst.height = height
+      inst.baserect = _GFX_Rectangle(0, 0, width, height)
+      inst.framerect = inst.baserect
+      return inst
+
+    def pixels(self):
+      return self.img.convert('RGBA').tobytes()
+
+    def assign(self, texture):
+      self.name = texture.name
+      self.img = texture.img
+      self.basewidth = texture.basewidth
+      self.baseheight = texture.baseheight
+      self.baserect = texture.baserect
+      self.framerect = texture.framerect
+      self.width = texture.width
+      self.height = texture.height
+
     def destroy(self):
       try:
         self.img.close()
@@ -155,6 +220,27 @@ if module_exists('PIL'):
   
   GFX_Texture_fromImage = _Texture  
 
+  GFX_Texture_placeholder = _Texture.placeholder
+
+  GFX_Texture_decode = _Texture.decode
+
+  GFX_Texture_fromPixels = _Texture.fromPixels
+
+  def GFX_AlphaMask(texture, rotation, scale, threshold=128):
+    # rows of opaque pixels packed into integers, leftmost pixel most significant
+    if texture.img is None:
+      return None
+    f = texture.framerect
+    img = texture.img.crop((f.x, f.y, f.x + f.width, f.y + f.height)).convert('RGBA')
+    if scale != 1.0:
+      w, h = img.size
+      img = img.resize((max(1, round(w * scale)), max(1, round(h * scale))))
+    if rotation:
+      img = img.rotate(math.degrees(rotation), expand=True)
+    bits = img.split()[-1].tobytes().translate(bytes(48 if v < threshold else 49 for v in range(256)))
+    w = img.size[0]
+    return ([int(bits[i:i+w], 2) for i in range(0, len(bits), w)], w)
+
 
   class vector(object):
   
@@ -183,6 +269,7 @@ if module_exists('PIL'):
     def __init__(self, texture):
       self.texture = texture
       self.visible = True
+      self.renderable = True
       self.pos = vector(0,0)
       self.anch = vector(0,0)
       self.scal = vector(1.0, 1.0)
@@ -220,6 +307,20 @@ if module_exists('PIL'):
     def destroy(self):
       pass
 
+  class GFX_Batch(object):
+    # many small squares of colour, such as particles, drawn together.
+    # items is a list of (colour index, x, y) with x, y at the square center
+
+    def __init__(self, size, colours):
+      self.size = size
+      self.colours = colours
+      self.items = []
+      self.visible = True
+      self.renderable = True
+
+    def destroy(self):
+      self.items = []
+
   class _GFX_Graphics(object):
 
     def __init__(self):
@@ -228,6 +329,7 @@ if module_exists('PIL'):
     def clear(self):
       self.cleared = True
       self.visible = True
+      self.renderable = True
       self.lwidth = None
       self.color = None
       self.alpha = None
@@ -357,6 +459,7 @@ if module_exists('PIL'):
       self.styledict = styledict
       self.alpha = None
       self.visible = None
+      self.renderable = True
       self.width = 99
       self.height = 99
       self.position = vector(0,0)
@@ -431,9 +534,22 @@ if module_exists('PIL'):
       
     def remove(self, obj):
       self._stage.removeChild(obj)
+
+    def setView(self, x, y, zoom, rotation):
+      cx = self.width / 2
+      cy = self.height / 2
+      self._stage.position.x = cx
+      self._stage.position.y = cy
+      self._stage.pivot.x = x + cx
+      self._stage.pivot.y = y + cy
+      self._stage.scale.x = self._stage.scale.y = zoom
+      self._stage.rotation = -rotation
       
-    def animate(self, stepcallback):
+    def render(self):
       self._renderer.render(self._stage)
+
+    def animate(self, stepcallback):
+      self.render()
       self._w.requestAnimationFrame(stepcallback)
       
     def destroy(self):
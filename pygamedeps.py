@@ -10,6 +10,7 @@ def module_exists(module_name):
 if module_exists('pygame'):
 
   import pygame
+  import math
   
   class _body(object):
     
@@ -46,10 +47,51 @@ if module_exists('pygame'):
   class _Container(object):
 
     def __init__(self):
-      pass
+      self.things = []
+      self.position = vector(0,0)
+      self.pivot = vector(0,0)
+      self.scale = vector(1.0, 1.0)
+      self.rotation = 0.0
+      self.visible = True
+      self.renderable = True
+      self._cacheAsBitmap = False
+      self._cache = None
+
+    @property
+    def cacheAsBitmap(self):
+      # when set, children are composited once into an offscreen surface
+      return self._cacheAsBitmap
+
+    @cacheAsBitmap.setter
+    def cacheAsBitmap(self, value):
+      self._cacheAsBitmap = value
+      self._cache = None
 
     def destroy(self):
-      pass
+      self.things = []
+      self._cache = None
+
+    def addChild(self, obj):
+      self.things.append(obj)
+      self._cache = None
+
+    def addChildAt(self, obj, index):
+      self.things.insert(index, obj)
+      self._cache = None
+
+    def removeChild(self, obj):
+      self.things.remove(obj)
+      self._cache = None
+
+    def matrix(self):
+      # affine matrix from container to parent coordinates
+      c = math.cos(self.rotation)
+      s = math.sin(self.rotation)
+      a, b = c * self.scale.x, s * self.scale.x
+      c, d = -s * self.scale.y, c * self.scale.y
+      return (a, b, c, d, 
+        self.position.x - a*self.pivot.x - c*self.pivot.y,
+        self.position.y - b*self.pivot.x - d*self.pivot.y)
 
   class _Renderer(object):
     
@@ -73,6 +115,8 @@ if module_exists('pygame'):
 
   GFX = _GFX()
 
+  GFX_NewStage = _Container
+
   #document = object()
   
   def JSConstructor(cls):
@@ -115,6 +159,47 @@ if module_exists('pygame'):
       print("Texture from base texture {}, {}x{} subframe {}x{}".format(inst.name, inst.basewidth, inst.baseheight, inst.framerect.width, inst.framerect.height))
       return inst
 
+    @classmethod
+    def placeholder(cls, width, height):
+      # a blank texture, filled in by assign once its image has loaded
+      inst = cls()
+      inst.img = pygame.Surface((max(width, 1), max(height, 1)), pygame.SRCALPHA)
+      inst.basewidth = inst.width = width
+      inst.baseheight = inst.height = height
+      inst.baserect = _GFX_Rectangle(0, 0, width, height)
+      inst.framerect = inst.baserect
+      return inst
+
+    @classmethod
+    def decode(cls, img):
+      # may run on a worker thread: pygame releases the GIL while decoding
+      return cls(img)
+
+    @classmethod
+    def fromPixels(cls, name, width, height, pixels):
+      # the surface shares the RGBA pixels buffer (a memory map, for example)
+      inst = cls()
+      inst.name = name
+      inst.img = pygame.image.frombuffer(pixels, (width, height), 'RGBA')
+      inst.basewidth = inst.width = width
+      inst.baseheight = inst.height = height
+      inst.baserect = _GFX_Rectangle(0, 0, width, height)
+      inst.framerect = inst.baserect
+      return inst
+
+    def pixels(self):
+      return pygame.image.tostring(self.img, 'RGBA')
+
+    def assign(self, texture):
+      self.name = texture.name
+      self.img = texture.img
+      self.basewidth = texture.basewidth
+      self.baseheight = texture.baseheight
+      self.baserect = texture.baserect
+      self.framerect = texture.framerect
+      self.width = texture.width
+      self.height = texture.height
+
     def destroy(self):
       try:
         self.img.close()
@@ -126,6 +211,24 @@ if module_exists('pygame'):
   
   GFX_Texture_fromImage = _Texture  
 
+  GFX_Texture_placeholder = _Texture.placeholder
+
+  GFX_Texture_decode = _Texture.decode
+
+  GFX_Texture_fromPixels = _Texture.fromPixels
+
+  def GFX_AlphaMask(texture, rotation, scale, threshold=128):
+    # rows of opaque pixels packed into integers, leftmost pixel most significant
+    img = getattr(texture, 'img', None)
+    if img is None:
+      return None
+    if rotation or scale != 1.0:
+      img = pygame.transform.rotozoom(img, math.degrees(rotation), scale)
+    mask = pygame.mask.from_surface(img, threshold)
+    w, h = mask.get_size()
+    bits = pygame.image.tostring(mask.to_surface(), 'RGB')[::3].translate(bytes(48 if v == 0 else 49 for v in range(256)))
+    return ([int(bits[i:i+w], 2) for i in range(0, len(bits), w)], w)
+
 
   class vector(object):
   
@@ -155,12 +258,15 @@ if module_exists('pygame'):
       self.basetexture = texture
       self.texture = self.basetexture
       self.visible = True
+      self.renderable = True
       self.pos = vector(0,0)
       self.anch = vector(0,0)
       self.scal = vector(1.0, 1.0)
       self.width = texture.width
       self.height = texture.height
       self.rotation = 0.0
+      self.affine = None
+      self._xformcache = None
 
     @property
     def position(self):
@@ -192,6 +298,33 @@ if module_exists('pygame'):
     def destroy(self):
       pass
 
+  class GFX_Batch(object):
+    # many small squares of colour, such as particles, drawn together.
+    # items is a list of (colour index, x, y) with x, y at the square center
+
+    def __init__(self, size, colours):
+      self.size = size
+      self.colours = colours
+      self.items = []
+      self.visible = True
+      self.renderable = True
+      self.surfaces = []
+      for color, alpha in colours:
+        surface = pygame.Surface((size, size), pygame.SRCALPHA)
+        surface.fill(((color >> 16) & 255, (color >> 8) & 255, color & 255, int(alpha * 255)))
+        self.surfaces.append(surface)
+      self._scaled = (1.0, self.surfaces)
+
+    def scaled(self, zoom):
+      # the squares at another zoom, kept until the zoom changes
+      if self._scaled[0] != zoom:
+        size = max(1, round(self.size * zoom))
+        self._scaled = (zoom, [pygame.transform.scale(s, (size, size)) for s in self.surfaces])
+      return self._scaled[1]
+
+    def destroy(self):
+      self.items = []
+
   class _GFX_Graphics(object):
 
     def __init__(self):
@@ -200,6 +333,7 @@ if module_exists('pygame'):
     def clear(self):
       self.cleared = True
       self.visible = True
+      self.renderable = True
       self.lwidth = None
       self.color = None
       self.alpha = None
@@ -326,6 +460,7 @@ if module_exists('pygame'):
       self.styledict = styledict
       self.alpha = None
       self.visible = None
+      self.renderable = True
       self.width = 99
       self.height = 99
       self.position = vector(0,0)
@@ -454,11 +589,32 @@ if module_exists('pygame'):
         self.clientX = pevent.pos[0]
         self.clientY = pevent.pos[1]
 
+  def _xformSurface(gfx, a, b, c, d):
+    """
+    Return the texture image of `gfx` transformed by the linear part of an
+    affine matrix, together with the offset of its bounding box from the
+    transformed origin. The result is cached until the matrix changes.
+    """
+    # keyed by image, which changes when a placeholder texture is filled in
+    key = (gfx.texture.img, a, b, c, d)
+    cache = gfx._xformcache
+    if cache is None or cache[0] != key:
+      img = gfx.texture.img
+      w, h = img.get_size()
+      surface = pygame.transform.rotozoom(img, math.degrees(math.atan2(-b, a)), math.hypot(a, b))
+      xs = (0, a*w, c*h, a*w + c*h)
+      ys = (0, b*w, d*h, b*w + d*h)
+      cache = gfx._xformcache = (key, surface, min(xs), min(ys))
+    return cache[1:]
+
   class GFX_Window(object):
     
     def __init__(self, width, height, onclose):
       pygame.init()
       self._w = pygame.display.set_mode((width, height))
+      self.width = width
+      self.height = height
+      self.view = (1.0, 0.0, 0.0, 1.0, 0.0, 0.0)
       self.clock = pygame.time.Clock()
       self.sprites = []
       self.animatestarted = False
@@ -474,6 +630,9 @@ if module_exists('pygame'):
     def bind(self, evtspec, callback):
       self.bindings[evtspec] = callback
 
+    def unbind(self, evtspec):
+      self.bindings.pop(evtspec, None)
+
     def add(self, obj):
       self.sprites.append(obj)
       #self._stage.addChild(obj)
@@ -481,12 +640,96 @@ if module_exists('pygame'):
     def remove(self, obj):
       self.sprites.remove(obj)
       #self._stage.removeChild(obj)
+
+    def setView(self, x, y, zoom, rotation):
+      # affine matrix mapping world to window: zoom and rotate about the center
+      cx = self.width / 2
+      cy = self.height / 2
+      c = math.cos(rotation) * zoom
+      s = math.sin(rotation) * zoom
+      self.view = (c, -s, s, c, 
+        cx - c*(x + cx) - s*(y + cy), 
+        cy + s*(x + cx) - c*(y + cy))
       
-    def animate(self, stepcallback):
-      # do stuff required to display
+    def _blits(self, things, matrix):
+      """
+      Generate (surface, x, y) for each visible sprite in `things`, with
+      containers expanded, placed by the world to window `matrix`.
+      """
+      a, b, c, d, tx, ty = matrix
+      for s in things:
+        if s.visible and s.renderable:
+          if isinstance(s, GFX_Batch):
+            surfaces = s.scaled(math.hypot(a, b))
+            half = surfaces[0].get_width() / 2 if surfaces else 0
+            for i, px, py in s.items:
+              yield (surfaces[i], a*px + c*py + tx - half, b*px + d*py + ty - half)
+            continue
+          if isinstance(s, _Container):
+            m = s.matrix()
+            m = (a*m[0] + c*m[1], b*m[0] + d*m[1],
+              a*m[2] + c*m[3], b*m[2] + d*m[3],
+              a*m[4] + c*m[5] + tx, b*m[4] + d*m[5] + ty)
+            if s.cacheAsBitmap:
+              cached = self._cachedLayer(s, m)
+              if cached:
+                yield cached
+                continue
+            for blit in self._blits(s.things, m):
+              yield blit
+            continue
+          # sprite rotation, scale and anchor come from the cached ggame matrix
+          sa, sb, sc, sd, ox, oy = s.affine or (1.0, 0.0, 0.0, 1.0, 0.0, 0.0)
+          px = s.pos.x + ox
+          py = s.pos.y + oy
+          x = a*px + c*py + tx
+          y = b*px + d*py + ty
+          la, lb = a*sa + c*sb, b*sa + d*sb
+          lc, ld = a*sc + c*sd, b*sc + d*sd
+          if la == 1.0 and lb == 0.0 and lc == 0.0 and ld == 1.0:
+            yield (s.texture.img, x, y)
+          else:
+            img, dx, dy = _xformSurface(s, la, lb, lc, ld)
+            yield (img, x + dx, y + dy)
+
+    def _cachedLayer(self, container, matrix):
+      """
+      Return (surface, x, y) of the contents of `container`, composited once
+      and reused until the container changes. Scrolling only moves the
+      surface; a change of zoom or rotation composites it again. Returns None
+      if the contents are too large to cache.
+      """
+      a, b, c, d, tx, ty = matrix
+      key = (a, b, c, d)
+      cache = container._cache
+      if cache is None or cache[0] != key:
+        blits = list(self._blits(container.things, matrix))
+        if not blits:
+          container._cache = (key, None, tx, ty, 0, 0)
+          return None
+        xmin = min(x for img, x, y in blits)
+        ymin = min(y for img, x, y in blits)
+        w = int(math.ceil(max(x + img.get_width() for img, x, y in blits) - xmin))
+        h = int(math.ceil(max(y + img.get_height() for img, x, y in blits) - ymin))
+        if w * h > 16 * self.width * self.height:
+          container._cache = (key, None, tx, ty, 0, 0)
+          return None
+        surface = pygame.Surface((max(w, 1), max(h, 1)), pygame.SRCALPHA)
+        for img, x, y in blits:
+          surface.blit(img, (x - xmin, y - ymin))
+        cache = container._cache = (key, surface, tx, ty, xmin, ymin)
+      surface = cache[1]
+      if surface is None:
+        return None
+      return (surface, cache[4] + tx - cache[2], cache[5] + ty - cache[3])
+
+    def _draw(self, things, matrix):
+      self._w.blits(((img, (x, y)) for img, x, y in self._blits(things, matrix)), False)
+      
+    def render(self):
+      # draw one frame and dispatch the events that arrived since the last
       self._w.fill(pygame.Color('white'))
-      for s in self.sprites:
-        self._w.blit(s.texture.img, (s.pos.x, s.pos.y))
+      self._draw(self.sprites, self.view)
       pygame.display.flip()
       events = pygame.event.get()
       for event in events:
@@ -498,6 +741,9 @@ if module_exists('pygame'):
           self.onclose()
           self.destroy()
           self.stop = True
+
+    def animate(self, stepcallback):
+      self.render()
       if not self.animatestarted:
         self.animatestarted = True
         while not self.stop:
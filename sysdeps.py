@@ -35,6 +35,12 @@ if module_exists('browser') and module_exists('javascript'):
         SND = JSObject(window.buzz)
         SND_Sound = JSConstructor(SND.sound)
     GFX_DetectRenderer = GFX.autoDetectRenderer 
+    # Pixi already loads images in the background: there is nothing to decode
+    GFX_Texture_decode = None
+
+    def GFX_AlphaMask(texture, rotation, scale, threshold=128):
+        # texture pixels are not readable here: use the edge definition instead
+        return None
   
     class GFX_Window(object):
         
@@ -71,9 +77,22 @@ if module_exists('browser') and module_exists('javascript'):
           
         def remove(self, obj):
             self._stage.removeChild(obj)
+
+        def setView(self, x, y, zoom, rotation):
+            cx = self.width / 2
+            cy = self.height / 2
+            self._stage.position.x = cx
+            self._stage.position.y = cy
+            self._stage.pivot.x = x + cx
+            self._stage.pivot.y = y + cy
+            self._stage.scale.x = self._stage.scale.y = zoom
+            self._stage.rotation = -rotation
           
-        def animate(self, stepcallback):
+        def render(self):
             self._renderer.render(self._stage)
+
+        def animate(self, stepcallback):
+            self.render()
             self._w.requestAnimationFrame(stepcallback)
           
         def destroy(self):
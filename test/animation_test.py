@@ -0,0 +1,65 @@
+import unittest
+from ggame import ImageAsset, Frame, App, Sprite, Animation
+
+class TestAnimationMethods(unittest.TestCase):
+
+  def __init__(self, arg):
+    super().__init__(arg)
+    self.multiimage = ImageAsset("bunny.png", Frame(2,2,10,14), 3, 'horizontal', 2)
+    self.completed = 0
+
+  def oncomplete(self, anim):
+    self.completed += 1
+
+  def test_loop(self):
+    s = Sprite(self.multiimage)
+    a = s.animate(fps=10, oncomplete=self.oncomplete)
+    self.assertTrue(a.playing)
+    App._stepAnimations(100.0)
+    self.assertEqual(s.index, 0)
+    App._stepAnimations(100.15)
+    self.assertEqual(s.index, 1)
+    self.assertIs(s.GFX.texture, self.multiimage.GFXlist[1])
+    App._stepAnimations(100.25)
+    self.assertEqual(s.index, 2)
+    App._stepAnimations(100.35)
+    self.assertEqual(s.index, 0)
+    self.assertEqual(self.completed, 1)
+    a.stop()
+    self.assertFalse(a.playing)
+    App._stepAnimations(100.45)
+    self.assertEqual(s.index, 0)
+    s.destroy()
+
+  def test_pingpong(self):
+    s = Sprite(self.multiimage)
+    s.animate(fps=1, mode=Animation.pingpong)
+    indexes = []
+    for t in range(6):
+      App._stepAnimations(t)
+      indexes.append(s.index)
+    self.assertEqual(indexes, [0, 1, 2, 1, 0, 1])
+    s.destroy()
+
+  def test_once(self):
+    s = Sprite(self.multiimage)
+    a = s.animate([2, 1], fps=1, mode=Animation.once, oncomplete=self.oncomplete)
+    self.assertEqual(s.index, 2)
+    App._stepAnimations(0)
+    App._stepAnimations(1)
+    self.assertEqual(s.index, 1)
+    App._stepAnimations(2)
+    self.assertEqual(s.index, 1)
+    self.assertEqual(self.completed, 1)
+    self.assertFalse(a.playing)
+    s.destroy()
+
+  def test_destroy(self):
+    s = Sprite(self.multiimage)
+    s.animate()
+    s.destroy()
+    self.assertEqual(len(App._animationdict), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
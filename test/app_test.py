@@ -1,5 +1,5 @@
 import unittest
-from ggame import App, KeyEvent, MouseEvent
+from ggame import App, KeyEvent, MouseEvent, Sprite, RectangleAsset
 
 
 
@@ -44,6 +44,161 @@ class TestAppMethods(unittest.TestCase):
     # and destroy it
     a3._destroy()
 
+  def test_culling(self):
+    a = App(100,100)
+    rect = RectangleAsset(10, 10)
+    inside = Sprite(rect, (20,20))
+    edge = Sprite(rect, (95,-5))
+    outside = Sprite(rect, (200,20))
+    hidden = Sprite(rect, (50,50))
+    hidden.visible = False
+    a.run()
+    self.assertEqual(App.drawncount, 2)
+    self.assertEqual(App.culledcount, 2)
+    rendered = App._win._renderer.rendered
+    self.assertIn(inside.GFX, rendered)
+    self.assertIn(edge.GFX, rendered)
+    self.assertNotIn(outside.GFX, rendered)
+    self.assertNotIn(hidden.GFX, rendered)
+    outside.x = 50
+    App._cull()
+    self.assertEqual(App.drawncount, 3)
+    a._destroy()
+
+  def test_oncollision(self):
+    a = App(100,100)
+    rect = RectangleAsset(10, 10)
+    player = Sprite(rect, (0,0))
+    player.collisionLayer = 1
+    enemy1 = Sprite(rect, (5,5))
+    enemy1.collisionLayer = 2
+    enemy2 = Sprite(rect, (8,8))
+    enemy2.collisionLayer = 2
+    calls = []
+    App.onCollision(1, 2, lambda s1, s2: calls.append(('hit', s1, s2)))
+    App.onCollision(2, 2, lambda s1, s2: calls.append(('bump', s1, s2)))
+    App._dispatchCollisions()
+    hits = [c for c in calls if c[0] == 'hit']
+    bumps = [c for c in calls if c[0] == 'bump']
+    self.assertEqual(len(hits), 2)
+    self.assertTrue(all(c[1] is player for c in hits))
+    self.assertEqual(len(bumps), 1)
+    self.assertEqual(set(bumps[0][1:]), set([enemy1, enemy2]))
+    # the spatial index is queried once per sprite, not once per handler
+    queries = []
+    candidates = Sprite._collisionCandidates
+    Sprite._collisionCandidates = lambda s: queries.append(s) or candidates(s)
+    try:
+      App._dispatchCollisions()
+    finally:
+      Sprite._collisionCandidates = candidates
+    self.assertEqual(len(queries), 3)
+    del calls[:]
+    App.onCollision(1, 2, lambda s1, s2: s2.destroy())
+    App._dispatchCollisions()
+    self.assertEqual(len([c for c in calls if c[0] == 'hit']), 2)
+    self.assertEqual(App.spritelist, [player])
+    a._destroy()
+
+  def test_static(self):
+    rect = RectangleAsset(10, 10)
+    wall = Sprite(rect, (0,0))
+    wall.static = True
+    a = App(100,100)
+    player = Sprite(rect, (5,5))
+    wall2 = Sprite(rect, (8,8))
+    wall2.static = True
+    self.assertEqual(App._staticlayer.GFX.things, [wall.GFX, wall2.GFX])
+    self.assertNotIn(wall.GFX, App._layers['default'].GFX.things)
+    self.assertIs(App._root.GFX.things[0], App._staticlayer.GFX)
+    self.assertIs(wall._tree, App._staticspatial)
+    self.assertEqual(set(App.spritesAtPoint(9,9)), set([wall, wall2, player]))
+    self.assertEqual(set(player.collidingWithSprites()), set([wall, wall2]))
+    calls = []
+    App.onCollision(1, 1, lambda s1, s2: calls.append((s1, s2)))
+    App._dispatchCollisions()
+    # static walls overlap, but only collide with the player
+    self.assertEqual(len(calls), 2)
+    self.assertTrue(all(player in pair for pair in calls))
+    App._cull()
+    self.assertEqual(App.drawncount, 3)
+    wall2.static = False
+    self.assertEqual(App._staticlayer.GFX.things, [wall.GFX])
+    self.assertIn(wall2.GFX, App._layers['default'].GFX.things)
+    wall.destroy()
+    self.assertEqual(App._staticlayer.GFX.things, [])
+    self.assertIsNone(App._staticspatial.root)
+    a._destroy()
+
+  def test_culledstatic(self):
+    a = App(100,100)
+    rect = RectangleAsset(10, 10)
+    wall = Sprite(rect, (500,500))
+    hidden = Sprite(rect, (20,20))
+    hidden.static = True
+    hidden.visible = False
+    App._cull()
+    self.assertFalse(wall.GFX.renderable)
+    self.assertEqual(App.drawncount, 0)
+    # culled while off-screen, then made static
+    wall.static = True
+    App.camera.x = 450
+    App.camera.y = 450
+    App._updateView()
+    App._cull()
+    self.assertEqual(App.drawncount, 1)
+    self.assertEqual(App.culledcount, 1)
+    App._win.animate(lambda dummy: None)
+    self.assertEqual(App._win._renderer.rendered, [wall.GFX])
+    a._destroy()
+
+  def test_layers(self):
+    a = App(100,100)
+    rect = RectangleAsset(10, 10)
+    s1, s2, s3 = [Sprite(rect, (10,10)) for i in range(3)]
+    def order():
+      App._win._renderer.render(App._win._stage)
+      gfx = [s1.GFX, s2.GFX, s3.GFX]
+      return [gfx.index(g) for g in App._win._renderer.rendered]
+    self.assertEqual(order(), [0, 1, 2])
+    s1.zIndex = 5
+    self.assertEqual(order(), [1, 2, 0])
+    s3.zIndex = 5
+    self.assertEqual(order(), [1, 0, 2])
+    s1.zIndex = -1
+    self.assertEqual(order(), [0, 1, 2])
+    App.addLayer('hud', 10)
+    s2.layer = 'hud'
+    self.assertEqual(order(), [0, 2, 1])
+    App.addLayer('hud', -5)
+    self.assertEqual(order(), [1, 0, 2])
+    s3.layer = 'sky'
+    self.assertEqual(order(), [1, 0, 2])
+    App.addLayer('sky', -10)
+    self.assertEqual(order(), [2, 1, 0])
+    a._destroy()
+
+  def test_camera(self):
+    a = App(100,100)
+    rect = RectangleAsset(10, 10)
+    s = Sprite(rect, (150,20))
+    a.run()
+    self.assertEqual(App.culledcount, 1)
+    App.camera.x = 100
+    self.assertEqual(App.camera.worldToScreen((150,20)), (50,20))
+    self.assertEqual(App.camera.screenToWorld((50,20)), (150,20))
+    a._animate(None)
+    self.assertEqual(App.drawncount, 1)
+    self.assertEqual(s.x, 150)
+    self.assertEqual(App._win._stage.pivot.x, 150)
+    App.camera.zoom = 2.0
+    App.camera.rotation = 0.5
+    wx, wy = App.camera.screenToWorld(App.camera.worldToScreen((30,40)))
+    self.assertAlmostEqual(wx, 30)
+    self.assertAlmostEqual(wy, 40)
+    self.assertEqual(App.camera.extents[0] > 100, True)
+    a._destroy()
+
   def spacehandler(self, event):
     self.assertEqual(type(event), KeyEvent)
     self.keyevtx += 1
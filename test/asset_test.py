@@ -1,5 +1,6 @@
 import unittest
-from ggame import ImageAsset, Frame, Color, LineStyle, RectangleAsset
+from concurrent.futures import wait
+from ggame import App, Sprite, ImageAsset, Frame, Color, LineStyle, RectangleAsset
 from ggame import CircleAsset, EllipseAsset, PolygonAsset, LineAsset, TextAsset
 
 class TestImageAssetMethods(unittest.TestCase):
@@ -20,6 +21,36 @@ class TestImageAssetMethods(unittest.TestCase):
     self.assertEqual(a.GFXlist[2].framerect.x, 26)
     a.destroy()
 
+  def test_lazyimageasset(self):
+    progress = []
+    a = ImageAsset("bunny.png", lazy=True)
+    b = ImageAsset("bunny.png", Frame(2,2,10,14), 3, 'horizontal', 2, lazy=True)
+    self.assertEqual((a.width, a.height), (0, 0))
+    self.assertEqual((b.width, b.height), (10, 14))
+    self.assertEqual(len(b.GFXlist), 3)
+    s = Sprite(a, (0,0))
+    self.assertEqual(s.width, 0)
+    App.preload([a, b], lambda n, total: progress.append((n, total)))
+    wait([load[0] for load in a._loading + b._loading])
+    self.assertFalse(a.loaded)
+    App._stepLoading()
+    self.assertTrue(a.loaded and b.loaded)
+    self.assertEqual(progress, [(2, 2)])
+    self.assertEqual((a.width, a.height), (71, 100))
+    self.assertEqual(a.GFX.basewidth, 71)
+    self.assertEqual(b.GFXlist[2].framerect.x, 26)
+    self.assertEqual(b.GFXlist[2].height, 14)
+    # sprites made before loading take the size of the image
+    self.assertEqual(s.width, 71)
+    s._setExtents()
+    self.assertEqual(s.xmax, 71)
+    self.assertEqual(App._loadingassets, [])
+    App._stepLoading()
+    self.assertEqual(progress, [(2, 2)])
+    s.destroy()
+    a.destroy()
+    b.destroy()
+
   def test_color(self):
     color = 0x001122
     alpha = 0.5
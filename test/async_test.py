@@ -0,0 +1,55 @@
+import unittest
+import sys
+import asyncio
+from ggame import App, KeyEvent
+
+class keyevent(object):
+  def __init__(self, ktype, code):
+    self.keyCode = code
+    self.type = ktype
+
+class Later(object):
+  # awaitable that calls func after yielding to the event loop; written
+  # without async syntax so that this file loads on every Python version
+  def __init__(self, func, *args):
+    self.func = func
+    self.args = args
+
+  def __await__(self):
+    yield from asyncio.sleep(0).__await__()
+    self.func(*self.args)
+
+@unittest.skipIf(sys.version_info < (3, 5), "ggasync requires Python 3.5")
+class TestAsyncMethods(unittest.TestCase):
+
+  def test_run_async(self):
+    from ggasync import run_async
+    a = App(100,100)
+    frames = []
+    handled = []
+    def frame():
+      frames.append(App._frame)
+      if len(frames) == 2:
+        a._keyEvent(keyevent('keydown', 32))
+      if len(frames) == 5:
+        a._destroy()
+    a.listenKeyEvent(KeyEvent.keydown, "space", 
+      lambda event: Later(handled.append, event.key))
+    loop = asyncio.new_event_loop()
+    try:
+      loop.run_until_complete(asyncio.wait_for(run_async(a, lambda: Later(frame), 200), 1.0))
+    finally:
+      loop.close()
+    self.assertEqual(frames, list(range(frames[0], frames[0] + 5)))
+    self.assertEqual(handled, ['space'])
+
+  def test_sync(self):
+    # a coroutine step needs run_async
+    a = App(100,100)
+    a.userfunc = lambda: Later(print)
+    with self.assertRaises(TypeError):
+      a._animate(None)
+    a._destroy()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,85 @@
+import unittest
+import os
+import shutil
+import tempfile
+from concurrent.futures import wait
+from ggame import App, Sprite, ImageAsset, Frame, GFX_Texture_decode, GFX_AlphaMask
+from ggcache import ImageCache
+
+class TestImageCacheMethods(unittest.TestCase):
+
+  def setUp(self):
+    self.directory = tempfile.mkdtemp()
+    self.image = os.path.join(self.directory, 'image.png')
+    shutil.copy('bunny.png', self.image)
+
+  def tearDown(self):
+    ImageAsset.cache = None
+    shutil.rmtree(self.directory)
+
+  def test_texture(self):
+    cache = ImageCache(os.path.join(self.directory, 'cache'))
+    texture = cache.texture(self.image)
+    self.assertEqual((texture.width, texture.height), (71, 100))
+    decoded = GFX_Texture_decode(self.image)
+    self.assertEqual(texture.pixels(), decoded.pixels())
+    self.assertEqual(len([n for n in os.listdir(cache.directory) if n.endswith('.rgba')]), 1)
+    # another process maps the pixels written by the first
+    other = ImageCache(cache.directory)
+    self.assertEqual(other.texture(self.image).pixels(), decoded.pixels())
+    self.assertIsNone(cache.texture(os.path.join(self.directory, 'missing.png')))
+
+  def test_invalidate(self):
+    cache = ImageCache(os.path.join(self.directory, 'cache'))
+    bunny = GFX_Texture_decode('bunny.png').img
+    # images of one size stored as BMP have files of the same size
+    image = os.path.join(self.directory, 'image.bmp')
+    bunny.crop((0, 0, 20, 30)).save(image)
+    first = cache._hash(image)
+    self.assertEqual(cache.texture(image).width, 20)
+    bunny.crop((0, 0, 30, 20)).save(image)
+    self.assertEqual(cache.texture(image).width, 30)
+    # a changed file with an unchanged modification time and size is only found by hashing
+    stat = os.stat(image)
+    bunny.crop((0, 0, 20, 30)).save(image)
+    os.utime(image, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    self.assertEqual(cache.texture(image).width, 30)
+    cache.verify = 'hash'
+    self.assertEqual(cache.texture(image).width, 20)
+    self.assertEqual(cache._hash(image), first)
+    cache.clear()
+    self.assertEqual(os.listdir(cache.directory), [])
+
+  def test_lazy(self):
+    # lazy assets of one file decode and write the cache on several threads at once
+    ImageAsset.cache = ImageCache(os.path.join(self.directory, 'cache'))
+    big = os.path.join(self.directory, 'big.png')
+    GFX_Texture_decode('bunny.png').img.resize((1000, 1000)).save(big)
+    assets = [ImageAsset(big, lazy=True) for i in range(6)]
+    wait([load[0] for asset in assets for load in asset._loading])
+    App._stepLoading()
+    for asset in assets:
+      self.assertEqual((asset.width, asset.height), (1000, 1000))
+    self.assertEqual(assets[0].GFX.pixels(), GFX_Texture_decode(big).pixels())
+    names = os.listdir(ImageAsset.cache.directory)
+    self.assertEqual(len([n for n in names if n.endswith('.rgba')]), 1)
+    self.assertEqual([n for n in names if n.endswith('.tmp')], [])
+
+  def test_asset(self):
+    ImageAsset.cache = ImageCache(os.path.join(self.directory, 'cache'))
+    a = ImageAsset(self.image, Frame(10, 10, 40, 60))
+    s = Sprite(a, (0,0))
+    s.pixelCollision = True
+    mask = s._alphaMask()
+    self.assertEqual(mask[3], GFX_AlphaMask(a.GFX, 0, 1.0)[0])
+    meta = ImageAsset.cache._readJSON(ImageAsset.cache._hash(self.image) + '.json')
+    self.assertEqual(list(meta['frames']), ['10,10,40,60'])
+    # a new process reads the mask from the cache
+    Sprite._maskcache.clear()
+    other = ImageCache(ImageAsset.cache.directory)
+    other.texture(self.image)
+    self.assertEqual(other.mask(a.GFX), GFX_AlphaMask(a.GFX, 0, 1.0))
+    s.destroy()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,132 @@
+import unittest
+from ggame import App, Sprite, ImageAsset, Tween
+
+class TestCoroutineMethods(unittest.TestCase):
+
+  def __init__(self, arg):
+    super().__init__(arg)
+    self.image = ImageAsset("bunny.png")
+    self.log = []
+
+  def script(self):
+    self.log.append('start')
+    yield
+    self.log.append('frame')
+    yield 3
+    self.log.append('frames')
+    yield 1.5
+    self.log.append('seconds')
+    try:
+      yield lambda: self.log[-1] == 'go'
+      self.log.append('condition')
+      yield 100
+    finally:
+      self.log.append('closed')
+
+  def test_waits(self):
+    c = App.start(self.script())
+    self.assertEqual(self.log, [])
+    App._stepCoroutines(0.0)
+    self.assertEqual(self.log, ['start'])
+    App._stepCoroutines(0.0)
+    self.assertEqual(self.log[-1], 'frame')
+    App._stepCoroutines(0.0)
+    App._stepCoroutines(0.0)
+    self.assertEqual(self.log[-1], 'frame')
+    App._stepCoroutines(1.0)
+    self.assertEqual(self.log[-1], 'frames')
+    App._stepCoroutines(2.0)
+    self.assertEqual(self.log[-1], 'frames')
+    App._stepCoroutines(2.5)
+    self.assertEqual(self.log[-1], 'seconds')
+    App._stepCoroutines(3.0)
+    self.assertEqual(self.log[-1], 'seconds')
+    self.log.append('go')
+    App._stepCoroutines(3.5)
+    self.assertEqual(self.log[-1], 'condition')
+    self.assertTrue(c.playing)
+    c.stop()
+    self.assertEqual(self.log[-1], 'closed')
+    self.assertFalse(c.playing)
+    # the stopped coroutine leaves an entry on the heap, which is skipped
+    for i in range(101):
+      App._stepCoroutines(4.0)
+    self.assertEqual(self.log[-1], 'closed')
+
+  def test_playing(self):
+    s = Sprite(self.image, (0,0))
+    def move():
+      yield s.tween('x', 100, 1.0, Tween.linear)
+      self.log.append(s.x)
+    def wait(other):
+      yield other
+      self.log.append('done')
+    c = App.start(move())
+    App.start(wait(c))
+    App._stepCoroutines(0.0)
+    App._stepTweens(0.0)
+    App._stepCoroutines(0.5)
+    App._stepTweens(1.0)
+    self.assertEqual(self.log, [])
+    App._stepCoroutines(1.0)
+    self.assertEqual(self.log, [100])
+    self.assertFalse(c.playing)
+    App._stepCoroutines(1.0)
+    self.assertEqual(self.log, [100, 'done'])
+    s.destroy()
+
+  def test_stopself(self):
+    def script():
+      yield
+      c.stop()
+      self.log.append('stopped')
+      yield
+      self.log.append('resumed')
+    c = App.start(script())
+    App._stepCoroutines(0.0)
+    App._stepCoroutines(0.0)
+    App._stepCoroutines(0.0)
+    self.assertEqual(self.log, ['stopped'])
+    self.assertFalse(c.playing)
+
+  def test_error(self):
+    def bad():
+      yield
+      raise ValueError
+    def good():
+      while True:
+        yield
+        self.log.append('good')
+    App.start(bad())
+    App.start(good())
+    App._stepCoroutines(0.0)
+    with self.assertRaises(ValueError):
+      App._stepCoroutines(0.0)
+    # the coroutine that was due after the failing one runs on the next frame
+    App._stepCoroutines(0.0)
+    App._stepCoroutines(0.0)
+    self.assertEqual(self.log, ['good', 'good'])
+
+  def test_destroy(self):
+    a = App(100,100)
+    def script():
+      try:
+        yield 10.0
+      finally:
+        self.log.append('closed')
+    c = App.start(script())
+    App._stepCoroutines(0.0)
+    a._destroy()
+    self.assertEqual(self.log, ['closed'])
+    self.assertFalse(c.playing)
+    self.assertEqual((App._frame, App._coroutinecount, App._timeheap), (0, 0, []))
+
+  def test_badyield(self):
+    def script():
+      yield 'soon'
+    App.start(script())
+    with self.assertRaises(TypeError):
+      App._stepCoroutines(0.0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,90 @@
+import unittest
+from ggame import App, ImageAsset
+from ggecs import World
+
+class TestECSMethods(unittest.TestCase):
+
+  def __init__(self, arg):
+    super().__init__(arg)
+    self.image = ImageAsset("bunny.png")
+
+  def test_entities(self):
+    w = World(capacity=2)
+    w.defineComponent('velocity', vx=0.0, vy=0.0)
+    w.defineComponent('health', hp=100)
+    e1 = w.createEntity(transform={'x': 5}, velocity={'vx': 2})
+    e2 = w.createEntity(health={})
+    e3 = w.createEntity(velocity={'vy': 1}, health={'hp': 7})
+    self.assertEqual(w.capacity, 4)
+    self.assertEqual(w.query('velocity').tolist(), [e1, e3])
+    self.assertEqual(w.query('velocity', 'health').tolist(), [e3])
+    self.assertEqual(w.component('health').hp[e3], 7)
+    self.assertEqual(w.component('transform').x[e1], 5)
+    w.removeComponent(e3, 'velocity')
+    self.assertFalse(w.hasComponent(e3, 'velocity'))
+    w.destroyEntity(e1)
+    self.assertEqual(w.query().tolist(), [e2, e3])
+    self.assertEqual(w.createEntity(), e1)
+    self.assertFalse(w.hasComponent(e1, 'velocity'))
+    w.destroy()
+
+  def test_systems(self):
+    w = World()
+    w.defineComponent('velocity', vx=0.0, vy=0.0)
+    calls = []
+    def move(world, ids, dt):
+      calls.append(ids.tolist())
+      t = world.component('transform')
+      v = world.component('velocity')
+      t.x[ids] += v.vx[ids] * dt
+      t.y[ids] += v.vy[ids] * dt
+    w.addSystem(move, 'velocity')
+    e1 = w.createEntity(velocity={'vx': 10})
+    e2 = w.createEntity(transform={'y': 3})
+    w.attachSprite(e1, self.image)
+    w.attachSprite(e2, self.image)
+    w.step(0.5)
+    g1, g2 = w._sprites[e1], w._sprites[e2]
+    self.assertEqual(calls, [[e1]])
+    self.assertEqual((g1.position.x, g2.position.y), (5, 3))
+    # only changed transforms are written to the display
+    g2.position.y = 99
+    w.component('transform').rotation[e1] = 1.0
+    w.step(0.5)
+    self.assertEqual(g2.position.y, 99)
+    self.assertEqual((g1.position.x, g1.rotation), (10, -1.0))
+    self.assertAlmostEqual(g1.affine[1], -0.841470984)
+    w.removeSystem(move)
+    w.step(0.5)
+    self.assertEqual(len(calls), 2)
+    w.destroyEntity(e1)
+    self.assertEqual(list(w._sprites), [e2])
+    w.destroy()
+
+  def test_display(self):
+    w = World()
+    e = w.createEntity()
+    w.attachSprite(e, self.image)
+    a = App(100,100)
+    w.step()
+    self.assertIs(w._container, App._layers['default'])
+    App._win.animate(lambda dummy: None)
+    self.assertEqual(App._win._renderer.rendered, [w._sprites[e]])
+    w.destroy()
+    self.assertEqual(App._layers['default'].GFX.things, [])
+    a._destroy()
+
+  def test_newapp(self):
+    a = App(100,100)
+    w = World()
+    a._destroy()
+    a = App(100,100)
+    w.step()
+    self.assertIs(w._container, App._layers['default'])
+    self.assertEqual(App._layers['default'].GFX.things, [w.GFX])
+    w.destroy()
+    a._destroy()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,101 @@
+import unittest
+from math import pi
+from ggame import App, Sprite, SpriteGroup, RectangleAsset, CircleAsset
+
+class TestSpriteGroupMethods(unittest.TestCase):
+
+  def __init__(self, arg):
+    super().__init__(arg)
+    self.rect = RectangleAsset(10, 10)
+
+  def test_groupmove(self):
+    a = App(100,100)
+    s1 = Sprite(self.rect, (0,0))
+    s2 = Sprite(self.rect, (20,0))
+    g = SpriteGroup((100,100), [s1, s2])
+    self.assertIs(s1.group, g)
+    self.assertIn(g.GFX, App._layers['default'].GFX.things)
+    self.assertNotIn(s1.GFX, App._layers['default'].GFX.things)
+    s1._setExtents()
+    self.assertEqual((s1.xmin, s1.ymin, s1.xmax, s1.ymax), (100, 100, 110, 110))
+    g.x = 200
+    s1._setExtents()
+    self.assertEqual((s1.xmin, s1.xmax), (200, 210))
+    s2._setExtents()
+    self.assertEqual((s2.xmin, s2.xmax), (220, 230))
+    g._setExtents()
+    self.assertEqual((g.xmin, g.ymin, g.xmax, g.ymax), (200, 100, 230, 110))
+    g.rotation = pi/2
+    s2._setExtents()
+    self.assertAlmostEqual(s2.ymin, 70)
+    self.assertAlmostEqual(s2.ymax, 80)
+    g.scale = 2
+    s1._setExtents()
+    self.assertAlmostEqual(s1.xmax - s1.xmin, 20)
+    g.remove(s1)
+    self.assertIsNone(s1.group)
+    self.assertIn(s1.GFX, App._layers['default'].GFX.things)
+    a._destroy()
+
+  def test_nestedgroup(self):
+    s1 = Sprite(self.rect, (0,0))
+    inner = SpriteGroup((10,0), [s1])
+    outer = SpriteGroup((100,0), [inner])
+    s1._setExtents()
+    self.assertEqual(s1.xmin, 110)
+    outer.x = 200
+    self.assertTrue(s1._extentsdirty)
+    s1._setExtents()
+    self.assertEqual(s1.xmin, 210)
+    outer.destroy()
+    self.assertNotIn(s1, App.spritelist)
+    self.assertEqual(App._grouplist, [])
+
+  def test_groupzindex(self):
+    s1 = Sprite(self.rect, (0,0))
+    s2 = Sprite(self.rect, (0,0))
+    g = SpriteGroup((0,0), [s1, s2])
+    self.assertEqual(g.GFX.things, [s1.GFX, s2.GFX])
+    s1.zIndex = 1
+    self.assertEqual(g.GFX.things, [s2.GFX, s1.GFX])
+    s3 = Sprite(self.rect, (0,0))
+    g.add(s3)
+    self.assertEqual(g.GFX.things, [s2.GFX, s3.GFX, s1.GFX])
+    g.zIndex = 3
+    self.assertEqual(g.zIndex, 3)
+    g.destroy()
+
+  def test_groupcollision(self):
+    s1 = Sprite(self.rect, (0,0))
+    s2 = Sprite(self.rect, (20,0))
+    g = SpriteGroup((0,0), [s1, s2])
+    other = Sprite(self.rect, (25,5))
+    far = Sprite(self.rect, (500,500))
+    self.assertTrue(g.collidingWith(other))
+    self.assertTrue(other.collidingWith(g))
+    self.assertFalse(g.collidingWith(far))
+    self.assertEqual(g.collidingWithSprites(), [other])
+    g.y = 100
+    self.assertFalse(g.collidingWith(other))
+    g.destroy()
+    other.destroy()
+    far.destroy()
+
+  def test_groupcirclecollision(self):
+    c1 = Sprite(CircleAsset(10), (0,0))
+    c2 = Sprite(CircleAsset(10), (15,0))
+    for c in (c1, c2):
+      c.width = c.height = 20
+    g = SpriteGroup((0,0), [c1, c2])
+    g.scale = 2
+    self.assertTrue(c1.collidingWith(c2))
+    # 30 apart in the world, with radii of 20
+    self.assertAlmostEqual(c2.xmin - c1.xmin, 30)
+    self.assertAlmostEqual(c1.xmax - c1.xmin, 40)
+    c2.x = 25
+    self.assertFalse(c1.collidingWith(c2))
+    g.destroy()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,67 @@
+import unittest
+from math import sqrt
+from ggame import ImageAsset, Frame, Sprite, RectangleAsset, TileMap
+from ggnav import NavGrid
+
+class TestNavMethods(unittest.TestCase):
+
+  def test_flowfield(self):
+    grid = NavGrid(10, 10, 10, 10)
+    # a wall across column 5, open at the bottom row
+    for row in range(9):
+      grid.block(5, row)
+    field = grid.flowField((95, 5))
+    self.assertEqual(field.target, (9, 0))
+    self.assertEqual(field.direction(95, 5), (0, 0))
+    self.assertEqual(field.direction(85, 5), (1, 0))
+    self.assertEqual(field.direction(45, 5), (0, 1))
+    # no corner cutting past the end of the wall
+    self.assertEqual(field.direction(45, 85), (0, 1))
+    d = field.direction(5, 85)
+    self.assertAlmostEqual(d[0], sqrt(0.5))
+    self.assertAlmostEqual(d[1], sqrt(0.5))
+    self.assertAlmostEqual(field.distance(45, 5), 17 + 3 * sqrt(2))
+    self.assertEqual(field.distance(55, 5), float('inf'))
+    self.assertEqual(field.direction(500, 5), (0, 0))
+    self.assertIs(grid.flowField((99, 9)), field)
+    grid.block(5, 0, False)
+    with self.assertRaises(IndexError):
+      grid.block(-1, 0)
+    with self.assertRaises(IndexError):
+      grid.block(grid.columns, 0)
+    other = grid.flowField((95, 5))
+    self.assertIsNot(other, field)
+    self.assertEqual(other.direction(45, 5), (1, 0))
+    self.assertIsNone(grid.flowField((-5, 5)))
+
+  def test_cache(self):
+    grid = NavGrid(5, 5, 1, 1, cachesize=2)
+    a = grid.flowField((0, 0))
+    b = grid.flowField((1, 0))
+    self.assertIs(grid.flowField((0, 0)), a)
+    grid.flowField((2, 0))
+    self.assertIs(grid.flowField((0, 0)), a)
+    self.assertIsNot(grid.flowField((1, 0)), b)
+
+  def test_obstacles(self):
+    tiles = ImageAsset("bunny.png", Frame(0,0,10,10), 2)
+    t = TileMap(tiles, 4, 3, (100, 0))
+    t.load([[-1, 0, -1, -1], [-1, 1, -1, -1]])
+    t.solid = set([0])
+    grid = NavGrid.fromTileMap(t)
+    self.assertEqual((grid.x, grid.cellwidth), (100, 10))
+    self.assertFalse(grid.walkable(1, 0))
+    self.assertTrue(grid.walkable(1, 1))
+    self.assertFalse(grid.walkable(4, 0))
+    wall = Sprite(RectangleAsset(5, 25), (122, 0))
+    grid.blockSprites([wall])
+    self.assertFalse(grid.walkable(2, 2))
+    self.assertTrue(grid.walkable(3, 2))
+    grid.blockRect(135, 25, 120, 0, False)
+    self.assertTrue(grid.walkable(2, 0))
+    wall.destroy()
+    t.destroy()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,62 @@
+import unittest
+from math import pi
+from ggame import App, Color
+from ggparticle import ParticleEmitter
+
+class TestParticleMethods(unittest.TestCase):
+
+  def test_emitter(self):
+    p = ParticleEmitter((100,100), capacity=50, rate=100, life=(1.0, 1.0),
+      speed=(10, 10), direction=(0, 0), gravity=(0, 20),
+      color=Color(0xff0000, 1.0), endcolor=Color(0x0000ff, 0.0), levels=3)
+    self.assertEqual(p.GFX.colours, [(0xff0000, 1.0), (0x800080, 0.5), (0x0000ff, 0.0)])
+    p.step(0.1)
+    self.assertEqual(p.count, 10)
+    p.step(0.5)
+    self.assertEqual(p.count, 50)
+    self.assertAlmostEqual(p.position[0,0], 105)
+    self.assertAlmostEqual(p.position[0,1], 105)
+    self.assertEqual(len(p.GFX.items), 50)
+    self.assertEqual(p.GFX.items[0][0], 1)
+    p.rate = 0
+    p.step(0.5)
+    # the first ten have expired
+    self.assertEqual(p.count, 40)
+    self.assertEqual(p.age[0], 0.5)
+    p.emit(100)
+    self.assertEqual(p.count, 50)
+    self.assertEqual(p.velocity[49,0], 10)
+    p.step(2)
+    self.assertEqual(p.count, 0)
+    self.assertEqual(p.GFX.items, [])
+    p.destroy()
+
+  def test_display(self):
+    p = ParticleEmitter(direction=(pi/2, pi/2))
+    self.assertIsNone(p._container)
+    a = App(100,100)
+    p.emit(3)
+    p.step(0.1)
+    self.assertIs(p._container, App._layers['default'])
+    self.assertLess(p.position[0,1], 0)
+    self.assertNotIn(p, App.spritelist)
+    App._win.animate(lambda dummy: None)
+    self.assertEqual(App._win._renderer.rendered, [p.GFX])
+    p.destroy()
+    self.assertEqual(App._layers['default'].GFX.things, [])
+    a._destroy()
+
+  def test_newapp(self):
+    a = App(100,100)
+    p = ParticleEmitter()
+    a._destroy()
+    a = App(100,100)
+    p.step(0.1)
+    self.assertIs(p._container, App._layers['default'])
+    self.assertEqual(App._layers['default'].GFX.things, [p.GFX])
+    p.destroy()
+    a._destroy()
+
+
+if __name__ == '__main__':
+    unittest.main()
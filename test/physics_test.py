@@ -0,0 +1,93 @@
+import unittest
+from ggame import Sprite, ImageAsset, Frame
+from ggphysics import PhysicsWorld, _contacts, _polygon
+
+class TestPhysicsMethods(unittest.TestCase):
+
+  def __init__(self, arg):
+    super().__init__(arg)
+    self.box = ImageAsset("bunny.png", Frame(0,0,30,30))
+    self.floor = ImageAsset("bunny.png", Frame(0,0,70,20))
+
+  def test_contacts(self):
+    a = _polygon([(0,0), (0,10), (10,10), (10,0), (0,0)])
+    self.assertEqual(a, [(10,0), (10,10), (0,10), (0,0)])
+    b = [(x + 8, y + 9) for x, y in a]
+    normal, points = _contacts(a, b)
+    self.assertEqual(normal, (0.0, 1.0))
+    self.assertEqual(sorted((p[0], p[1], p[2]) for p in points), [(8, 9, 1), (10, 9, 1)])
+    self.assertIsNone(_contacts(a, [(x + 11, y) for x, y in a]))
+    normal, points = _contacts((15, 5, 6), a)
+    self.assertEqual(normal, (-1.0, 0.0))
+    self.assertEqual(points[0][:3], (10, 5, 1))
+    normal, points = _contacts(a, (5, 5, 2))
+    self.assertEqual(points[0][2], 7)
+
+  def test_stack(self):
+    w = PhysicsWorld(gravity=(0, 400))
+    ground = Sprite(self.floor, (180, 400))
+    w.add(ground, static=True)
+    boxes = [Sprite(self.box, (200, 369 - i * 31)) for i in range(4)]
+    for b in boxes:
+      w.add(b)
+    for k in range(60):
+      w.step(1/60)
+    for i, b in enumerate(boxes):
+      self.assertAlmostEqual(b.x, 215, delta=1)
+      self.assertAlmostEqual(b.y, 385 - i * 30, delta=2)
+      self.assertFalse(w.bodies[b].awake)
+    # sleeping bodies stay put, until disturbed
+    w.step(1)
+    self.assertAlmostEqual(boxes[0].y, 385, delta=2)
+    w.bodies[boxes[3]].applyImpulse((300, 0))
+    w.step(1/60)
+    self.assertGreater(boxes[3].x, 215)
+    self.assertTrue(w.bodies[boxes[2]].awake)
+    ground.destroy()
+    for b in boxes:
+      b.destroy()
+
+  def test_motion(self):
+    w = PhysicsWorld(gravity=(0, 400), substep=1/120)
+    ground = Sprite(self.floor, (0, 400))
+    w.add(ground, static=True)
+    ball = Sprite(self.box, (5, 300))
+    body = w.add(ball, restitution=0.8)
+    w.step(1/60)
+    self.assertAlmostEqual(body.vy, 400/60)
+    top = None
+    for k in range(60):
+      w.step(1/60)
+      if body.vy < 0:
+        top = ball.y
+    self.assertIsNotNone(top)
+    w.remove(ball)
+    slider = Sprite(self.box, (20, 370))
+    body = w.add(slider, friction=0.5)
+    body.velocity = (100, 0)
+    for k in range(30):
+      w.step(1/60)
+    self.assertLess(body.vx, 10)
+    self.assertGreater(slider.x, 35)
+    # placing a sprite wakes its body
+    body.awake = False
+    slider.x = 25
+    w.step(1/60)
+    self.assertTrue(body.awake)
+    # destroyed sprites leave the world
+    ground.destroy()
+    w.step(1/60)
+    self.assertEqual(list(w.bodies), [slider])
+    self.assertEqual(w._contacts, {})
+    y = slider.y
+    for k in range(10):
+      w.step(1/60)
+    self.assertGreater(slider.y, y)
+    slider.destroy()
+    w.step(1/60)
+    self.assertEqual(w.bodies, {})
+    ball.destroy()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,53 @@
+import os
+import unittest
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+from ggame import App, Sprite, ImageAsset, module_exists
+
+@unittest.skipUnless(module_exists('pygame'), "requires pygame")
+class TestPygameMethods(unittest.TestCase):
+
+  def frame(self):
+    import pygame
+    win = App._win
+    win._w.fill((255,255,255))
+    win._draw(win.sprites, win.view)
+    return pygame.image.tostring(win._w, 'RGB')
+
+  def test_cachedlayer(self):
+    a = App(300,300)
+    image = ImageAsset("bunny.png")
+    walls = [Sprite(image, (i*20, 100)) for i in range(5)]
+    for w in walls:
+      w.static = True
+    App._updateView()
+    App._cull()
+    layer = App._staticlayer.GFX
+    f1 = self.frame()
+    cache = layer._cache
+    self.assertIsNotNone(cache[1])
+    # reused by the next frame, even when the camera scrolls
+    self.assertEqual(self.frame(), f1)
+    self.assertIs(layer._cache, cache)
+    App.camera.x = 17
+    App._updateView()
+    self.assertNotEqual(self.frame(), f1)
+    self.assertIs(layer._cache, cache)
+    App.camera.x = 0
+    App._updateView()
+    self.frame()
+    cache = layer._cache
+    # a change to a static sprite composites the layer again
+    walls[0].x = 200
+    self.assertIsNone(layer._cache)
+    f3 = self.frame()
+    self.assertIsNot(layer._cache, cache)
+    self.assertNotEqual(f3, f1)
+    App._invalidateStatic()
+    self.assertIsNone(layer._cache)
+    self.assertEqual(self.frame(), f3)
+    a._destroy()
+
+
+if __name__ == '__main__':
+  unittest.main()
@@ -0,0 +1,43 @@
+"""
+Benchmark spatial queries against a linear scan of 10,000 sprites.
+
+Run from the repository root: python test/spatial_bench.py
+"""
+import sys
+import os
+import random
+import timeit
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from ggame import App, Sprite, RectangleAsset
+
+COUNT = 10000
+QUERIES = 1000
+WORLD = 10000
+
+def distance(s, x, y):
+  dx = max(s.xmin - x, 0, x - s.xmax)
+  dy = max(s.ymin - y, 0, y - s.ymax)
+  return (dx*dx + dy*dy) ** 0.5
+
+def main():
+  rng = random.Random(0)
+  rects = [RectangleAsset(rng.randint(2, 40), rng.randint(2, 40)) for i in range(20)]
+  sprites = [Sprite(rng.choice(rects), (rng.uniform(0, WORLD), rng.uniform(0, WORLD)))
+    for i in range(COUNT)]
+  points = [(rng.uniform(0, WORLD), rng.uniform(0, WORLD)) for i in range(QUERIES)]
+  tests = [
+    ("nearestSprites k=5", lambda p: App.nearestSprites(p, 5)),
+    ("sorted scan k=5", lambda p: sorted(App.spritelist, 
+      key=lambda s: distance(s, p[0], p[1]))[:5]),
+    ("spritesWithin r=100", lambda p: App.spritesWithin(p, 100)),
+    ("filtered scan r=100", lambda p: [s for s in App.spritelist 
+      if distance(s, p[0], p[1]) <= 100]),
+    ]
+  for name, query in tests:
+    t = timeit.timeit(lambda: [query(p) for p in points], number=1)
+    print("{0:24} {1:8.1f} us/query".format(name, t / QUERIES * 1e6))
+  for s in sprites:
+    s.destroy()
+
+if __name__ == '__main__':
+  main()
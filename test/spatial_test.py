@@ -0,0 +1,139 @@
+import unittest
+import random
+from math import pi
+from ggame import App, Sprite, SpriteGroup, RectangleAsset, LineAsset
+from ggame import _AABBTree
+
+class TestSpatialMethods(unittest.TestCase):
+
+  def __init__(self, arg):
+    super().__init__(arg)
+    self.rect = RectangleAsset(10, 10)
+
+  def _height(self, node):
+    if node.left is None:
+      return 0
+    left = self._height(node.left)
+    right = self._height(node.right)
+    self.assertLessEqual(abs(left - right), 1)
+    self.assertIs(node.left.parent, node)
+    self.assertIs(node.right.parent, node)
+    return 1 + max(left, right)
+
+  def test_tree(self):
+    rng = random.Random(1)
+    tree = _AABBTree(margin=2)
+    boxes = {}
+    leaves = {}
+    for i in range(300):
+      x, y = rng.uniform(0, 1000), rng.uniform(0, 1000)
+      boxes[i] = (x, y, x + rng.uniform(1, 50), y + rng.uniform(1, 50))
+      leaves[i] = tree.insert(i, *boxes[i])
+    for i in range(0, 300, 3):
+      tree.remove(leaves.pop(i))
+      del boxes[i]
+    for i in range(1, 300, 3):
+      x, y = rng.uniform(0, 1000), rng.uniform(0, 1000)
+      boxes[i] = (x, y, x + 10, y + 10)
+      tree.update(leaves[i], *boxes[i])
+    self.assertEqual(self._height(tree.root), tree.root.height)
+    self.assertLess(tree.root.height, 20)
+    for q in range(50):
+      x, y = rng.uniform(0, 1000), rng.uniform(0, 1000)
+      region = (x, y, x + 100, y + 100)
+      found = set(tree.query(*region))
+      expected = set(i for i, b in boxes.items() if not (b[0] > region[2]
+        or b[2] < region[0] or b[1] > region[3] or b[3] < region[1]))
+      self.assertTrue(expected <= found)
+
+  def test_fatmargin(self):
+    tree = _AABBTree(margin=5)
+    leaf = tree.insert('a', 0, 0, 10, 10)
+    self.assertFalse(tree.update(leaf, 3, 3, 13, 13))
+    self.assertTrue(tree.update(leaf, 20, 20, 30, 30))
+    self.assertEqual(tree.query(24, 24, 26, 26), ['a'])
+
+  def test_spritesinrect(self):
+    a = App(100,100)
+    s1 = Sprite(self.rect, (0,0))
+    s2 = Sprite(self.rect, (100,100))
+    s3 = Sprite(self.rect, (300,0))
+    self.assertEqual(App.spritesAtPoint(5,5), [s1])
+    self.assertEqual(set(App.spritesInRect(105,105,-5,-5)), set([s1, s2]))
+    self.assertEqual(App.spritesAtPoint(50,50), [])
+    s3.x = 40
+    s3.y = 40
+    self.assertEqual(App.spritesAtPoint(45,45), [s3])
+    s3.rotation = pi/4
+    self.assertEqual(App.spritesAtPoint(45,35), [s3])
+    self.assertEqual(App.spritesAtPoint(42,49), [])
+    g = SpriteGroup((0,0), [s1])
+    g.x = 500
+    self.assertEqual(App.spritesAtPoint(5,5), [])
+    self.assertEqual(App.spritesAtPoint(505,5), [s1])
+    s2.destroy()
+    self.assertEqual(App.spritesAtPoint(105,105), [])
+    self.assertEqual(s1.collidingWithSprites(), [])
+    s3.position = (505, 5)
+    self.assertEqual(s1.collidingWithSprites(), [s3])
+    a._destroy()
+    self.assertIsNone(App._spatial.root)
+
+  def test_collisionorder(self):
+    a = App(100,100)
+    target = Sprite(RectangleAsset(100,100), (0,0))
+    sprites = [Sprite(self.rect, (90 - 10*i, 90 - 10*i)) for i in range(10)]
+    sprites[3].static = True
+    sprites[5].x = 500
+    sprites[5].x = 50
+    expected = [s for s in App.spritelist if s is not target]
+    self.assertEqual(target.collidingWithSprites(), expected)
+    sprites[2].destroy()
+    expected.remove(sprites[2])
+    self.assertEqual(target.collidingWithSprites(), expected)
+    a._destroy()
+
+  def test_raycast(self):
+    a = App(100,100)
+    wall = Sprite(self.rect, (100,0))
+    ball = Sprite(RectangleAsset(20,20), (195,-5))
+    line = Sprite(LineAsset(0,100), (300,-50))
+    shooter = Sprite(self.rect, (0,0))
+    hit = App.raycast((5,5), (1,0), 1000)
+    self.assertIs(hit[0], wall)
+    self.assertAlmostEqual(hit[1][0], 100)
+    self.assertAlmostEqual(hit[2], 95)
+    hits = App.raycastAll((5,5), (10,0), 1000)
+    self.assertEqual([h[0] for h in hits], [wall, ball, line])
+    self.assertAlmostEqual(hits[1][2], 190)
+    self.assertAlmostEqual(hits[2][1][0], 300)
+    # rays that start inside the shooter do not hit it
+    self.assertEqual(App.raycastAll((5,5), (-1,0), 1000), [])
+    self.assertEqual(App.raycast((5,5), (1,0), 50), None)
+    self.assertEqual(App.raycast((5,5), (0,1), 1000), None)
+    self.assertIs(App.raycast((5,5), (1,0), 1000, Sprite)[0], wall)
+    wall.y = 100
+    self.assertIs(App.raycast((5,5), (1,0), 1000)[0], ball)
+    self.assertEqual(App.raycast((5,5), (0,0), 1000), None)
+    a._destroy()
+
+  def test_nearest(self):
+    rng = random.Random(2)
+    sprites = [Sprite(self.rect, (rng.uniform(0,1000), rng.uniform(0,1000)))
+      for i in range(200)]
+    def dist(s):
+      return _AABBTree._pointBox(s, 500, 500)
+    ordered = sorted(sprites, key=dist)
+    near = App.nearestSprites((500,500), 5)
+    self.assertEqual([dist(s) for s in near], [dist(s) for s in ordered[:5]])
+    within = App.spritesWithin((500,500), 100)
+    self.assertEqual(set(within), set(s for s in sprites if dist(s) <= 100))
+    self.assertEqual(App.nearestSprites((500,500), 5, App), [])
+    sprites[0].position = (500, 500)
+    self.assertIs(App.nearestSprites((505,505), 1)[0], sprites[0])
+    for s in sprites:
+      s.destroy()
+
+
+if __name__ == '__main__':
+    unittest.main()
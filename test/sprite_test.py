@@ -34,6 +34,24 @@ class TestSpriteMethods(unittest.TestCase):
     self.assertEqual(s.width, 71)
     s.destroy()
 
+  def test_spritexform(self):
+    s = Sprite(self.rect, (100,100))
+    s.rotation = 0.5
+    s._setExtents()
+    m = s._matrix
+    self.assertIs(s.GFX.affine, m)
+    s.x += 10
+    s._setExtents()
+    self.assertIs(s._matrix, m)
+    s.rotation = 0
+    self.assertIsNone(s._matrix)
+    s._setExtents()
+    self.assertEqual((s.xmin, s.ymin, s.xmax, s.ymax), (110, 100, 120, 120))
+    s.scale = 2
+    s._setExtents()
+    self.assertEqual((s.xmin, s.ymin, s.xmax, s.ymax), (110, 100, 130, 140))
+    s.destroy()
+
   def test_spritecollision(self):
     s1 = Sprite(self.image, (51,52))
     s2 = Sprite(self.image, (51, 52))
@@ -62,6 +80,104 @@ class TestSpriteMethods(unittest.TestCase):
     s6.destroy()
     s7.destroy()
 
+  def test_pixelcollision(self):
+    s1 = Sprite(self.image, (0,0))
+    s2 = Sprite(RectangleAsset(4, 4), (33,2))
+    self.assertEqual(s1.collidingWith(s2), True)
+    s1.pixelCollision = True
+    # between the ears of the bunny
+    self.assertEqual(s1.collidingWith(s2), False)
+    s2.y = 60
+    self.assertEqual(s1.collidingWith(s2), True)
+    s2.destroy()
+    s3 = Sprite(self.image, (63,-96))
+    s3.pixelCollision = True
+    # bounding rectangles overlap, bunnies do not
+    self.assertEqual(s3.collidingWith(s1), False)
+    s3.y = -80
+    self.assertEqual(s3.collidingWith(s1), True)
+    s3.rotation = 3.14159
+    s3.position = (130, 160)
+    self.assertEqual(s1.collidingWith(s3), True)
+    self.assertEqual(len(Sprite._maskcache), 2)
+    size = Sprite._maskcachesize
+    Sprite._maskcachesize = 2
+    s1._alphaMask()
+    s3.rotation = 1.0
+    s3._alphaMask()
+    # the mask of the upside down bunny was the least recently used
+    self.assertEqual(len(Sprite._maskcache), 2)
+    self.assertEqual([key[1] for key in Sprite._maskcache], [0, 10])
+    Sprite._maskcachesize = size
+    s1.destroy()
+    s3.destroy()
+
+  def test_collisionlayers(self):
+    s1 = Sprite(self.rect, (0,0))
+    s2 = Sprite(self.rect, (5,5))
+    s3 = Sprite(self.rect, (5,5))
+    s1.collisionLayer = 1
+    s1.collisionMask = 2
+    s2.collisionLayer = 2
+    s3.collisionLayer = 4
+    self.assertEqual(s1.collidingWithSprites(), [s2])
+    self.assertEqual(s3.collidingWithSprites(), [s2])
+    s2.collisionMask = 4
+    self.assertEqual(s1.collidingWith(s2), False)
+    self.assertEqual(s2.collidingWithSprites(), [s3])
+    s1.destroy()
+    s2.destroy()
+    s3.destroy()
+
+  def test_sweptcollision(self):
+    wall = Sprite(RectangleAsset(4, 100), (100,0))
+    wall2 = Sprite(RectangleAsset(4, 100), (150,0))
+    bullet = Sprite(RectangleAsset(5, 5), (0,50))
+    bullet.x = 200
+    # tunnels through both walls
+    self.assertEqual(bullet.collidingWith(wall), False)
+    bullet.x = 0
+    bullet.sweptCollision = True
+    bullet.x = 200
+    self.assertEqual(bullet.collidingWith(wall), True)
+    self.assertEqual(wall.collidingWith(bullet), True)
+    self.assertAlmostEqual(bullet.timeOfImpact(wall), 0.475)
+    self.assertEqual(bullet.collidingWithSprites(), [wall, wall2])
+    self.assertEqual(wall2.collidingWithSprites(), [bullet])
+    # start a new frame: the bullet has not moved since
+    bullet.sweptCollision = True
+    self.assertEqual(bullet.collidingWithSprites(), [])
+    bullet.y = 200
+    self.assertEqual(bullet.collidingWithSprites(), [])
+    bullet.sweptCollision = False
+    self.assertEqual(len(App._sweptsprites), 0)
+    wall.destroy()
+    wall2.destroy()
+    bullet.destroy()
+
+  def test_sweptpixelcollision(self):
+    s1 = Sprite(self.image, (0,0))
+    s1.pixelCollision = True
+    s2 = Sprite(RectangleAsset(4, 4), (33,-20))
+    s2.sweptCollision = True
+    # falls between the ears of the bunny
+    s2.y = 2
+    self.assertIsNotNone(s2.timeOfImpact(s1))
+    self.assertEqual(s2.collidingWith(s1), False)
+    self.assertEqual(s1.collidingWith(s2), False)
+    self.assertEqual(s2.collidingWithSprites(), [])
+    s2.y = 60
+    self.assertEqual(s2.collidingWithSprites(), [s1])
+    self.assertEqual(s2.collidingWith(s1), True)
+    # passes through the body of the bunny
+    s2.position = (-100, 86)
+    s2.sweptCollision = True
+    s2.x = 200
+    self.assertEqual(s2.collidingWith(s1), True)
+    self.assertEqual(s1.collidingWith(s2), True)
+    s1.destroy()
+    s2.destroy()
+
   def test_advancedspritecollision(self):
     class SpriteChild(Sprite):
       pass
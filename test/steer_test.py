@@ -0,0 +1,51 @@
+import unittest
+import random
+from ggame import Sprite, RectangleAsset
+from ggsteer import Flock
+
+class TestSteerMethods(unittest.TestCase):
+
+  def __init__(self, arg):
+    super().__init__(arg)
+    self.rect = RectangleAsset(4, 4)
+
+  def test_neighbours(self):
+    rng = random.Random(3)
+    sprites = [Sprite(self.rect, (rng.uniform(-300,300), rng.uniform(0,300)))
+      for i in range(150)]
+    f = Flock(sprites, radius=40)
+    i, j, d, dist2 = f._neighbours()
+    found = set(zip(i.tolist(), j.tolist()))
+    expected = set((a, b) for a in range(150) for b in range(150) if a != b
+      and (sprites[a].x - sprites[b].x)**2 + (sprites[a].y - sprites[b].y)**2 <= 1600)
+    self.assertEqual(found, expected)
+    for s in sprites:
+      s.destroy()
+
+  def test_step(self):
+    s1 = Sprite(self.rect, (0,0))
+    s2 = Sprite(self.rect, (5,0))
+    s3 = Sprite(self.rect, (500,0))
+    s4 = Sprite(self.rect, (540,0))
+    f = Flock([s1, s2, s3], radius=50, maxforce=1)
+    f.add(s4, (0,3))
+    f.step()
+    # close members separate, distant ones draw together
+    self.assertLess(s1.x, 0)
+    self.assertGreater(s2.x, 5)
+    self.assertGreater(s3.x, 500)
+    self.assertLess(s4.x, 540)
+    self.assertEqual(s4.position, tuple(f.position[3]))
+    for k in range(50):
+      f.step()
+    self.assertLessEqual(max((f.velocity**2).sum(axis=1)), 16.0001)
+    f.remove(s2)
+    self.assertEqual(len(f.position), 3)
+    f.place(s1, (10,10))
+    self.assertEqual(s1.position, (10,10))
+    for s in (s1, s2, s3, s4):
+      s.destroy()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,89 @@
+import unittest
+from ggame import ImageAsset, Frame, App, Sprite, RectangleAsset, TileMap
+
+class TestTileMapMethods(unittest.TestCase):
+
+  def __init__(self, arg):
+    super().__init__(arg)
+    self.tiles = ImageAsset("bunny.png", Frame(0,0,10,10), 4)
+
+  def test_tiles(self):
+    t = TileMap(self.tiles, 100, 50, (20,0), chunksize=8)
+    self.assertEqual(t[3,4], -1)
+    t[3,4] = 2
+    self.assertEqual(t[3,4], 2)
+    self.assertIs(t._cells[4*100+3].texture, self.tiles[2])
+    t.load([[0, 1], [-1, 3]])
+    self.assertEqual(t[1,0], 1)
+    self.assertEqual(t[0,1], -1)
+    self.assertEqual(len(t._chunks), 1)
+    t[99,49] = 0
+    self.assertEqual(len(t._chunks), 2)
+    t[99,49] = -1
+    self.assertEqual(len(t._cells), 4)
+    with self.assertRaises(IndexError):
+      t[100,0] = 1
+    # an index with no image leaves the cell unchanged
+    with self.assertRaises(IndexError):
+      t[0,0] = 4
+    self.assertEqual(t[0,0], 0)
+    with self.assertRaises(IndexError):
+      t[5,5] = 4
+    self.assertEqual(t[5,5], -1)
+    self.assertEqual(len(t._chunks), 2)
+    # any negative index empties the cell
+    t[5,5] = -2
+    self.assertEqual(t[5,5], -1)
+    t[3,4] = -2
+    self.assertEqual(t[3,4], -1)
+    t[3,4] = 2
+    self.assertEqual(t.cellAt(25,15), (0,1))
+    self.assertEqual(t.cellAt(15,15), None)
+    self.assertEqual(t.tileAt(35,5), 1)
+    self.assertEqual(t.tileAt(55,45), 2)
+    self.assertEqual(t.tileAt(5,5), -1)
+    self.assertEqual(t.tilesInRect(30,0,20,19), [(0,0,0), (1,0,1), (1,1,3)])
+    t.destroy()
+    self.assertEqual(App._tilemaps, [])
+
+  def test_collision(self):
+    t = TileMap(self.tiles, 20, 20)
+    t.load([[0, 0, 0, 0], [-1, -1, -1, 1]])
+    s = Sprite(RectangleAsset(5, 5), (12,12))
+    self.assertFalse(t.collidingWith(s))
+    s.y = 8
+    self.assertEqual(t.collidingTiles(s), [(1,0)])
+    s.x = 28
+    self.assertEqual(t.collidingTiles(s), [(2,0), (3,0), (3,1)])
+    t.solid = set([1])
+    self.assertEqual(t.collidingTiles(s), [(3,1)])
+    s.x = 500
+    self.assertFalse(t.collidingWith(s))
+    s.destroy()
+    t.destroy()
+
+  def test_chunks(self):
+    a = App(100,100)
+    t = TileMap(self.tiles, 100, 100, chunksize=5)
+    self.assertIs(t._container, App._layers['default'])
+    for i in range(100):
+      t[i,i] = i % 4
+    self.assertEqual(len(t._chunks), 20)
+    App._cull()
+    visible = [key for key, chunk in t._chunks.items() if chunk.renderable]
+    self.assertEqual(sorted(visible), [(0,0), (1,1), (2,2)])
+    self.assertTrue(t._chunks[0,0].cacheAsBitmap)
+    App.camera.x = App.camera.y = 500
+    App._cull()
+    visible = [key for key, chunk in t._chunks.items() if chunk.renderable]
+    self.assertEqual(sorted(visible), [(10,10), (11,11), (12,12)])
+    App._win.animate(lambda dummy: None)
+    self.assertEqual(len(App._win._renderer.rendered), 15)
+    t.zIndex = 5
+    self.assertIs(App._layers['default'].GFX.things[-1], t.GFX)
+    a._destroy()
+    self.assertEqual(App._tilemaps, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
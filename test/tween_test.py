@@ -0,0 +1,71 @@
+import unittest
+from ggame import App, Sprite, ImageAsset, Tween
+
+class TestTweenMethods(unittest.TestCase):
+
+  def __init__(self, arg):
+    super().__init__(arg)
+    self.image = ImageAsset("bunny.png")
+    self.completed = []
+
+  def oncomplete(self, tween):
+    self.completed.append(tween)
+
+  def test_tween(self):
+    s = Sprite(self.image, (0,0))
+    t = s.tween('x', 100, 2.0, Tween.linear, self.oncomplete)
+    self.assertTrue(t.playing)
+    App._stepTweens(10.0)
+    self.assertEqual(s.x, 0)
+    App._stepTweens(10.5)
+    self.assertEqual(s.x, 25)
+    s.tween('scale', 2.0, 1.0)
+    App._stepTweens(11.0)
+    self.assertEqual(s.x, 50)
+    self.assertEqual(s.scale, 1.0)
+    App._stepTweens(11.5)
+    self.assertEqual(s.scale, 1.5)
+    App._stepTweens(12.5)
+    self.assertEqual((s.x, s.scale), (100, 2.0))
+    self.assertEqual(self.completed, [t])
+    self.assertFalse(t.playing)
+    App._stepTweens(13.0)
+    self.assertEqual(len(App._tweens['x'].tweens), 0)
+    s.destroy()
+
+  def test_chain(self):
+    s1 = Sprite(self.image, (0,0))
+    s2 = Sprite(self.image, (0,0))
+    t = s1.tween('x', 10, 1.0, Tween.easeIn)
+    t2 = s2.tween('x', 50, 1.0)
+    last = t.then(s1, 'y', 20, 1.0, Tween.linear, self.oncomplete)
+    self.assertFalse(last.playing)
+    App._stepTweens(0)
+    App._stepTweens(0.5)
+    self.assertEqual(s1.x, 2.5)
+    self.assertEqual(s2.x, 25)
+    # cancelling moves the other tween of the same attribute into its slot
+    t.cancel()
+    self.assertEqual(t2._slot, 0)
+    App._stepTweens(1.0)
+    self.assertEqual(s1.x, 2.5)
+    self.assertEqual(s2.x, 50)
+    self.assertFalse(last.playing)
+    t.play()
+    App._stepTweens(1.0)
+    App._stepTweens(2.0)
+    self.assertEqual(s1.x, 10)
+    self.assertTrue(last.playing)
+    App._stepTweens(2.0)
+    App._stepTweens(2.5)
+    self.assertEqual(s1.y, 10)
+    s1.tween('y', 0, 1.0)
+    self.assertFalse(last.playing)
+    s1.destroy()
+    s2.destroy()
+    self.assertEqual(self.completed, [])
+    self.assertEqual(len(App._tweens['y'].tweens), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()